@@ -0,0 +1,21 @@
+"""
+Election Commission of India (ECI) voter search gateway client.
+"""
+
+from .client import (
+    EciClient,
+    EciGatewayError,
+    build_search_body,
+    extract_voter_details,
+    get_eci_client,
+    get_state_code,
+)
+
+__all__ = [
+    'EciClient',
+    'EciGatewayError',
+    'build_search_body',
+    'extract_voter_details',
+    'get_eci_client',
+    'get_state_code',
+]
@@ -0,0 +1,470 @@
+"""
+ECI Gateway Client Module
+
+One long-lived async HTTP client for the Election Commission's voter
+search gateway, shared by /captcha/generate and /voter/search:
+- Keep-alive connection pool (ECI_MAX_CONNECTIONS), so TLS handshakes to
+  gateway-voters.eci.gov.in are paid once per connection, not per call
+- HTTP/2 when the h2 package is installed (pip install "httpx[http2]");
+  plain HTTP/1.1 keep-alive otherwise
+- Bounded concurrency (ECI_MAX_CONCURRENCY): excess calls wait briefly
+  for a slot and then fail fast instead of piling up
+- Per-call connect/read/pool timeouts instead of a blanket 30 s
+- The website session (cookies from the portal's landing page) is
+  established once and refreshed every ECI_SESSION_TTL seconds, or
+  after the gateway rejects a call
+
+Nothing here blocks the event loop. The response parsing helpers
+(get_state_code, build_search_body, extract_voter_details) are shared
+with the blocking CLI fetcher in main.py.
+"""
+
+import asyncio
+import importlib.util
+import os
+import time
+from typing import Optional, Tuple, Union
+
+import httpx
+
+# Gateway configuration (override via environment)
+ECI_MAX_CONNECTIONS = int(os.environ.get("ECI_MAX_CONNECTIONS", "20"))
+ECI_MAX_KEEPALIVE = int(os.environ.get("ECI_MAX_KEEPALIVE", "10"))
+ECI_MAX_CONCURRENCY = int(os.environ.get("ECI_MAX_CONCURRENCY", "16"))
+ECI_CONNECT_TIMEOUT = float(os.environ.get("ECI_CONNECT_TIMEOUT", "5"))
+ECI_READ_TIMEOUT = float(os.environ.get("ECI_READ_TIMEOUT", "15"))
+ECI_POOL_TIMEOUT = float(os.environ.get("ECI_POOL_TIMEOUT", "5"))
+ECI_SESSION_TTL = float(os.environ.get("ECI_SESSION_TTL", "600"))
+ECI_HTTP2 = os.environ.get("ECI_HTTP2", "1") == "1"
+
+# API endpoints
+PORTAL_URL = "https://electoralsearch.eci.gov.in/"
+CAPTCHA_API_URL = "https://gateway-voters.eci.gov.in/api/v1/captcha-service/generateCaptcha"
+SEARCH_API_URL = "https://gateway-voters.eci.gov.in/api/v1/elastic/search-by-epic-from-national-display"
+
+# Headers matching the browser request
+HEADERS = {
+    'accept': 'application/json, text/plain, */*',
+    'accept-language': 'en-IN,en;q=0.9,hi;q=0.8,mr;q=0.7',
+    'applicationname': 'ELECTORAL-SEARCH',
+    'appname': 'ELECTORAL-SEARCH',
+    'channelidobo': 'ELECTORAL-SEARCH',
+    'content-type': 'application/json',
+    'origin': 'https://electoralsearch.eci.gov.in',
+    'referer': 'https://electoralsearch.eci.gov.in/',
+    'sec-ch-ua': '"Google Chrome";v="143", "Chromium";v="143", "Not A(Brand";v="24"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Windows"',
+    'sec-fetch-dest': 'empty',
+    'sec-fetch-mode': 'cors',
+    'sec-fetch-site': 'same-site',
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36'
+}
+
+# State name -> ECI state code (stateCd). Add more mappings as needed.
+STATE_CODES = {
+    "maharashtra": "S13",
+    "delhi": "S07",
+    "karnataka": "S10",
+    "tamil nadu": "S22",
+    "west bengal": "S25",
+    "uttar pradesh": "S24",
+    "gujarat": "S06",
+    "rajasthan": "S20",
+    "madhya pradesh": "S12",
+    "kerala": "S11",
+    "andhra pradesh": "S01",
+    "telangana": "S29",
+    "bihar": "S04",
+    "odisha": "S18",
+    "punjab": "S19",
+    "haryana": "S08",
+    "assam": "S03",
+    "jharkhand": "S09",
+    "chhattisgarh": "S26",
+    "uttarakhand": "S28",
+    "himachal pradesh": "S02",
+    "goa": "S05",
+}
+
+
+class EciGatewayError(RuntimeError):
+    """Raised when the ECI gateway cannot be reached or rejects a call."""
+
+
+def get_state_code(state_name: str) -> Optional[str]:
+    """
+    Map state name to state code.
+
+    Returns:
+        State code (e.g. "S13"), or None for unknown states
+    """
+    return STATE_CODES.get(state_name.lower().strip())
+
+
+def build_search_body(epic_number: str, captcha_text: str, captcha_id: str, state: Optional[str] = None) -> dict:
+    """
+    Request body for the search API - exact format from browser network inspection.
+
+    Args:
+        epic_number: EPIC number to search for
+        captcha_text: CAPTCHA text typed by the user
+        captcha_id: CAPTCHA ID returned with the CAPTCHA image
+        state: Optional state name (mapped to its state code)
+
+    Returns:
+        JSON-serializable request body
+    """
+    body = {
+        "isPortal": True,  # Boolean flag indicating portal access
+        "epicNumber": epic_number.upper(),
+        "captchaData": captcha_text.lower(),
+        "captchaId": captcha_id,
+        "securityKey": "na"  # Fixed value as per API requirement
+    }
+
+    # Note: stateCd requires state code (e.g., "S13") not state name
+    if state:
+        state_code = get_state_code(state)
+        if state_code:
+            body["stateCd"] = state_code
+    return body
+
+
+def extract_voter_details(api_response):
+    """
+    Extract and format voter details from API response.
+    """
+    if not api_response:
+        return None
+
+    print("Extracting voter details from API response...")
+
+    # Check if there's an error or no results
+    if isinstance(api_response, dict):
+        # Check for error messages
+        if "message" in api_response:
+            message = str(api_response.get("message", ""))
+            if "not found" in message.lower() or "no data" in message.lower():
+                print(f"API Message: {message}")
+                return None
+
+        # Check for success/error indicators
+        if "status" in api_response:
+            status = api_response.get("status")
+            if status and "error" in str(status).lower():
+                error_msg = api_response.get("message", "Unknown error")
+                print(f"API Error: {error_msg}")
+                return None
+
+    # Extract voter details - structure may vary, so we'll try multiple patterns
+    voter_data = {}
+
+    # Common field mappings based on actual API response
+    field_mappings = {
+        'epic_number': ['epicNumber', 'epic', 'epicNo'],
+        'name': ['fullName', 'name', 'electorName', 'voterName'],
+        'first_name': ['applicantFirstName'],
+        'last_name': ['applicantLastName'],
+        'relative_name': ['relativeFullName', 'relativeName', 'relationName', 'fatherName', 'husbandName'],
+        'relation_type': ['relationType'],
+        'age': ['age'],
+        'gender': ['gender'],
+        'state': ['stateName', 'state'],
+        'district': ['districtValue', 'district', 'districtName'],
+        'assembly_constituency': ['asmblyName', 'assemblyConstituency', 'constituency', 'acName'],
+        'ac_number': ['acNumber'],
+        'parliament_constituency': ['prlmntName'],
+        'parliament_number': ['prlmntNo'],
+        'part_number': ['partNumber', 'partNo'],
+        'part_name': ['partName'],
+        'serial_number': ['partSerialNumber', 'serialNumber', 'serialNo', 'slNo'],
+        'section_number': ['sectionNo'],
+        'polling_station': ['psbuildingName', 'pollingStation', 'psName'],
+        'polling_station_address': ['buildingAddress'],
+        'polling_station_room': ['psRoomDetails'],
+        'part_lat_long': ['partLatLong', 'latLong'],
+    }
+
+    # Try to extract from response
+    # The response is a list with objects containing "content" field
+    data_to_process = None
+
+    if isinstance(api_response, list) and len(api_response) > 0:
+        # Get first result
+        first_result = api_response[0]
+        # The actual voter data is in the "content" field
+        if isinstance(first_result, dict) and "content" in first_result:
+            data_to_process = first_result["content"]
+        else:
+            data_to_process = first_result
+    elif isinstance(api_response, dict):
+        # Check if data is nested
+        if "content" in api_response:
+            data_to_process = api_response["content"]
+        elif "data" in api_response:
+            data_to_process = api_response["data"]
+            if isinstance(data_to_process, list) and len(data_to_process) > 0:
+                data_to_process = data_to_process[0]
+                if isinstance(data_to_process, dict) and "content" in data_to_process:
+                    data_to_process = data_to_process["content"]
+        elif "response" in api_response:
+            data_to_process = api_response["response"]
+            if isinstance(data_to_process, list) and len(data_to_process) > 0:
+                data_to_process = data_to_process[0]
+        else:
+            data_to_process = api_response
+
+    if data_to_process and isinstance(data_to_process, dict):
+        # Extract fields using mappings
+        for field_name, possible_keys in field_mappings.items():
+            for key in possible_keys:
+                # Case-insensitive key matching
+                for actual_key in data_to_process.keys():
+                    if key.lower() == actual_key.lower():
+                        value = data_to_process[actual_key]
+                        if value and str(value).strip() not in ['', 'N/A', 'NA', 'null', 'None']:
+                            voter_data[field_name] = str(value).strip()
+                            break
+                if field_name in voter_data:
+                    break
+
+        # If no structured data found, try to get all non-empty string values
+        if not voter_data:
+            print("Warning: Could not map fields using known keys. Extracting all fields...")
+            for key, value in data_to_process.items():
+                if isinstance(value, (str, int)) and str(value).strip() not in ['', 'N/A', 'NA', 'null', 'None']:
+                    voter_data[key] = str(value).strip()
+    else:
+        # Fallback: return the raw response structure
+        print("Warning: Could not parse API response structure. Returning raw data.")
+        return api_response
+
+    return voter_data if voter_data else None
+
+
+class EciClient:
+    """
+    Shared, pooled async client for the ECI gateway.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = ECI_MAX_CONNECTIONS,
+        max_keepalive: int = ECI_MAX_KEEPALIVE,
+        max_concurrency: int = ECI_MAX_CONCURRENCY,
+        http2: bool = ECI_HTTP2,
+        session_ttl: float = ECI_SESSION_TTL,
+    ):
+        """
+        Initialize the client (the connection pool opens on first use).
+
+        Args:
+            max_connections: Maximum open connections to the gateway
+            max_keepalive: Idle connections kept open for reuse
+            max_concurrency: Calls in flight at once; more wait up to ECI_POOL_TIMEOUT
+            http2: Use HTTP/2 if the h2 package is installed
+            session_ttl: Seconds before the portal session is refreshed
+        """
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.max_concurrency = max_concurrency
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.session_ttl = session_ttl
+        self.timeout = httpx.Timeout(
+            connect=ECI_CONNECT_TIMEOUT,
+            read=ECI_READ_TIMEOUT,
+            write=ECI_CONNECT_TIMEOUT,
+            pool=ECI_POOL_TIMEOUT,
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session_lock: Optional[asyncio.Lock] = None
+        self._session_expires = 0.0
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.sessions = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                ),
+            )
+            # Created lazily so they bind to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._session_lock = asyncio.Lock()
+        return self._client
+
+    async def _request(self, method: str, url: str, timeout: Optional[float] = None, **kwargs) -> httpx.Response:
+        """
+        Send one request through the shared pool.
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            timeout: Read timeout for this call (default: ECI_READ_TIMEOUT)
+            **kwargs: Passed to httpx (json=..., params=...)
+
+        Raises:
+            EciGatewayError: Too many calls in flight, timeout, or connection failure
+        """
+        client = self._get_client()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), ECI_POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise EciGatewayError("Too many requests to the ECI gateway, please retry shortly")
+
+        try:
+            self.calls += 1
+            call_timeout = self.timeout
+            if timeout is not None:
+                call_timeout = httpx.Timeout(
+                    connect=self.timeout.connect, read=timeout, write=self.timeout.write, pool=self.timeout.pool
+                )
+            return await client.request(method, url, timeout=call_timeout, **kwargs)
+        except httpx.TimeoutException as e:
+            self.timeouts += 1
+            raise EciGatewayError(f"ECI gateway timed out ({type(e).__name__})")
+        except httpx.HTTPError as e:
+            self.failures += 1
+            raise EciGatewayError(f"Error contacting ECI gateway: {e}")
+        finally:
+            self._semaphore.release()
+
+    async def establish_session(self, force: bool = False):
+        """
+        Visit the portal's landing page for its cookies, unless a session
+        younger than session_ttl exists. Concurrent callers share one visit.
+
+        Raises:
+            EciGatewayError: The portal did not answer with 200
+        """
+        self._get_client()
+        if not force and time.monotonic() < self._session_expires:
+            return
+
+        async with self._session_lock:
+            if not force and time.monotonic() < self._session_expires:
+                return
+            response = await self._request("GET", PORTAL_URL)
+            if response.status_code != 200:
+                print(f"Error establishing ECI session. Status: {response.status_code}")
+                raise EciGatewayError("Failed to establish session with ECI website")
+            self._session_expires = time.monotonic() + self.session_ttl
+            self.sessions += 1
+
+    def _invalidate_session(self):
+        self._session_expires = 0.0
+
+    async def generate_captcha(self) -> Tuple[str, str]:
+        """
+        Get a CAPTCHA image and its ID.
+
+        Returns:
+            (base64 encoded CAPTCHA image, CAPTCHA ID)
+
+        Raises:
+            EciGatewayError: Gateway unreachable or CAPTCHA not generated
+        """
+        await self.establish_session()
+        response = await self._request("GET", CAPTCHA_API_URL)
+
+        if response.status_code != 200:
+            print(f"Error: CAPTCHA API returned status code {response.status_code}: {response.text[:500]}")
+            self._invalidate_session()
+            raise EciGatewayError("Failed to generate CAPTCHA")
+
+        try:
+            data = response.json()
+        except ValueError:
+            print(f"Error: CAPTCHA response is not valid JSON: {response.text[:500]}")
+            raise EciGatewayError("Failed to generate CAPTCHA")
+
+        captcha = data.get("captcha")
+        captcha_id = data.get("id")
+        if data.get("status") != "Success" or data.get("statusCode") != 200 or not captcha or not captcha_id:
+            print(f"Error: CAPTCHA generation failed. Response: {data}")
+            raise EciGatewayError("Failed to generate CAPTCHA")
+        return captcha, captcha_id
+
+    async def search_by_epic(
+        self,
+        epic_number: str,
+        captcha_text: str,
+        captcha_id: str,
+        state: Optional[str] = None,
+    ) -> Union[dict, list, None]:
+        """
+        Call the search API with EPIC number, CAPTCHA text and CAPTCHA ID.
+
+        Returns:
+            Parsed JSON response, or None when the gateway answered with an
+            error (wrong CAPTCHA, unknown EPIC, ...)
+
+        Raises:
+            EciGatewayError: Gateway unreachable or timed out
+        """
+        await self.establish_session()
+        response = await self._request(
+            "POST",
+            SEARCH_API_URL,
+            json=build_search_body(epic_number, captcha_text, captcha_id, state),
+        )
+
+        if response.status_code != 200:
+            print(f"Error: Search API returned status code {response.status_code}: {response.text[:500]}")
+            if response.status_code in (401, 403):
+                self._invalidate_session()
+            return None
+
+        try:
+            return response.json()
+        except ValueError:
+            print(f"Error: Search response is not valid JSON: {response.text[:500]}")
+            return None
+
+    def stats(self) -> dict:
+        """Return client counters."""
+        return {
+            'http2': self.http2,
+            'max_connections': self.max_connections,
+            'max_concurrency': self.max_concurrency,
+            'calls': self.calls,
+            'failures': self.failures,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected,
+            'sessions': self.sessions,
+        }
+
+    async def aclose(self):
+        """Close all pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._session_expires = 0.0
+
+
+# Global client instance (lazy loading)
+_client_instance: Optional[EciClient] = None
+
+
+def get_eci_client() -> EciClient:
+    """
+    Get or create the global ECI gateway client.
+
+    Returns:
+        EciClient instance
+    """
+    global _client_instance
+    if _client_instance is None:
+        _client_instance = EciClient()
+    return _client_instance
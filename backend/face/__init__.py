@@ -6,25 +6,68 @@ and embedding, replacing the older YOLO + custom embedding pipeline.
 """
 
 from .storage import FaceStorage, get_storage
+from .sharding import ShardedFaceStorage
+from .async_storage import AsyncFaceStorage, get_async_storage
+from .backends import EmbedderBackend, create_embedder, get_backend, register_backend
+from .inference import InferenceExecutor, InferenceUnavailable, get_inference_executor
+from .onnx_embedder import OnnxFaceEmbedder
+from .batching import MicroBatcher, get_micro_batcher
+from .cascade import CascadeVerifier, get_cascade_verifier
+from .cache import EmbeddingCache, InferenceResultCache
+from .ingest import ImageTooLargeError, decode_base64_image
+from .pipeline import FacePipeline, create_pipeline
+from .quality import FaceQualityChecker, FaceQualityError, get_quality_checker
+from .quantization import QuantizedVector
+from .stream import StreamVerifier
+from .tracking import FaceTracker
+from .gallery import FaceGallery, get_gallery
+from .ann_index import IVFIndex, get_duplicate_index
 
-# DeepFace-based embedder is defined in embedder.py
-# Import lazily to avoid requiring deepface for scripts that only need storage
-# This allows clear_database.py and other storage-only scripts to work without deepface
-try:
-    from .embedder import FaceEmbedder, get_embedder
-except ImportError:
-    FaceEmbedder = None
-
-    def get_embedder():
-        raise ImportError(
-            "DeepFace embedder is not available. "
-            "Install deepface and its dependencies: pip install deepface tf-keras"
-        )
+# DeepFace/TensorFlow and ultralytics/torch are imported on first use
+# inside embedder.py and detector.py, so importing this package (e.g. from
+# clear_database.py, which only needs storage) stays fast and light;
+# test_import_time.py guards this
+from .embedder import FaceEmbedder, get_embedder
+from .detector import DetectedFace, FaceDetector, get_detector
 
 __all__ = [
     'FaceEmbedder',
     'get_embedder',
+    'FaceDetector',
+    'DetectedFace',
+    'get_detector',
     'FaceStorage',
     'get_storage',
+    'ShardedFaceStorage',
+    'AsyncFaceStorage',
+    'get_async_storage',
+    'InferenceExecutor',
+    'InferenceUnavailable',
+    'get_inference_executor',
+    'EmbedderBackend',
+    'create_embedder',
+    'get_backend',
+    'register_backend',
+    'OnnxFaceEmbedder',
+    'MicroBatcher',
+    'get_micro_batcher',
+    'CascadeVerifier',
+    'get_cascade_verifier',
+    'EmbeddingCache',
+    'InferenceResultCache',
+    'ImageTooLargeError',
+    'decode_base64_image',
+    'FacePipeline',
+    'create_pipeline',
+    'FaceQualityChecker',
+    'FaceQualityError',
+    'get_quality_checker',
+    'QuantizedVector',
+    'StreamVerifier',
+    'FaceTracker',
+    'FaceGallery',
+    'get_gallery',
+    'IVFIndex',
+    'get_duplicate_index',
 ]
 
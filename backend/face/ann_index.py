@@ -0,0 +1,561 @@
+"""
+Approximate Nearest-Neighbour Face Index
+
+IVF-style (inverted file) index over L2-normalized embeddings, built fully
+in-process with NumPy:
+- A coarse quantizer (spherical k-means centroids) partitions the gallery
+- Each partition is a contiguous array of row numbers into the shared
+  FaceGallery (gallery.py), so the index adds no second copy of the vectors
+- The number of partitions grows with the gallery (about 4 * sqrt(N))
+- A query only scores the `nprobe` partitions closest to it
+
+Used at registration time to detect the same face enrolled under a
+different voter_id without scanning every stored embedding.
+"""
+
+import os
+import threading
+import numpy as np
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .gallery import FaceGallery, get_gallery
+from .quantization import EMBEDDING_DTYPE, validate_dtype
+
+# Duplicate-face policy for /face/register
+DUPLICATE_SIMILARITY_THRESHOLD = float(os.environ.get("FACE_DUPLICATE_THRESHOLD", "0.80"))
+DUPLICATE_ACTION = os.environ.get("FACE_DUPLICATE_ACTION", "reject")  # "reject" or "flag"
+
+# Serializes duplicate check + insert so two registrations of the same face
+# cannot both pass the check before either is indexed
+_registration_lock = threading.Lock()
+
+
+class RegistrationResult(NamedTuple):
+    """Outcome of store_unique_embedding()."""
+    stored: bool
+    error: Optional[str]  # why nothing was stored (None if stored)
+    duplicate_of: Optional[str]  # best matching voter_id already registered
+    duplicate_similarity: Optional[float]
+
+
+class _Partitions:
+    """
+    Partition contents as contiguous arrays of gallery row numbers.
+
+    Each partition is an int32 array (with spare capacity) so a query
+    gathers its candidates with one concatenate; `row_list`/`row_pos` map a
+    gallery row back to its partition and slot so rows are moved or
+    removed in O(1) by swapping with the partition's last entry.
+    """
+
+    def __init__(self, nlist: int, capacity: int = 0):
+        self.rows: List[np.ndarray] = [np.empty(16, dtype=np.int32) for _ in range(nlist)]
+        self.sizes = np.zeros(nlist, dtype=np.int64)
+        self.row_list = np.full(max(capacity, 1024), -1, dtype=np.int32)
+        self.row_pos = np.zeros(max(capacity, 1024), dtype=np.int32)
+
+    @classmethod
+    def build(cls, labels: np.ndarray, nlist: int) -> "_Partitions":
+        """Bulk-build from labels[row] = partition (-1 for rows left out)."""
+        partitions = cls(0, len(labels))
+        rows = np.flatnonzero(labels >= 0).astype(np.int32)
+        row_labels = labels[rows]
+        order = np.argsort(row_labels, kind="stable")
+        counts = np.bincount(row_labels, minlength=nlist)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sorted_rows = rows[order]
+        for label in range(nlist):
+            members = sorted_rows[starts[label]:starts[label] + counts[label]]
+            # Headroom so incremental adds rarely reallocate
+            array = np.empty(max(16, counts[label] + counts[label] // 4), dtype=np.int32)
+            array[:counts[label]] = members
+            partitions.rows.append(array)
+        partitions.sizes = counts.astype(np.int64)
+        partitions.row_list[:len(labels)] = labels
+        partitions.row_pos[sorted_rows] = np.arange(len(sorted_rows)) - starts[row_labels[order]]
+        return partitions
+
+    def _ensure_row(self, row: int):
+        if row >= len(self.row_list):
+            grown = max(row + 1, len(self.row_list) * 2)
+            row_list = np.full(grown, -1, dtype=np.int32)
+            row_list[:len(self.row_list)] = self.row_list
+            row_pos = np.zeros(grown, dtype=np.int32)
+            row_pos[:len(self.row_pos)] = self.row_pos
+            self.row_list, self.row_pos = row_list, row_pos
+
+    def add(self, row: int, label: int):
+        self._ensure_row(row)
+        size = self.sizes[label]
+        if size == len(self.rows[label]):
+            grown = np.empty(size * 2, dtype=np.int32)
+            grown[:size] = self.rows[label]
+            self.rows[label] = grown
+        self.rows[label][size] = row
+        self.sizes[label] = size + 1
+        self.row_list[row] = label
+        self.row_pos[row] = size
+
+    def discard(self, row: int):
+        if row >= len(self.row_list) or self.row_list[row] < 0:
+            return
+        label, pos = self.row_list[row], self.row_pos[row]
+        last = self.sizes[label] - 1
+        if pos != last:
+            # Keep the partition contiguous by moving its last entry into the slot
+            moved = self.rows[label][last]
+            self.rows[label][pos] = moved
+            self.row_pos[moved] = pos
+        self.sizes[label] = last
+        self.row_list[row] = -1
+
+    def move(self, source: int, target: int):
+        """Renumber gallery row `source` to `target` (target must be free)."""
+        if source >= len(self.row_list) or self.row_list[source] < 0:
+            return
+        self._ensure_row(target)
+        label, pos = self.row_list[source], self.row_pos[source]
+        self.rows[label][pos] = target
+        self.row_list[target], self.row_pos[target] = label, pos
+        self.row_list[source] = -1
+
+    def candidates(self, labels: np.ndarray) -> np.ndarray:
+        """Concatenated gallery rows of the given partitions."""
+        return np.concatenate([self.rows[label][:self.sizes[label]] for label in labels])
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index with incremental add/remove.
+
+    The index keeps no vectors of its own: its partitions are arrays of
+    gallery row numbers and candidate rows are scored in the FaceGallery it
+    is built on (the global gallery in the server), so the embeddings are
+    resident once, not twice. The index is a row observer of that gallery,
+    so every upsert/removal (including the row moved into a freed slot) is
+    mirrored without looking voters up by id.
+
+    Below `train_threshold` vectors the index is a single flat partition
+    (exact search over the gallery). Once it grows past the threshold the
+    centroids are trained and the rows distributed over about
+    `lists_per_sqrt` * sqrt(N) partitions, so a query scores roughly
+    nprobe * sqrt(N) / lists_per_sqrt rows; the index retrains itself
+    whenever the gallery grows by `retrain_factor` since the last training.
+
+    Training runs on a background thread over a bounded sample and the new
+    partitions are swapped in when it finishes, so an upsert only ever pays
+    for one centroid lookup. Changes made while training runs are replayed
+    onto the new partitions before the swap.
+    """
+
+    def __init__(
+        self,
+        gallery: Optional[FaceGallery] = None,
+        nprobe: int = 8,
+        train_threshold: int = 4096,
+        retrain_factor: float = 4.0,
+        lists_per_sqrt: float = 4.0,
+        max_lists: int = 65536,
+        kmeans_iterations: int = 10,
+        seed: int = 0,
+        dtype: str = EMBEDDING_DTYPE,
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            gallery: Gallery holding the vectors, kept up to date by its owner
+                     (default: a private gallery fed through this index)
+            nprobe: Number of partitions scored per query
+            train_threshold: Vector count at which the coarse quantizer is trained
+            retrain_factor: Retrain when size exceeds this multiple of the trained size
+            lists_per_sqrt: Partitions per sqrt(gallery size) at training time
+            max_lists: Upper bound on the number of partitions (centroids)
+            kmeans_iterations: Lloyd iterations used to train the centroids
+            seed: Random seed for sampling and centroid initialization
+            dtype: Row representation of the private gallery ("float32", "float16", "int8")
+        """
+        # A private gallery is updated by this index; a shared one by its owner
+        self._owns_gallery = gallery is None
+        self.gallery = gallery if gallery is not None else FaceGallery(dtype=validate_dtype(dtype))
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.retrain_factor = retrain_factor
+        self.lists_per_sqrt = lists_per_sqrt
+        self.max_lists = max(1, max_lists)
+        self.kmeans_iterations = kmeans_iterations
+        self.seed = seed
+        # Lock order: gallery lock first, then this one (row events arrive
+        # with the gallery lock held)
+        self._lock = threading.RLock()
+        # Untrained: no centroids, and search() scans the whole gallery
+        self._centroids: Optional[np.ndarray] = None
+        self._partitions: Optional[_Partitions] = None
+        self._trained_size = 0
+        # Background training state: the running thread, the voters changed
+        # since it started (voter_id -> (row at snapshot or None, new vector
+        # or None if only its row moved)), and an epoch that load() bumps so
+        # a stale training is discarded
+        self._training: Optional[threading.Thread] = None
+        self._pending: Optional[Dict[str, Tuple[Optional[int], Optional[np.ndarray]]]] = None
+        self._epoch = 0
+        self._loading = False
+        self.gallery.add_row_observer(self)
+
+    @staticmethod
+    def _normalize(embedding: np.ndarray) -> np.ndarray:
+        return FaceGallery._normalize(embedding)
+
+    def _nearest_lists(self, vector: np.ndarray, count: int) -> np.ndarray:
+        """Return indices of the `count` centroids most similar to vector."""
+        scores = self._centroids @ vector
+        count = min(count, len(scores))
+        if count < len(scores):
+            return np.argpartition(scores, len(scores) - count)[len(scores) - count:]
+        return np.arange(len(scores))
+
+    def _touch(self, voter_id: str, row: Optional[int], vector: Optional[np.ndarray]):
+        """Record a change for replay after a running training (lock held)."""
+        if self._pending is None:
+            return
+        original, previous = self._pending.get(voter_id, (row, None))
+        self._pending[voter_id] = (original, vector if vector is not None else previous)
+
+    def row_upserted(self, voter_id: str, row: int, vector: np.ndarray, is_new: bool):
+        """Gallery row event: `row` now holds voter_id's (unit) vector."""
+        with self._lock:
+            self._touch(voter_id, None if is_new else row, vector)
+            if self._partitions is not None:
+                self._partitions.discard(row)
+                self._partitions.add(row, int(self._nearest_lists(vector, 1)[0]))
+            if not self._loading:
+                self._maybe_train()
+
+    def row_removed(self, voter_id: str, row: int, moved_id: Optional[str], moved_from: Optional[int]):
+        """Gallery row event: voter_id left `row`; moved_id moved into it from moved_from."""
+        with self._lock:
+            self._touch(voter_id, row, None)
+            if moved_id is not None:
+                self._touch(moved_id, moved_from, None)
+            if self._partitions is not None:
+                self._partitions.discard(row)
+                if moved_id is not None:
+                    self._partitions.move(moved_from, row)
+
+    def rows_reset(self):
+        """Gallery row event: every row was dropped."""
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        """Drop the partitions and discard any running training (lock held)."""
+        self._epoch += 1
+        self._training = None
+        self._pending = None
+        self._centroids = None
+        self._partitions = None
+
+    def _maybe_train(self):
+        """Start background training if the index is due for it (both locks held)."""
+        if self._training is not None:
+            return
+        size = len(self.gallery)
+        if self._centroids is None:
+            due = size >= self.train_threshold
+        else:
+            due = size >= self._trained_size * self.retrain_factor
+        if not due:
+            return
+        self._pending = {}
+        self._training = threading.Thread(
+            target=self._train, args=(self._epoch, self.gallery.voter_ids()),
+            name="face-ivf-train", daemon=True
+        )
+        self._training.start()
+
+    def _train(self, epoch: int, voter_ids: List[str]):
+        """
+        Train centroids with spherical k-means on a sample of the gallery,
+        label every row of the snapshot block by block, then swap the new
+        partitions in. Runs on the training thread.
+
+        Args:
+            epoch: Epoch the training belongs to
+            voter_ids: Gallery voter_ids in row order when training started
+        """
+        try:
+            count = len(voter_ids)
+            rng = np.random.default_rng(self.seed)
+            nlist = min(self.max_lists, max(1, int(self.lists_per_sqrt * np.sqrt(count))))
+
+            # Train on a bounded random sample of rows, never the full matrix
+            sample_size = min(count, nlist * 32)
+            picks = rng.choice(count, size=sample_size, replace=False)
+            _, sample = self.gallery.get_vectors([voter_ids[i] for i in picks])
+            if len(sample) == 0:
+                return
+            nlist = min(nlist, len(sample))
+            centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+            for _ in range(self.kmeans_iterations):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, labels, sample)
+                norms = np.linalg.norm(sums, axis=1)
+                empty = norms == 0.0
+                # Reseed empty clusters from random sample points
+                if np.any(empty):
+                    sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+                    norms[empty] = np.linalg.norm(sums[empty], axis=1)
+                centroids = sums / norms[:, None]
+            centroids = centroids.astype(np.float32)
+            del sample
+
+            # labels[row] for the snapshot rows; voters gone by now stay -1
+            # and are settled by the replay below
+            labels = np.full(count, -1, dtype=np.int32)
+            block = 8192
+            for start in range(0, count, block):
+                ids, chunk = self.gallery.get_vectors(voter_ids[start:start + block])
+                if not ids:
+                    continue
+                rows = {voter_id: start + i for i, voter_id in enumerate(voter_ids[start:start + block])}
+                labels[[rows[voter_id] for voter_id in ids]] = np.argmax(chunk @ centroids.T, axis=1)
+            partitions = _Partitions.build(labels, nlist)
+
+            with self.gallery._lock, self._lock:
+                if epoch != self._epoch:
+                    return
+                # Replay what changed while training ran: every row a changed
+                # voter held at the snapshot is cleared, then each voter still
+                # in the gallery is placed at the row it holds now
+                for original, _ in self._pending.values():
+                    if original is not None:
+                        partitions.discard(original)
+                for voter_id, (original, vector) in self._pending.items():
+                    row = self.gallery.row_of(voter_id)
+                    if row is None:
+                        continue
+                    if vector is None:
+                        # Only its row moved; its vector (and label) is unchanged
+                        label = int(labels[original]) if original is not None else -1
+                        if label < 0:
+                            _, vectors = self.gallery.get_vectors([voter_id])
+                            vector = vectors[0]
+                    if vector is not None:
+                        label = int(np.argmax(centroids @ vector))
+                    partitions.add(row, label)
+                self._centroids = centroids
+                self._partitions = partitions
+                self._trained_size = count
+        except Exception as e:
+            print(f"Error training duplicate-face index: {str(e)}")
+        finally:
+            with self._lock:
+                if epoch == self._epoch:
+                    self._training = None
+                    self._pending = None
+
+    def upsert(self, voter_id: str, embedding: np.ndarray, model_name: Optional[str] = None):
+        """
+        Add or replace a voter's embedding in the private gallery.
+
+        A shared gallery is updated by its owner and the index follows its
+        row events, so this is a no-op for it.
+
+        Args:
+            voter_id: Unique voter identifier
+            embedding: Raw embedding vector
+            model_name: Model that produced the embedding; one the gallery
+                        does not hold removes the voter instead
+        """
+        if self._owns_gallery:
+            self.gallery.upsert(voter_id, embedding, model_name=model_name)
+
+    def remove(self, voter_id: str):
+        """
+        Remove a voter's embedding from the private gallery (no-op if not
+        present, and for a shared gallery).
+
+        Args:
+            voter_id: Unique voter identifier
+        """
+        if self._owns_gallery:
+            self.gallery.remove(voter_id)
+
+    def load(self, items=None) -> int:
+        """
+        Rebuild the index, starting background training once at the end.
+
+        Args:
+            items: Iterable of (voter_id, embedding) pairs to replace the
+                   private gallery's contents with, or None to index what the
+                   gallery already holds
+
+        Returns:
+            Number of embeddings indexed
+        """
+        if items is not None:
+            if not self._owns_gallery:
+                raise ValueError("A shared gallery is loaded by its owner; call load() without items")
+            self._loading = True
+            try:
+                self.gallery.load(items)
+            finally:
+                self._loading = False
+        with self.gallery._lock, self._lock:
+            # Discard any training started before the reload
+            self._reset()
+            self._maybe_train()
+            return len(self.gallery)
+
+    def join_training(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a running background training to finish.
+
+        Args:
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            True if no training is running any more
+        """
+        with self._lock:
+            training = self._training
+        if training is not None:
+            training.join(timeout)
+            return not training.is_alive()
+        return True
+
+    def search(self, embedding: np.ndarray, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Approximate top-k search by cosine similarity.
+
+        Args:
+            embedding: Probe embedding vector
+            top_k: Maximum number of matches to return
+
+        Returns:
+            List of (voter_id, cosine_similarity), best first
+        """
+        vector = self._normalize(embedding)
+
+        def select_rows():
+            with self._lock:
+                if self._partitions is None:
+                    return None
+                return self._partitions.candidates(self._nearest_lists(vector, self.nprobe))
+
+        return self.gallery.search_rows(vector, select_rows, top_k)
+
+    def find_duplicates(
+        self,
+        embedding: np.ndarray,
+        threshold: float = DUPLICATE_SIMILARITY_THRESHOLD,
+        exclude_voter_id: Optional[str] = None,
+        top_k: int = 5,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find registered voters whose face is probably the same as `embedding`.
+
+        Args:
+            embedding: Embedding of the face being registered
+            threshold: Minimum cosine similarity to count as a duplicate
+            exclude_voter_id: voter_id to ignore (e.g. when re-enrolling)
+            top_k: Maximum number of duplicates to report
+
+        Returns:
+            List of (voter_id, cosine_similarity) at or above threshold, best first
+        """
+        candidates = self.search(embedding, top_k=top_k + 1)
+        return [
+            (voter_id, similarity)
+            for voter_id, similarity in candidates
+            if similarity >= threshold and voter_id != exclude_voter_id
+        ][:top_k]
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def num_lists(self) -> int:
+        """Number of partitions (0 before training)."""
+        return 0 if self._centroids is None else len(self._centroids)
+
+    def __len__(self) -> int:
+        return len(self.gallery)
+
+
+# Global index instance (lazy loading)
+_index_instance: Optional[IVFIndex] = None
+
+
+def get_duplicate_index(storage=None) -> IVFIndex:
+    """
+    Get or create the global duplicate-face index.
+
+    The index is built over the global gallery (get_gallery()), so the
+    embeddings are held once for both 1:N identification and duplicate
+    checks. The gallery is the storage observer; the index follows the
+    gallery's row events, so later registrations/deletions reach both.
+
+    Args:
+        storage: FaceStorage to load from (default: global storage instance)
+
+    Returns:
+        IVFIndex instance
+    """
+    global _index_instance
+    if _index_instance is None:
+        if storage is None:
+            from .storage import get_storage
+            storage = get_storage()
+        index = IVFIndex(get_gallery(storage))
+        index.load()
+        _index_instance = index
+    return _index_instance
+
+def store_unique_embedding(
+    storage,
+    voter_id: str,
+    full_name: str,
+    embedding: np.ndarray,
+    model_name: Optional[str] = None,
+    threshold: float = DUPLICATE_SIMILARITY_THRESHOLD,
+    action: str = DUPLICATE_ACTION,
+) -> RegistrationResult:
+    """
+    Check for the same face under another voter_id and store the embedding,
+    as one step.
+
+    The check and the insert run under one process-wide lock, and the
+    insert updates the index before the lock is released, so concurrent
+    registrations of the same face cannot both pass the check. Blocking:
+    call it from a storage pool thread.
+
+    Args:
+        storage: FaceStorage or ShardedFaceStorage instance
+        voter_id: Unique voter identifier
+        full_name: Full name of the voter
+        embedding: Face embedding vector
+        model_name: Model that produced the embedding
+        threshold: Minimum cosine similarity to count as a duplicate
+        action: "reject" to refuse duplicates, "flag" to store and report them
+
+    Returns:
+        RegistrationResult (stored is False if rejected as a duplicate or
+        if the storage refused the insert)
+    """
+    with _registration_lock:
+        index = get_duplicate_index(storage)
+        duplicates = index.find_duplicates(
+            embedding, threshold=threshold, exclude_voter_id=voter_id, top_k=1
+        )
+        duplicate_of, duplicate_similarity = duplicates[0] if duplicates else (None, None)
+        if duplicate_of and action == "reject":
+            return RegistrationResult(False, None, duplicate_of, duplicate_similarity)
+
+        stored, error = storage.store_embedding(
+            voter_id=voter_id, full_name=full_name, embedding=embedding, model_name=model_name
+        )
+        return RegistrationResult(stored, error, duplicate_of, duplicate_similarity)
@@ -0,0 +1,142 @@
+"""
+Async Face Storage Module
+
+Non-blocking facade over FaceStorage (or ShardedFaceStorage) for the
+FastAPI endpoints.
+- Every SQLite call runs on a dedicated, bounded thread pool
+- Each pool thread gets its own WAL connection (see ConnectionManager),
+  so database I/O overlaps with other requests on the event loop
+- A semaphore bounds queued work so a slow database applies backpressure
+  instead of growing an unbounded backlog
+"""
+
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Pool configuration (override via environment)
+STORAGE_POOL_WORKERS = int(os.environ.get("FACE_STORAGE_POOL_WORKERS", "4"))
+STORAGE_POOL_MAX_PENDING = int(os.environ.get("FACE_STORAGE_POOL_MAX_PENDING", "64"))
+
+
+class AsyncFaceStorage:
+    """
+    Awaitable wrapper around a synchronous storage object.
+    """
+
+    def __init__(self, storage, max_workers: int = STORAGE_POOL_WORKERS, max_pending: int = STORAGE_POOL_MAX_PENDING):
+        """
+        Initialize the facade.
+
+        Args:
+            storage: FaceStorage or ShardedFaceStorage instance
+            max_workers: Threads dedicated to database calls
+            max_pending: Maximum calls queued or running at once
+        """
+        self.storage = storage
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="face-db")
+        self._max_pending = max_pending
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run a blocking callable on the storage pool and await its result.
+
+        Args:
+            func: Blocking callable
+            *args, **kwargs: Arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop
+            self._semaphore = asyncio.Semaphore(self._max_pending)
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor,
+                functools.partial(func, *args, **kwargs)
+            )
+
+    async def store_embedding(
+        self,
+        voter_id: str,
+        full_name: str,
+        embedding,
+        model_name: Optional[str] = None
+    ) -> Tuple[bool, Optional[str]]:
+        return await self.run(self.storage.store_embedding, voter_id, full_name, embedding, model_name=model_name)
+
+    async def get_embedding(self, voter_id: str) -> Optional[Dict]:
+        return await self.run(self.storage.get_embedding, voter_id)
+
+    async def voter_exists(self, voter_id: str) -> bool:
+        return await self.run(self.storage.voter_exists, voter_id)
+
+    async def update_embedding(
+        self,
+        voter_id: str,
+        full_name: Optional[str] = None,
+        embedding: Optional[np.ndarray] = None,
+        model_name: Optional[str] = None
+    ) -> Tuple[bool, Optional[str]]:
+        return await self.run(
+            self.storage.update_embedding, voter_id, full_name=full_name, embedding=embedding, model_name=model_name
+        )
+
+    async def delete_embedding(self, voter_id: str) -> Tuple[bool, Optional[str]]:
+        return await self.run(self.storage.delete_embedding, voter_id)
+
+    async def store_embeddings_many(
+        self,
+        records: List[Tuple],
+        model_name: Optional[str] = None
+    ) -> List[Tuple[str, bool, Optional[str]]]:
+        return await self.run(self.storage.store_embeddings_many, records, model_name=model_name)
+
+    async def get_embeddings_many(self, voter_ids: List[str]) -> Dict[str, Dict]:
+        return await self.run(self.storage.get_embeddings_many, voter_ids)
+
+    async def delete_embeddings_many(self, voter_ids: List[str]) -> List[Tuple[str, bool, Optional[str]]]:
+        return await self.run(self.storage.delete_embeddings_many, voter_ids)
+
+    async def store_secondary_embedding(self, voter_id: str, model_name: str, embedding) -> Tuple[bool, Optional[str]]:
+        return await self.run(self.storage.store_secondary_embedding, voter_id, model_name, embedding)
+
+    async def get_secondary_embedding(self, voter_id: str, model_name: str):
+        return await self.run(self.storage.get_secondary_embedding, voter_id, model_name)
+
+    async def list_all_voters(self) -> List[Dict]:
+        return await self.run(self.storage.list_all_voters)
+
+    async def get_count(self) -> int:
+        return await self.run(self.storage.get_count)
+
+    def close(self):
+        """Shut down the pool (waits for running calls) and close the storage."""
+        self._executor.shutdown(wait=True)
+        self.storage.close()
+
+
+# Global async storage instance (lazy loading)
+_async_storage_instance: Optional[AsyncFaceStorage] = None
+
+
+def get_async_storage() -> AsyncFaceStorage:
+    """
+    Get or create the global async facade over get_storage().
+
+    Returns:
+        AsyncFaceStorage instance
+    """
+    global _async_storage_instance
+    if _async_storage_instance is None:
+        from .storage import get_storage
+        _async_storage_instance = AsyncFaceStorage(get_storage())
+    return _async_storage_instance
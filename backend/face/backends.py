@@ -0,0 +1,124 @@
+"""
+Embedder Backend Registry Module
+
+Named recognition-model / face-detector pairs that the inference workers
+can run, selected with FACE_EMBEDDER_BACKEND instead of editing code:
+- "vgg-opencv" (default): DeepFace VGG-Face + OpenCV Haar detector,
+  the original memory-optimized pair for the 512MB Render tier
+- "vgg-onnx": the same network exported to ONNX Runtime (no TensorFlow)
+- Further DeepFace pairs trade memory for accuracy (Facenet, ArcFace,
+  RetinaFace, ...); run profile_backends.py to measure them on your box
+
+Each stored embedding records the model_name of the backend that produced
+it, since embeddings from different models are not comparable.
+
+Extra pairs can be added at import time with register_backend().
+"""
+
+import importlib.util
+import os
+from typing import Dict, List, NamedTuple, Optional
+
+
+class EmbedderBackend(NamedTuple):
+    """
+    One selectable model/detector pair.
+    """
+    name: str
+    runtime: str  # "deepface" (TensorFlow) or "onnx" (ONNX Runtime)
+    model_name: str  # recorded with every stored embedding
+    detector_backend: str
+    embedding_dim: int
+    description: str
+
+
+BACKENDS: Dict[str, EmbedderBackend] = {}
+
+# Names accepted for backwards compatibility with earlier configuration
+_ALIASES = {
+    "deepface": "vgg-opencv",
+    "onnx": "vgg-onnx",
+}
+
+# Python packages each runtime needs
+_RUNTIME_MODULES = {
+    "deepface": ("deepface",),
+    "onnx": ("onnxruntime",),
+}
+
+
+def register_backend(backend: EmbedderBackend):
+    """
+    Add (or replace) a backend in the registry.
+
+    Args:
+        backend: EmbedderBackend description
+    """
+    if backend.runtime not in _RUNTIME_MODULES:
+        raise ValueError(f"Unknown runtime '{backend.runtime}'. Choose one of: {', '.join(_RUNTIME_MODULES)}")
+    BACKENDS[backend.name] = backend
+
+
+for _backend in (
+    EmbedderBackend("vgg-opencv", "deepface", "VGG-Face", "opencv", 4096,
+                    "VGG-Face + OpenCV (~250MB, default for small instances)"),
+    EmbedderBackend("vgg-onnx", "onnx", "VGG-Face", "opencv", 4096,
+                    "VGG-Face on ONNX Runtime + OpenCV (no TensorFlow)"),
+    EmbedderBackend("facenet-opencv", "deepface", "Facenet", "opencv", 128,
+                    "Facenet + OpenCV (small model, compact embeddings)"),
+    EmbedderBackend("facenet512-opencv", "deepface", "Facenet512", "opencv", 512,
+                    "Facenet512 + OpenCV"),
+    EmbedderBackend("sface-yunet", "deepface", "SFace", "yunet", 128,
+                    "SFace + YuNet (OpenCV DNN models, very light)"),
+    EmbedderBackend("arcface-retinaface", "deepface", "ArcFace", "retinaface", 512,
+                    "ArcFace + RetinaFace (most accurate, ~600MB)"),
+):
+    register_backend(_backend)
+
+EMBEDDER_BACKEND = os.environ.get("FACE_EMBEDDER_BACKEND", "vgg-opencv")
+
+
+def get_backend(name: Optional[str] = None) -> EmbedderBackend:
+    """
+    Look up a backend by name (default: FACE_EMBEDDER_BACKEND).
+
+    Raises:
+        ValueError: Unknown backend name
+    """
+    name = _ALIASES.get(name or EMBEDDER_BACKEND, name or EMBEDDER_BACKEND)
+    backend = BACKENDS.get(name)
+    if backend is None:
+        raise ValueError(f"Unknown embedder backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return backend
+
+
+def is_installed(backend: EmbedderBackend) -> bool:
+    """True if the Python packages for the backend's runtime are importable."""
+    return all(importlib.util.find_spec(module) is not None for module in _RUNTIME_MODULES[backend.runtime])
+
+
+def installed_backends() -> List[EmbedderBackend]:
+    """Backends whose runtime dependencies are installed."""
+    return [backend for backend in BACKENDS.values() if is_installed(backend)]
+
+
+def create_embedder(name: Optional[str] = None):
+    """
+    Create an embedder for a registered backend.
+
+    Only the selected runtime's dependencies are imported, so ONNX backends
+    never load TensorFlow.
+
+    Args:
+        name: Backend name (default: FACE_EMBEDDER_BACKEND)
+
+    Returns:
+        FaceEmbedder or OnnxFaceEmbedder instance
+    """
+    backend = get_backend(name)
+    if backend.runtime == "onnx":
+        from .onnx_embedder import OnnxFaceEmbedder
+        return OnnxFaceEmbedder()
+
+    from .embedder import FaceEmbedder
+    return FaceEmbedder(model_name=backend.model_name, detector_backend=backend.detector_backend)
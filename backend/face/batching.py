@@ -0,0 +1,261 @@
+"""
+Micro-batching Module
+
+Coalesces embedding requests that arrive close together (e.g. the burst of
+/face/verify calls when polling opens) into one inference job:
+- The first request opens a short window (FACE_BATCH_WINDOW_MS); requests
+  arriving inside it, up to FACE_BATCH_MAX_SIZE, join the same batch
+- A full batch is dispatched immediately, so the window only adds latency
+  under light load
+- Each batch runs as one InferenceExecutor job: per-image detection, then
+  a single batched forward pass through the recognition model
+- Every caller gets its own result or exception; one bad image does not
+  fail the rest of its batch
+- Registration photos (quality gate off) share the same batches; each
+  image carries its own gate flag
+- Outcomes are memoized by backend, gate mode and content hash for a
+  short TTL, and identical uploads already in flight share one inference,
+  so a kiosk resending the same frame costs a hash lookup; the cascade's
+  fast-backend embeddings are memoized the same way but not batched
+
+With FACE_BATCH_MAX_SIZE=1 (or a zero window) requests go straight to the
+executor.
+"""
+
+import asyncio
+import os
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .backends import get_backend
+from .cache import InferenceResultCache, content_key
+from .ingest import check_payload_size
+from .inference import InferenceExecutor, InferenceUnavailable, get_inference_executor
+from .quality import FaceQualityError
+
+# Batching configuration (override via environment)
+BATCH_WINDOW_MS = float(os.environ.get("FACE_BATCH_WINDOW_MS", "10"))
+BATCH_MAX_SIZE = int(os.environ.get("FACE_BATCH_MAX_SIZE", "8"))
+BATCH_MAX_PENDING = int(os.environ.get("FACE_BATCH_MAX_PENDING", "256"))
+
+
+class MicroBatcher:
+    """
+    Collects embedding requests into small batches for the inference executor.
+    """
+
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        window_ms: float = BATCH_WINDOW_MS,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_pending: int = BATCH_MAX_PENDING,
+        result_cache: Optional[InferenceResultCache] = None,
+    ):
+        """
+        Initialize the batcher (the collector task starts on first use).
+
+        Args:
+            executor: Executor that runs the batched jobs
+            window_ms: How long the first request of a batch waits for others
+            max_batch_size: Maximum images per batch
+            max_pending: Maximum requests waiting to be batched before new ones are rejected
+            result_cache: Content-hash cache of outcomes (default: FACE_RESULT_CACHE_* settings)
+        """
+        self.executor = executor
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._inflight = set()
+        self.result_cache = result_cache if result_cache is not None else InferenceResultCache()
+        self._in_progress: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.rejected = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_batch_size > 1 and self.window > 0
+
+    def _ensure_collector(self):
+        # Created lazily so queue and task bind to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._collector is None or self._collector.done():
+            self._collector = asyncio.get_running_loop().create_task(self._collect())
+
+    async def generate_embedding(
+        self,
+        image: Union[str, bytes],
+        backend: Optional[str] = None,
+        check_quality: bool = True,
+    ) -> np.ndarray:
+        """
+        Generate an embedding, batched with other concurrent requests.
+
+        Args:
+            image: Base64 encoded image, or raw image bytes
+            backend: Secondary backend to use instead of the main model
+                     (cascade fast stage); cached and coalesced, not batched
+            check_quality: False to skip the quality pre-filter (registration)
+
+        Returns:
+            Embedding as numpy array
+
+        Raises:
+            ImageTooLargeError: Payload over the ingest size limit
+            ValueError: No face / multiple faces / undecodable image
+            InferenceUnavailable: Too many waiting requests, or the executor failed
+        """
+        # Oversized uploads are rejected here rather than shipped to a worker
+        check_payload_size(image)
+
+        if not self.result_cache.enabled:
+            return await self._generate(image, backend, check_quality)
+
+        # Gated and ungated outcomes (and other backends' embeddings) of the
+        # same upload are different results
+        gate = "gated" if check_quality else "ungated"
+        key = f"{get_backend(backend).name}:{gate}:{content_key(image)}"
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            if isinstance(cached, ValueError):
+                raise cached.with_traceback(None)
+            return cached
+
+        shared = self._in_progress.get(key)
+        if shared is not None:
+            # Same frame already being processed (client retried early)
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(shared)
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise
+                # The original request was abandoned; run this one ourselves
+                return await self._generate(image, backend, check_quality)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_progress[key] = future
+        try:
+            embedding = await self._generate(image, backend, check_quality)
+            self.result_cache.put(key, embedding)
+            future.set_result(embedding)
+            return embedding
+        except ValueError as e:
+            # Quality rejections depend on the gate's thresholds, not only
+            # on the image, so only detection/decoding errors are memoized
+            if not isinstance(e, FaceQualityError):
+                self.result_cache.put(key, e)
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._in_progress.pop(key, None)
+            if not future.done():
+                future.cancel()
+
+    async def _generate(
+        self,
+        image: Union[str, bytes],
+        backend: Optional[str] = None,
+        check_quality: bool = True,
+    ) -> np.ndarray:
+        """Run one image through the batch queue (or directly when batching is off)."""
+        if backend or not self.enabled:
+            return await self.executor.generate_embedding(image, backend=backend, check_quality=check_quality)
+
+        self._ensure_collector()
+        if self._queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            raise InferenceUnavailable("Face inference queue is full, please retry shortly")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((image, check_quality, future))
+        return await future
+
+    async def _collect(self):
+        """Form batches forever; each batch is dispatched without waiting for the previous one."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            task = loop.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Union[str, bytes], bool, asyncio.Future]]):
+        """Run one batch on the executor and resolve each caller's future."""
+        # Callers that gave up (client disconnect) are not worth inferring
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+
+        self.batches += 1
+        self.batched_items += len(batch)
+        try:
+            outcomes = await self.executor.generate_embeddings_batch(
+                [image for image, _, _ in batch],
+                check_quality=[check_quality for _, check_quality, _ in batch],
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), outcome in zip(batch, outcomes):
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def stats(self) -> dict:
+        """Return batching counters."""
+        return {
+            'enabled': self.enabled,
+            'window_ms': self.window * 1000.0,
+            'max_batch_size': self.max_batch_size,
+            'waiting': self._queue.qsize() if self._queue is not None else 0,
+            'batches': self.batches,
+            'avg_batch_size': (self.batched_items / self.batches) if self.batches else 0.0,
+            'rejected': self.rejected,
+            'coalesced': self.coalesced,
+            'result_cache': self.result_cache.stats(),
+        }
+
+
+# Global batcher instance (lazy loading)
+_batcher_instance: Optional[MicroBatcher] = None
+
+
+def get_micro_batcher() -> MicroBatcher:
+    """
+    Get or create the global micro-batcher over get_inference_executor().
+
+    Returns:
+        MicroBatcher instance
+    """
+    global _batcher_instance
+    if _batcher_instance is None:
+        _batcher_instance = MicroBatcher(get_inference_executor())
+    return _batcher_instance
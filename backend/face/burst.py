@@ -0,0 +1,161 @@
+"""
+Burst Verification Module
+
+Verifies a short burst of webcam frames against one registered embedding,
+running inference only as long as the outcome is still open:
+- Frames are embedded in order, one at a time
+- A frame at or above threshold + FACE_BURST_ACCEPT_MARGIN verifies the
+  voter immediately, so a clear frame costs exactly one inference
+- Once FACE_BURST_REJECT_FRAMES usable frames have all scored below
+  threshold - FACE_BURST_REJECT_MARGIN the burst stops as a mismatch
+- Unusable frames (no face, blurry, ...) are skipped, not fatal
+- Otherwise the decision uses the mean similarity of the usable frames,
+  which is steadier than any single borderline frame
+
+Every frame processed is reported with its similarity and timing. The
+decision rule itself (BurstDecider) is shared with streaming
+verification (stream.py).
+"""
+
+import os
+import time
+from typing import Awaitable, Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ingest import ImageTooLargeError
+
+# Burst configuration (override via environment)
+BURST_MAX_FRAMES = int(os.environ.get("FACE_BURST_MAX_FRAMES", "5"))
+BURST_ACCEPT_MARGIN = float(os.environ.get("FACE_BURST_ACCEPT_MARGIN", "0.05"))
+BURST_REJECT_MARGIN = float(os.environ.get("FACE_BURST_REJECT_MARGIN", "0.15"))
+BURST_REJECT_FRAMES = int(os.environ.get("FACE_BURST_REJECT_FRAMES", "2"))
+
+
+class FrameResult(NamedTuple):
+    """Outcome of one frame of a burst."""
+    index: int
+    similarity: Optional[float]  # None when the frame was unusable
+    elapsed_ms: float
+    error: Optional[str]
+
+
+class BurstResult(NamedTuple):
+    """Decision for a whole burst."""
+    verified: bool
+    similarity: Optional[float]  # score the decision was based on
+    decision: str  # "accepted", "rejected" (early exit) or "aggregated"
+    frames: List[FrameResult]
+
+    @property
+    def usable_frames(self) -> int:
+        return sum(1 for frame in self.frames if frame.similarity is not None)
+
+
+class BurstDecider:
+    """
+    Early-exit decision over similarities arriving one frame at a time.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        accept_margin: float = BURST_ACCEPT_MARGIN,
+        reject_margin: float = BURST_REJECT_MARGIN,
+        reject_frames: int = BURST_REJECT_FRAMES,
+    ):
+        """
+        Initialize the decider.
+
+        Args:
+            threshold: Similarity needed to verify
+            accept_margin: Margin above threshold that verifies on a single frame
+            reject_margin: Margin below threshold that counts as clearly negative
+            reject_frames: Clearly negative usable frames needed to stop early
+        """
+        self.threshold = threshold
+        self.accept_margin = accept_margin
+        self.reject_margin = reject_margin
+        self.reject_frames = reject_frames
+        self.similarities: List[float] = []
+
+    def add(self, similarity: float) -> Optional[Tuple[bool, float, str]]:
+        """
+        Record one usable frame's similarity.
+
+        Returns:
+            (verified, similarity, "accepted" or "rejected") once the outcome
+            is clear, otherwise None
+        """
+        self.similarities.append(similarity)
+        if similarity >= self.threshold + self.accept_margin:
+            return True, similarity, "accepted"
+        if (len(self.similarities) >= self.reject_frames
+                and max(self.similarities) < self.threshold - self.reject_margin):
+            return False, max(self.similarities), "rejected"
+        return None
+
+    def aggregate(self) -> Tuple[bool, Optional[float], str]:
+        """
+        Decide on the mean similarity of all usable frames so far.
+
+        Returns:
+            (verified, mean similarity or None if no frame was usable, "aggregated")
+        """
+        if not self.similarities:
+            return False, None, "aggregated"
+        mean_similarity = float(np.mean(self.similarities))
+        return mean_similarity >= self.threshold, mean_similarity, "aggregated"
+
+
+async def verify_burst(
+    images: Sequence,
+    registered_embedding,
+    embed: Callable[[object], Awaitable[np.ndarray]],
+    compare: Callable[[np.ndarray, object], float],
+    threshold: float,
+    accept_margin: float = BURST_ACCEPT_MARGIN,
+    reject_margin: float = BURST_REJECT_MARGIN,
+    reject_frames: int = BURST_REJECT_FRAMES,
+) -> BurstResult:
+    """
+    Verify frames in order, stopping as soon as the outcome is clear.
+
+    Args:
+        images: Frames in capture order (base64 strings or raw bytes)
+        registered_embedding: Stored embedding of the claimed voter
+        embed: Coroutine function producing an embedding for one frame;
+               raises ValueError for unusable frames
+        compare: Similarity function (higher is more similar)
+        threshold: Similarity needed to verify
+        accept_margin: Margin above threshold that verifies on a single frame
+        reject_margin: Margin below threshold that counts as clearly negative
+        reject_frames: Clearly negative usable frames needed to stop early
+
+    Returns:
+        BurstResult (similarity is None if no frame was usable)
+
+    Raises:
+        ImageTooLargeError: A frame is over the ingest size limit
+    """
+    frames: List[FrameResult] = []
+    decider = BurstDecider(threshold, accept_margin, reject_margin, reject_frames)
+
+    for index, image in enumerate(images):
+        started = time.perf_counter()
+        try:
+            embedding = await embed(image)
+        except ImageTooLargeError:
+            raise
+        except ValueError as e:
+            frames.append(FrameResult(index, None, (time.perf_counter() - started) * 1000.0, str(e)))
+            continue
+
+        similarity = float(compare(embedding, registered_embedding))
+        frames.append(FrameResult(index, similarity, (time.perf_counter() - started) * 1000.0, None))
+
+        decision = decider.add(similarity)
+        if decision is not None:
+            return BurstResult(*decision, frames)
+
+    return BurstResult(*decider.aggregate(), frames)
@@ -0,0 +1,280 @@
+"""
+Embedding Cache Module
+
+Bounded in-process LRU cache of decoded, L2-normalized embedding records.
+- Bounded by entry count and by total embedding bytes
+- Invalidated explicitly by FaceStorage on every write to a voter_id
+- Tracks hit/miss/eviction counters
+
+Also holds the inference result cache: uploads keyed by a content hash,
+mapped to the embedding (or the detection error) they produced, so a
+client resending the same frame does not pay for another forward pass.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+# Cache configuration (override via environment)
+EMBEDDING_CACHE_SIZE = int(os.environ.get("FACE_EMBEDDING_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_MAX_BYTES = int(os.environ.get("FACE_EMBEDDING_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+RESULT_CACHE_SIZE = int(os.environ.get("FACE_RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_TTL = float(os.environ.get("FACE_RESULT_CACHE_TTL", "300"))
+
+# Rough per-entry bookkeeping cost (dict, strings, OrderedDict node)
+_ENTRY_OVERHEAD_BYTES = 512
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache keyed by voter_id.
+
+    Readers that miss take a token with begin_read() before querying the
+    database and pass it to put(); if any invalidation happened in between,
+    the (possibly stale) record is not cached.
+    """
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached voters (0 disables caching)
+            max_bytes: Maximum approximate memory used by cached records
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, voter_id: str) -> Optional[Dict]:
+        """
+        Return the cached record for voter_id, or None on a miss.
+
+        Args:
+            voter_id: Unique voter identifier
+
+        Returns:
+            Cached record (treat as read-only) or None
+        """
+        with self._lock:
+            record = self._entries.get(voter_id)
+            if record is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(voter_id)
+            self.hits += 1
+            return record
+
+    def begin_read(self) -> int:
+        """Return a token identifying the current invalidation generation."""
+        with self._lock:
+            return self._version
+
+    def put(self, voter_id: str, record: Dict, token: int):
+        """
+        Cache a record read from the database.
+
+        Args:
+            voter_id: Unique voter identifier
+            record: Record with a read-only 'embedding' array
+            token: Value returned by begin_read() before the database read
+        """
+        if not self.enabled:
+            return
+
+        size = record['embedding'].nbytes + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if token != self._version:
+                return
+
+            self._discard(voter_id)
+            self._entries[voter_id] = record
+            self._sizes[voter_id] = size
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def _discard(self, voter_id: str):
+        """Remove an entry (caller holds the lock)."""
+        if self._entries.pop(voter_id, None) is not None:
+            self._bytes -= self._sizes.pop(voter_id)
+
+    def invalidate(self, voter_id: str):
+        """
+        Drop a voter's cached record after it changed in the database.
+
+        Args:
+            voter_id: Unique voter identifier
+        """
+        with self._lock:
+            self._version += 1
+            self._discard(voter_id)
+
+    def clear(self):
+        """Drop every cached record."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """
+        Return cache counters.
+
+        Returns:
+            Dictionary with entries, bytes, hits, misses, evictions and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def content_key(image: Union[str, bytes]) -> str:
+    """
+    Hash an upload (raw bytes or base64 string) for the result cache.
+
+    A data URL prefix is ignored so the same frame hashes the same whether
+    or not the client sends it.
+    """
+    if isinstance(image, str):
+        if "," in image:
+            image = image.split(",", 1)[1]
+        image = image.strip().encode("ascii", "ignore")
+    return hashlib.blake2b(image, digest_size=16).hexdigest()
+
+
+class InferenceResultCache:
+    """
+    Bounded LRU + TTL cache of inference outcomes keyed by content_key().
+
+    Stores either the embedding (read-only) or the ValueError raised for the
+    image (no face, multiple faces, undecodable), so resent bad frames are
+    rejected without inference too. Quality-gate rejections are not stored
+    (MicroBatcher skips them): they depend on the gate's thresholds, not
+    only on the image.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, ttl: float = RESULT_CACHE_TTL):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached outcomes (0 disables caching)
+            ttl: Seconds an outcome stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Union[np.ndarray, ValueError]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.error_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: str) -> Optional[Union[np.ndarray, ValueError]]:
+        """
+        Return the cached embedding or ValueError for key, or None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, outcome = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if isinstance(outcome, ValueError):
+                self.error_hits += 1
+            return outcome
+
+    def put(self, key: str, outcome: Union[np.ndarray, ValueError]):
+        """
+        Cache an embedding or the ValueError an image produced.
+
+        Args:
+            key: content_key() of the upload
+            outcome: Embedding array or ValueError
+        """
+        if not self.enabled:
+            return
+        if isinstance(outcome, np.ndarray):
+            outcome.setflags(write=False)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, outcome)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached outcome."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """
+        Return cache counters.
+
+        Returns:
+            Dictionary with entries, hits, error_hits, misses, expirations,
+            evictions and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'error_hits': self.error_hits,
+                'misses': self.misses,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
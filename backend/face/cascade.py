@@ -0,0 +1,189 @@
+"""
+Cascade Verification Module
+
+Two-stage 1:1 verification so obvious matches and mismatches skip the
+expensive model:
+- Stage one embeds the probe with a small, fast CPU backend
+  (FACE_CASCADE_BACKEND, e.g. "sface-yunet") and compares it with the
+  voter's secondary embedding from the same model
+- At or above FACE_CASCADE_ACCEPT_ABOVE the voter is verified, below
+  FACE_CASCADE_REJECT_BELOW rejected; both without running VGG-Face
+- Scores inside that uncertainty band, voters without a secondary
+  embedding, and frames the fast detector cannot read go to stage two,
+  the regular full-model path
+
+Secondary embeddings are written at registration and can be added for
+existing voters with backfill_cascade_embeddings.py. The thresholds are
+similarities on the fast model's scale; benchmark_cascade.py measures how
+often the cascade agrees with the full model for a given band.
+
+Leave FACE_CASCADE_BACKEND empty (the default) to disable the cascade.
+"""
+
+import os
+import time
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+import numpy as np
+
+from .backends import get_backend
+from .ingest import ImageTooLargeError
+from .quality import FaceQualityError
+
+# Cascade configuration (override via environment)
+CASCADE_BACKEND = os.environ.get("FACE_CASCADE_BACKEND", "")
+CASCADE_ACCEPT_ABOVE = float(os.environ.get("FACE_CASCADE_ACCEPT_ABOVE", "0.60"))
+CASCADE_REJECT_BELOW = float(os.environ.get("FACE_CASCADE_REJECT_BELOW", "0.20"))
+
+
+class CascadeResult(NamedTuple):
+    """Outcome of one cascade verification."""
+    verified: bool
+    similarity: float  # score of the stage that decided
+    stage: int  # 1 = fast model decided, 2 = full model decided
+    fast_similarity: Optional[float]  # None if stage one was skipped
+    fast_ms: float
+    full_ms: float
+
+
+class CascadeVerifier:
+    """
+    Runs the fast stage first and the full model only when needed.
+    """
+
+    def __init__(
+        self,
+        backend: str = CASCADE_BACKEND,
+        accept_above: float = CASCADE_ACCEPT_ABOVE,
+        reject_below: float = CASCADE_REJECT_BELOW,
+    ):
+        """
+        Initialize the verifier.
+
+        Args:
+            backend: Registered backend used for stage one ("" disables the cascade)
+            accept_above: Fast-model similarity that verifies without stage two
+            reject_below: Fast-model similarity that rejects without stage two
+        """
+        if backend and reject_below > accept_above:
+            raise ValueError("FACE_CASCADE_REJECT_BELOW must not exceed FACE_CASCADE_ACCEPT_ABOVE")
+        self.backend = backend
+        self.accept_above = accept_above
+        self.reject_below = reject_below
+        self.model_name: Optional[str] = None
+        if backend:
+            self.model_name = get_backend(backend).model_name
+        self.stage_one_accepted = 0
+        self.stage_one_rejected = 0
+        self.stage_two = 0
+        self.stage_one_skipped = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.backend)
+
+    def decide_fast(self, similarity: float) -> Optional[bool]:
+        """
+        Stage-one decision for a fast-model similarity.
+
+        Returns:
+            True (accept), False (reject), or None when the score is inside
+            the uncertainty band and the full model has to decide
+        """
+        if similarity >= self.accept_above:
+            return True
+        if similarity < self.reject_below:
+            return False
+        return None
+
+    async def verify(
+        self,
+        image,
+        registered_fast,
+        registered_full,
+        embed_fast: Callable[[object], Awaitable[np.ndarray]],
+        embed_full: Callable[[object], Awaitable[np.ndarray]],
+        compare: Callable[[np.ndarray, object], float],
+        threshold: float,
+    ) -> CascadeResult:
+        """
+        Verify one probe image against a voter's stored embeddings.
+
+        Args:
+            image: Probe image (base64 string or raw bytes)
+            registered_fast: Voter's secondary embedding from the fast model, or None
+            registered_full: Voter's primary embedding
+            embed_fast: Coroutine function embedding with the fast backend
+            embed_full: Coroutine function embedding with the full model
+            compare: Similarity function (higher is more similar)
+            threshold: Full-model similarity needed to verify
+
+        Returns:
+            CascadeResult
+
+        Raises:
+            ValueError: The full model could not use the image (no face,
+                        unusable frame, too large)
+        """
+        fast_similarity = None
+        fast_ms = 0.0
+
+        if self.enabled and registered_fast is not None:
+            started = time.perf_counter()
+            try:
+                fast_similarity = float(compare(await embed_fast(image), registered_fast))
+            except (ImageTooLargeError, FaceQualityError):
+                # The full model would reject the frame for the same reason
+                raise
+            except ValueError:
+                # The fast detector missed the face; let the full model try
+                fast_similarity = None
+            fast_ms = (time.perf_counter() - started) * 1000.0
+
+            decision = self.decide_fast(fast_similarity) if fast_similarity is not None else None
+            if decision is not None:
+                if decision:
+                    self.stage_one_accepted += 1
+                else:
+                    self.stage_one_rejected += 1
+                return CascadeResult(decision, fast_similarity, 1, fast_similarity, fast_ms, 0.0)
+        elif self.enabled:
+            self.stage_one_skipped += 1
+
+        started = time.perf_counter()
+        similarity = float(compare(await embed_full(image), registered_full))
+        full_ms = (time.perf_counter() - started) * 1000.0
+        self.stage_two += 1
+        return CascadeResult(similarity >= threshold, similarity, 2, fast_similarity, fast_ms, full_ms)
+
+    def stats(self) -> dict:
+        """Return how often each stage decided."""
+        decided = self.stage_one_accepted + self.stage_one_rejected + self.stage_two
+        return {
+            'enabled': self.enabled,
+            'backend': self.backend or None,
+            'accept_above': self.accept_above,
+            'reject_below': self.reject_below,
+            'stage_one_accepted': self.stage_one_accepted,
+            'stage_one_rejected': self.stage_one_rejected,
+            'stage_two': self.stage_two,
+            'no_secondary_embedding': self.stage_one_skipped,
+            'stage_one_rate': ((self.stage_one_accepted + self.stage_one_rejected) / decided) if decided else 0.0,
+        }
+
+
+# Global verifier instance (lazy loading)
+_verifier_instance: Optional[CascadeVerifier] = None
+
+
+def get_cascade_verifier() -> CascadeVerifier:
+    """
+    Get or create the global cascade verifier (FACE_CASCADE_* settings).
+
+    Returns:
+        CascadeVerifier instance
+    """
+    global _verifier_instance
+    if _verifier_instance is None:
+        _verifier_instance = CascadeVerifier()
+    return _verifier_instance
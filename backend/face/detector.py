@@ -5,17 +5,35 @@ Detects faces in images using pretrained YOLO model.
 - Uses YOLOv8 for face detection
 - Rejects images with face count ≠ 1
 - Returns cropped face image
+- detect_faces_batch() runs the model on many images per call, copies
+  each image's boxes off the device in one transfer, and returns crops as
+  arrays (no JPEG/base64 round trip)
+- ultralytics (and torch) are imported when the first FaceDetector is
+  created, not when this module is imported
 """
 
 import base64
-import binascii
+import os
 import numpy as np
 from PIL import Image
 from io import BytesIO
-from typing import Tuple, Optional
-from ultralytics import YOLO
+from typing import List, NamedTuple, Tuple, Optional
 import cv2
 
+from .ingest import decode_base64_image
+
+# Images per YOLO call in detect_faces_batch() (override via environment)
+DETECT_BATCH_SIZE = int(os.environ.get("FACE_DETECT_BATCH_SIZE", "16"))
+# Crop padding on each side, as a fraction of the box size
+CROP_PADDING = 0.1
+
+
+class DetectedFace(NamedTuple):
+    """The single face found in an image."""
+    face: np.ndarray  # padded BGR crop (a view into the source image)
+    bbox: Tuple[int, int, int, int]  # (x1, y1, x2, y2) without padding
+    confidence: float
+
 
 class FaceDetector:
     """
@@ -31,6 +49,14 @@ class FaceDetector:
             model_path: Path to YOLO model file. If None, uses default YOLOv8n.
                        For face detection, use a face-specific model.
         """
+        try:
+            from ultralytics import YOLO
+        except ImportError as e:
+            raise ImportError(
+                "YOLO face detector is not available. "
+                "Install ultralytics: pip install ultralytics"
+            ) from e
+
         # Load YOLO model for face detection
         # Try to use a face-specific model if available, otherwise use YOLOv8n
         if model_path:
@@ -50,52 +76,6 @@ class FaceDetector:
         # Set confidence threshold for face detection
         self.confidence_threshold = 0.25
         
-    def _decode_base64_image(self, base64_string: str) -> np.ndarray:
-        """
-        Decode base64 string to numpy array image.
-        
-        Args:
-            base64_string: Base64 encoded image string
-            
-        Returns:
-            numpy array representing the image (BGR format for OpenCV)
-        """
-        if not base64_string or not base64_string.strip():
-            raise ValueError("Base64 string is empty or None")
-        
-        # Remove data URL prefix if present
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-        
-        # Validate base64 string length
-        if len(base64_string) < 100:
-            raise ValueError(f"Base64 string is too short ({len(base64_string)} chars). Image data may be corrupted.")
-        
-        try:
-            # Decode base64
-            image_data = base64.b64decode(base64_string)
-            
-            if not image_data or len(image_data) == 0:
-                raise ValueError("Decoded image data is empty")
-            
-            # Convert to numpy array
-            nparr = np.frombuffer(image_data, np.uint8)
-            
-            if nparr.size == 0:
-                raise ValueError("Image buffer is empty after decoding")
-            
-            # Decode image
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            
-            if img is None:
-                raise ValueError("OpenCV failed to decode image. The image data may be corrupted or in an unsupported format.")
-            
-            return img
-        except binascii.Error as e:
-            raise ValueError(f"Invalid base64 encoding: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Error decoding image: {str(e)}")
-    
     def _encode_image_to_base64(self, image: np.ndarray) -> str:
         """
         Encode numpy array image to base64 string.
@@ -128,72 +108,105 @@ class FaceDetector:
             - error_message: Error message if detection failed
         """
         try:
-            # Decode image
-            image = self._decode_base64_image(base64_image)
-            
-            # Run YOLO detection with confidence threshold
-            results = self.model(image, conf=self.confidence_threshold, verbose=False)
-            
-            # Extract face detections
-            detections = []
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for box in boxes:
-                        # Get bounding box coordinates
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = box.conf[0].cpu().numpy()
-                        class_id = int(box.cls[0].cpu().numpy())
-                        
-                        # Filter for face detections
-                        # If using a face-specific model, all detections are faces
-                        # If using general YOLO, filter by class_id (person class is usually 0)
-                        # For face detection models, accept all detections
-                        # For general YOLO, we'd need to filter, but for now accept all
-                        # as we're assuming face detection model or person detection
-                        if confidence >= self.confidence_threshold:
-                            detections.append({
-                                'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                                'confidence': float(confidence),
-                                'class_id': class_id
-                            })
-            
-            # Check face count
-            face_count = len(detections)
-            
-            if face_count == 0:
-                return False, None, "No face detected in the image"
-            
-            if face_count > 1:
-                return False, None, f"Multiple faces detected ({face_count}). Exactly one face is required."
-            
-            # Exactly one face detected
-            face_bbox = detections[0]['bbox']
-            x1, y1, x2, y2 = face_bbox
-            
-            # Add padding to the crop (10% on each side)
-            height, width = image.shape[:2]
-            padding_x = int((x2 - x1) * 0.1)
-            padding_y = int((y2 - y1) * 0.1)
-            
-            # Crop with padding, ensuring we don't go out of bounds
-            crop_x1 = max(0, x1 - padding_x)
-            crop_y1 = max(0, y1 - padding_y)
-            crop_x2 = min(width, x2 + padding_x)
-            crop_y2 = min(height, y2 + padding_y)
-            
-            # Crop the face
-            cropped_face = image[crop_y1:crop_y2, crop_x1:crop_x2]
-            
-            # Encode cropped face to base64
-            cropped_face_base64 = self._encode_image_to_base64(cropped_face)
-            
-            return True, cropped_face_base64, None
-            
+            # Decode image (size-checked, reduced-resolution decode)
+            image = decode_base64_image(base64_image)
         except ValueError as e:
             return False, None, f"Image decoding error: {str(e)}"
-        except Exception as e:
-            return False, None, f"Face detection error: {str(e)}"
+
+        return self.detect_face_in_image(image)
+
+    def detect_face_in_image(self, image: np.ndarray) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        Detect exactly one face in an already decoded image.
+
+        Lets callers decode once (see ingest.decode_base64_image) and hand
+        the same array to the detector and the embedder.
+
+        Args:
+            image: numpy array (BGR format)
+
+        Returns:
+            Tuple of (success, cropped_face_base64, error_message)
+        """
+        success, detected, error = self.detect_faces_batch([image])[0]
+        if not success:
+            return False, None, error
+
+        # Encode cropped face to base64
+        return True, self._encode_image_to_base64(detected.face), None
+
+    def _boxes_array(self, result) -> np.ndarray:
+        """
+        All of one result's detections as an (N, 6) array of
+        x1, y1, x2, y2, confidence, class_id, copied off the device at once.
+        """
+        boxes = result.boxes
+        if boxes is None or len(boxes) == 0:
+            return np.empty((0, 6), dtype=np.float32)
+        return boxes.data.cpu().numpy()
+
+    def _select_face(self, image: np.ndarray, detections: np.ndarray) -> Tuple[bool, Optional[DetectedFace], Optional[str]]:
+        """Apply the exactly-one-face rule and crop the face with padding."""
+        # If using a face-specific model, all detections are faces
+        # If using general YOLO, we'd need to filter by class_id (column 5),
+        # but for now accept all as we're assuming a face detection model
+        detections = detections[detections[:, 4] >= self.confidence_threshold]
+        face_count = len(detections)
+
+        if face_count == 0:
+            return False, None, "No face detected in the image"
+
+        if face_count > 1:
+            return False, None, f"Multiple faces detected ({face_count}). Exactly one face is required."
+
+        x1, y1, x2, y2 = (int(v) for v in detections[0, :4])
+        height, width = image.shape[:2]
+        padding_x = int((x2 - x1) * CROP_PADDING)
+        padding_y = int((y2 - y1) * CROP_PADDING)
+
+        # Crop with padding, ensuring we don't go out of bounds
+        crop_x1 = max(0, x1 - padding_x)
+        crop_y1 = max(0, y1 - padding_y)
+        crop_x2 = min(width, x2 + padding_x)
+        crop_y2 = min(height, y2 + padding_y)
+        face = image[crop_y1:crop_y2, crop_x1:crop_x2]
+        return True, DetectedFace(face, (x1, y1, x2, y2), float(detections[0, 4])), None
+
+    def detect_faces_batch(
+        self,
+        images: List[np.ndarray],
+        batch_size: int = DETECT_BATCH_SIZE
+    ) -> List[Tuple[bool, Optional[DetectedFace], Optional[str]]]:
+        """
+        Detect exactly one face in each of several decoded images.
+
+        The model runs on up to batch_size images per call, and each image's
+        boxes, confidences and classes are copied off the device as one
+        array instead of three transfers per box.
+
+        Args:
+            images: numpy arrays (BGR format)
+            batch_size: Images per model call
+
+        Returns:
+            One (success, DetectedFace, error_message) tuple per image
+        """
+        outcomes: List[Tuple[bool, Optional[DetectedFace], Optional[str]]] = []
+        batch_size = max(1, batch_size)
+
+        for start in range(0, len(images), batch_size):
+            chunk = images[start:start + batch_size]
+            try:
+                results = self.model(chunk, conf=self.confidence_threshold, verbose=False)
+                chunk_outcomes = [
+                    self._select_face(image, self._boxes_array(result))
+                    for image, result in zip(chunk, results)
+                ]
+            except Exception as e:
+                chunk_outcomes = [(False, None, f"Face detection error: {str(e)}")] * len(chunk)
+            outcomes.extend(chunk_outcomes)
+
+        return outcomes
 
 
 # Global detector instance (lazy loading)
@@ -26,19 +26,40 @@ os.environ['CUDA_VISIBLE_DEVICES'] = '-1'  # Disable CUDA completely
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'  # Reduce TensorFlow warnings
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'  # Disable optimizations that use more memory
 
-import base64
 import inspect
-from typing import Optional
+from typing import List, Optional, Union
 
 import cv2
 import numpy as np
-from deepface import DeepFace
+
+from .ingest import decode_base64_image
+from .quantization import cosine_similarity
 
 # DeepFace configuration - OPTIMIZED FOR RENDER (512MB limit)
 MODEL_NAME = "VGG-Face"  # Lighter than ArcFace (~200MB vs ~400MB)
 DETECTOR_BACKEND = "opencv"  # Much lighter than RetinaFace (~50MB vs ~200MB)
 DISTANCE_METRIC = "cosine"  # For documentation; we compute cosine similarity ourselves
 SIMILARITY_THRESHOLD = 0.50  # similarity >= 0.68 → VERIFIED
+WARMUP_ITERATIONS = int(os.environ.get("FACE_WARMUP_ITERATIONS", "2"))
+
+# DeepFace pulls in TensorFlow, so it is imported on first use rather than
+# with this module (storage-only scripts and the API process never need it)
+_DeepFace = None
+
+
+def _deepface():
+    """Return the DeepFace API, importing it (and TensorFlow) on first call."""
+    global _DeepFace
+    if _DeepFace is None:
+        try:
+            from deepface import DeepFace
+        except ImportError as e:
+            raise ImportError(
+                "DeepFace embedder is not available. "
+                "Install deepface and its dependencies: pip install deepface tf-keras"
+            ) from e
+        _DeepFace = DeepFace
+    return _DeepFace
 
 
 class FaceEmbedder:
@@ -52,7 +73,7 @@ class FaceEmbedder:
     - This is by design for privacy and security reasons
     """
 
-    def __init__(self) -> None:
+    def __init__(self, model_name: str = MODEL_NAME, detector_backend: str = DETECTOR_BACKEND) -> None:
         """
         Initialize the DeepFace pipeline.
 
@@ -60,53 +81,74 @@ class FaceEmbedder:
         first use. No training is performed; we only use pretrained weights.
         
         Optimized for memory-constrained environments (Render free tier).
+        Other model/detector pairs are selected through the backend registry
+        (see backends.py).
+        
+        Args:
+            model_name: DeepFace recognition model
+            detector_backend: DeepFace face detector
         """
-        self.model_name = MODEL_NAME
-        self.detector_backend = DETECTOR_BACKEND
+        self.model_name = model_name
+        self.detector_backend = detector_backend
+        self._kwargs: Optional[dict] = None
 
-    def _decode_base64_image(self, base64_string: str) -> np.ndarray:
-        """
-        Decode base64 string to numpy array image (BGR format for OpenCV).
+    def _represent_kwargs(self, enforce_detection: bool = True) -> dict:
         """
-        if not base64_string or not base64_string.strip():
-            raise ValueError("Base64 image string is empty")
+        Keyword arguments for DeepFace.represent(), resolved once.
 
-        # Remove data URL prefix if present
-        if "," in base64_string:
-            base64_string = base64_string.split(",", 1)[1]
+        DeepFace has had a few API variations across versions (arg names differ).
+        To keep this project working across DeepFace releases, we:
+        - pass the image as the first positional argument (DeepFace treats it as img_path/img)
+        - only pass keyword args that exist in the current DeepFace.represent() signature
 
-        # Decode base64
-        image_data = base64.b64decode(base64_string)
-        if not image_data:
-            raise ValueError("Decoded image data is empty")
+        enforce_detection=True ensures that no-face images raise an error.
+        """
+        if self._kwargs is None:
+            base_kwargs = {
+                "model_name": self.model_name,
+                "detector_backend": self.detector_backend,
+                "distance_metric": DISTANCE_METRIC,
+                "enforce_detection": True,
+                "align": True,
+            }
+            supported = set(inspect.signature(_deepface().represent).parameters.keys())
+            self._kwargs = {k: v for k, v in base_kwargs.items() if k in supported}
+
+        if enforce_detection or "enforce_detection" not in self._kwargs:
+            return self._kwargs
+        return {**self._kwargs, "enforce_detection": False}
+
+    def load_model(self) -> None:
+        """
+        Load the recognition model weights now rather than on the first request.
 
-        # Convert to numpy array
-        nparr = np.frombuffer(image_data, np.uint8)
-        if nparr.size == 0:
-            raise ValueError("Image buffer is empty after decoding")
+        DeepFace caches built models per process, so later represent() calls
+        reuse them.
+        """
+        _deepface().build_model(self.model_name)
+        self._represent_kwargs()
 
-        # Decode image (BGR)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if img is None:
-            raise ValueError("OpenCV failed to decode image from base64 string")
+    def warm_up(self, iterations: int = WARMUP_ITERATIONS) -> None:
+        """
+        Run a few inferences on a synthetic image so the first real request
+        does not pay for graph tracing, detector setup and memory allocation.
 
-        return img
+        Args:
+            iterations: Number of warm-up inferences
+        """
+        image = np.full((224, 224, 3), 128, dtype=np.uint8)
+        cv2.circle(image, (112, 112), 60, (180, 170, 160), -1)
+        for _ in range(iterations):
+            # No real face here: skip enforcement so the full pipeline still runs
+            _deepface().represent(image, **self._represent_kwargs(enforce_detection=False))
 
-    def _cosine_similarity(self, a: np.ndarray, b: np.ndarray) -> float:
+    def _cosine_similarity(self, a, b) -> float:
         """
         Compute cosine similarity between two embedding vectors.
-        """
-        a = a.astype(np.float32)
-        b = b.astype(np.float32)
-
-        a_norm = np.linalg.norm(a)
-        b_norm = np.linalg.norm(b)
-        if a_norm == 0.0 or b_norm == 0.0:
-            raise ValueError("One of the embeddings has zero norm")
 
-        a_unit = a / a_norm
-        b_unit = b / b_norm
-        return float(np.dot(a_unit, b_unit))
+        Either side may be float32, float16 or an int8 QuantizedVector.
+        """
+        return cosine_similarity(a, b)
 
     def generate_embedding_from_base64(self, base64_image: str) -> np.ndarray:
         """
@@ -116,27 +158,22 @@ class FaceEmbedder:
         - Uses DeepFace.represent() with VGG-Face + OpenCV (memory-optimized).
         """
         # Decode base64 to image (BGR)
-        image = self._decode_base64_image(base64_image)
-
-        # DeepFace has had a few API variations across versions (arg names differ).
-        # To keep this project working across DeepFace releases, we:
-        # - pass the image as the first positional argument (DeepFace treats it as img_path/img)
-        # - only pass keyword args that exist in the current DeepFace.represent() signature
-        #
-        # enforce_detection=True ensures that no-face images raise an error.
-        base_kwargs = {
-            "model_name": self.model_name,
-            "detector_backend": self.detector_backend,
-            "distance_metric": DISTANCE_METRIC,
-            "enforce_detection": True,
-            "align": True,
-        }
-
-        sig = inspect.signature(DeepFace.represent)
-        supported = set(sig.parameters.keys())
-        filtered_kwargs = {k: v for k, v in base_kwargs.items() if k in supported}
-
-        representations = DeepFace.represent(image, **filtered_kwargs)
+        image = decode_base64_image(base64_image)
+        return self.generate_embedding_from_image(image)
+
+    def generate_embedding_from_image(self, image: np.ndarray, detector_backend: Optional[str] = None) -> np.ndarray:
+        """
+        Generate a face embedding from a decoded BGR image.
+
+        - Ensures exactly one face is detected.
+        - Uses DeepFace.represent() with VGG-Face + OpenCV (memory-optimized).
+        - detector_backend="skip" embeds an image that is already a face
+          crop (see pipeline.py) without running a detector again.
+        """
+        kwargs = self._represent_kwargs()
+        if detector_backend and "detector_backend" in kwargs:
+            kwargs = {**kwargs, "detector_backend": detector_backend}
+        representations = _deepface().represent(image, **kwargs)
 
         if not isinstance(representations, list) or len(representations) == 0:
             raise ValueError("No face detected in the image")
@@ -150,10 +187,83 @@ class FaceEmbedder:
         embedding = np.array(representations[0]["embedding"], dtype=np.float32)
         return embedding
 
-    def compare_embeddings(self, emb1: np.ndarray, emb2: np.ndarray) -> float:
+    def generate_embeddings_batch(
+        self, images: List[np.ndarray], detector_backend: Optional[str] = None
+    ) -> List[Union[np.ndarray, Exception]]:
+        """
+        Generate embeddings for several decoded BGR images at once.
+
+        Detection and alignment still run per image (the OpenCV detector is
+        single-image), but every detected face goes through the recognition
+        network in ONE batched forward pass. Mirrors DeepFace.represent():
+        the aligned RGB face is flipped to BGR, resized to the model input
+        and L2-normalized on output (cosine similarity is unaffected).
+
+        Falls back to per-image represent() when the installed DeepFace does
+        not expose the preprocessing helpers.
+
+        Args:
+            images: Decoded BGR images
+            detector_backend: Override the detector ("skip" for face crops)
+
+        Returns:
+            One entry per input image: the embedding, or the ValueError
+            describing why that image was rejected (no face, multiple faces).
+        """
+        try:
+            from deepface.modules import preprocessing
+            model = _deepface().build_model(self.model_name)
+            keras_model = model.model
+            input_height, input_width = model.input_shape[0], model.input_shape[1]
+        except (ImportError, AttributeError):
+            return [self._embed_or_error(image, detector_backend) for image in images]
+
+        results: List[Union[np.ndarray, Exception]] = [None] * len(images)
+        faces = []
+
+        for position, image in enumerate(images):
+            try:
+                face_objs = _deepface().extract_faces(
+                    image,
+                    detector_backend=detector_backend or self.detector_backend,
+                    enforce_detection=True,
+                    align=True,
+                )
+                if len(face_objs) == 0:
+                    raise ValueError("No face detected in the image")
+                if len(face_objs) > 1:
+                    raise ValueError(
+                        f"Multiple faces detected ({len(face_objs)}). Exactly one face is required."
+                    )
+                face = face_objs[0]["face"][:, :, ::-1]  # RGB -> BGR, as represent() does
+                face = preprocessing.resize_image(img=face, target_size=(input_width, input_height))
+                faces.append((position, face))
+            except ValueError as e:
+                results[position] = e
+
+        if faces:
+            batch = np.concatenate([face for _, face in faces], axis=0)
+            outputs = np.asarray(keras_model(batch, training=False), dtype=np.float32)
+            norms = np.linalg.norm(outputs, axis=1, keepdims=True)
+            outputs = outputs / np.where(norms == 0.0, 1.0, norms)
+            for (position, _), embedding in zip(faces, outputs):
+                results[position] = embedding
+
+        return results
+
+    def _embed_or_error(self, image: np.ndarray, detector_backend: Optional[str] = None) -> Union[np.ndarray, Exception]:
+        try:
+            return self.generate_embedding_from_image(image, detector_backend)
+        except ValueError as e:
+            return e
+
+    def compare_embeddings(self, emb1, emb2) -> float:
         """
         Compare two embeddings using cosine similarity.
 
+        Accepts float arrays or quantized embeddings as returned by
+        FaceStorage.get_embedding().
+
         Returns:
             similarity score in [−1, 1], where 1.0 means identical direction.
         """
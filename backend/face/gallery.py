@@ -0,0 +1,371 @@
+"""
+In-memory Face Gallery Module
+
+Keeps every registered embedding resident as one contiguous, L2-normalized
+matrix so 1:N identification is a single matrix-vector product.
+- Loaded once from FaceStorage at startup
+- Updated incrementally when embeddings are stored, updated or deleted
+- Rows are kept dense: deleting a voter moves the last row into its slot
+- Rows can be held as float32, float16 or int8 to shrink resident memory;
+  quantized matrices are scored block by block without a full float32 copy
+- Only embeddings made by one model are held; scores between embeddings
+  of different models are meaningless
+- Row observers (the ANN index) are told about every row change, so they
+  can refer to rows by number instead of by voter_id
+"""
+
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+from .backends import get_backend
+from .quantization import EMBEDDING_DTYPE, quantize, scoring_values, to_float32, validate_dtype
+
+# Rows upcast to float32 at a time when scoring a quantized matrix
+_SCORE_BLOCK_ROWS = 8192
+
+
+class FaceGallery:
+    """
+    Vectorized gallery of L2-normalized face embeddings.
+
+    Registered as an observer on FaceStorage so that every successful
+    store/update/delete is mirrored here without reloading the database.
+    """
+
+    def __init__(
+        self,
+        initial_capacity: int = 1024,
+        dtype: str = EMBEDDING_DTYPE,
+        model_name: Optional[str] = None,
+    ):
+        """
+        Initialize an empty gallery.
+
+        Args:
+            initial_capacity: Number of rows to preallocate (grows by doubling)
+            dtype: Row representation: "float32", "float16" or "int8"
+            model_name: Model whose embeddings are held; upserts from other
+                        models are ignored (None accepts every model)
+        """
+        self.dtype = validate_dtype(dtype)
+        self.model_name = model_name
+        self._lock = threading.RLock()
+        self._matrix: Optional[np.ndarray] = None
+        # Per-row 1/||row|| so quantized rows score as exact cosine similarity
+        self._factors: Optional[np.ndarray] = None
+        self._capacity = max(1, initial_capacity)
+        self._voter_ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._row_observers = []
+
+    def add_row_observer(self, observer):
+        """
+        Register an observer of row changes.
+
+        Observers implement row_upserted(voter_id, row, vector, is_new),
+        row_removed(voter_id, row, moved_id, moved_from) and rows_reset().
+        They are called with the gallery lock held, so row numbers cannot
+        change while an observer handles them.
+        """
+        with self._lock:
+            self._row_observers.append(observer)
+
+    def remove_row_observer(self, observer):
+        """Unregister a row observer (no-op if not registered)."""
+        with self._lock:
+            if observer in self._row_observers:
+                self._row_observers.remove(observer)
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """Return embedding (any supported representation) as a unit-length float32 vector."""
+        vector = to_float32(embedding)
+        norm = np.linalg.norm(vector)
+        if norm == 0.0:
+            raise ValueError("Embedding has zero norm")
+        return vector / norm
+
+    def _ensure_capacity(self, dim: int, rows_needed: int):
+        """Allocate or grow the backing matrix (amortized O(1) appends)."""
+        if self._matrix is None:
+            capacity = max(self._capacity, rows_needed)
+            self._matrix = np.zeros((capacity, dim), dtype=np.dtype(self.dtype))
+            self._factors = np.zeros(capacity, dtype=np.float32)
+            return
+
+        if self._matrix.shape[1] != dim:
+            raise ValueError(
+                f"Embedding dimension {dim} does not match gallery dimension {self._matrix.shape[1]}"
+            )
+
+        if rows_needed > self._matrix.shape[0]:
+            capacity = max(rows_needed, self._matrix.shape[0] * 2)
+            count = len(self._voter_ids)
+            grown = np.zeros((capacity, dim), dtype=self._matrix.dtype)
+            grown[:count] = self._matrix[:count]
+            factors = np.zeros(capacity, dtype=np.float32)
+            factors[:count] = self._factors[:count]
+            self._matrix = grown
+            self._factors = factors
+
+    def load(self, items) -> int:
+        """
+        Replace gallery contents with the given embeddings.
+
+        Args:
+            items: Iterable of (voter_id, embedding) pairs
+
+        Returns:
+            Number of embeddings loaded
+        """
+        with self._lock:
+            self._matrix = None
+            self._factors = None
+            self._voter_ids = []
+            self._rows = {}
+            for observer in self._row_observers:
+                observer.rows_reset()
+            for voter_id, embedding in items:
+                self.upsert(voter_id, embedding)
+            return len(self._voter_ids)
+
+    def accepts(self, model_name: Optional[str]) -> bool:
+        """True if embeddings made by model_name belong in this gallery."""
+        return not (self.model_name and model_name and model_name != self.model_name)
+
+    def upsert(self, voter_id: str, embedding: np.ndarray, model_name: Optional[str] = None):
+        """
+        Add a new embedding or replace an existing one.
+
+        Args:
+            voter_id: Unique voter identifier
+            embedding: Raw (not necessarily normalized) embedding vector
+            model_name: Model that produced the embedding; one from another
+                        model drops the voter from the gallery instead
+        """
+        if not self.accepts(model_name):
+            self.remove(voter_id)
+            return
+        unit = self._normalize(embedding)
+        vector = scoring_values(quantize(unit, self.dtype))
+        row_norm = float(np.linalg.norm(vector.astype(np.float32)))
+        if row_norm == 0.0:
+            raise ValueError("Embedding has zero norm after quantization")
+        with self._lock:
+            row = self._rows.get(voter_id)
+            is_new = row is None
+            if is_new:
+                row = len(self._voter_ids)
+                self._ensure_capacity(vector.size, row + 1)
+                self._voter_ids.append(voter_id)
+                self._rows[voter_id] = row
+            else:
+                self._ensure_capacity(vector.size, row + 1)
+            self._matrix[row] = vector
+            self._factors[row] = 1.0 / row_norm
+            for observer in self._row_observers:
+                observer.row_upserted(voter_id, row, unit, is_new)
+
+    def remove(self, voter_id: str):
+        """
+        Remove a voter's embedding (no-op if not present).
+
+        Args:
+            voter_id: Unique voter identifier
+        """
+        with self._lock:
+            row = self._rows.pop(voter_id, None)
+            if row is None:
+                return
+
+            last = len(self._voter_ids) - 1
+            moved_id, moved_from = None, None
+            if row != last:
+                # Keep rows dense by moving the last row into the freed slot
+                moved_id, moved_from = self._voter_ids[last], last
+                self._matrix[row] = self._matrix[last]
+                self._factors[row] = self._factors[last]
+                self._voter_ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._voter_ids.pop()
+            for observer in self._row_observers:
+                observer.row_removed(voter_id, row, moved_id, moved_from)
+
+    def search(self, embedding: np.ndarray, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Find the registered voters most similar to a probe embedding.
+
+        Args:
+            embedding: Probe embedding vector
+            top_k: Maximum number of matches to return
+
+        Returns:
+            List of (voter_id, cosine_similarity) sorted by similarity, best first
+        """
+        probe = self._normalize(embedding)
+        with self._lock:
+            count = len(self._voter_ids)
+            if count == 0 or top_k <= 0:
+                return []
+
+            if probe.size != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Probe dimension {probe.size} does not match gallery dimension {self._matrix.shape[1]}"
+                )
+
+            scores = self._scores(probe, count)
+            k = min(top_k, count)
+            if k < count:
+                candidates = np.argpartition(scores, count - k)[count - k:]
+            else:
+                candidates = np.arange(count)
+            best = candidates[np.argsort(scores[candidates])[::-1]]
+
+            return [(self._voter_ids[i], float(scores[i])) for i in best]
+
+    def search_rows(self, embedding: np.ndarray, select_rows, top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Like search(), but only scores the rows chosen by select_rows (used
+        by the ANN index to score its candidate partitions without its own
+        copy of the vectors).
+
+        Args:
+            embedding: Probe embedding vector
+            select_rows: Callable returning an int array of row numbers, or
+                         None to scan every row; it runs with the gallery
+                         lock held, so the rows it returns stay valid
+            top_k: Maximum number of matches to return
+
+        Returns:
+            List of (voter_id, cosine_similarity) sorted by similarity, best first
+        """
+        probe = self._normalize(embedding)
+        with self._lock:
+            rows = select_rows()
+            if rows is None:
+                return self.search(probe, top_k)
+            if len(rows) == 0 or top_k <= 0:
+                return []
+            if probe.size != self._matrix.shape[1]:
+                raise ValueError(
+                    f"Probe dimension {probe.size} does not match gallery dimension {self._matrix.shape[1]}"
+                )
+            scores = (self._matrix[rows].astype(np.float32, copy=False) @ probe) * self._factors[rows]
+
+            count = len(rows)
+            k = min(top_k, count)
+            if k < count:
+                candidates = np.argpartition(scores, count - k)[count - k:]
+            else:
+                candidates = np.arange(count)
+            best = candidates[np.argsort(scores[candidates])[::-1]]
+            return [(self._voter_ids[rows[i]], float(scores[i])) for i in best]
+
+    def row_of(self, voter_id: str) -> Optional[int]:
+        """Return the row currently holding voter_id, or None."""
+        with self._lock:
+            return self._rows.get(voter_id)
+
+    def _scores(self, probe: np.ndarray, count: int) -> np.ndarray:
+        """Cosine similarity of probe against the first `count` rows."""
+        if self._matrix.dtype == np.float32:
+            return (self._matrix[:count] @ probe) * self._factors[:count]
+
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, _SCORE_BLOCK_ROWS):
+            stop = min(count, start + _SCORE_BLOCK_ROWS)
+            block = self._matrix[start:stop].astype(np.float32)
+            scores[start:stop] = (block @ probe) * self._factors[start:stop]
+        return scores
+
+    def vectors(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Return all voter_ids and their unit vectors as a float32 matrix.
+
+        Returns:
+            Tuple of (voter_ids, matrix) with rows in the same order
+        """
+        with self._lock:
+            count = len(self._voter_ids)
+            if count == 0:
+                return [], np.zeros((0, 0), dtype=np.float32)
+            matrix = self._matrix[:count].astype(np.float32) * self._factors[:count, None]
+            return list(self._voter_ids), matrix
+
+    def voter_ids(self) -> List[str]:
+        """Return a snapshot of the voter_ids in the gallery (row order)."""
+        with self._lock:
+            return list(self._voter_ids)
+
+    def get_vectors(self, voter_ids) -> Tuple[List[str], np.ndarray]:
+        """
+        Return the unit vectors of the given voters as a float32 matrix.
+
+        Args:
+            voter_ids: voter_ids to look up (ones not in the gallery are skipped)
+
+        Returns:
+            Tuple of (found voter_ids, matrix) with rows in the same order
+        """
+        with self._lock:
+            found = [voter_id for voter_id in voter_ids if voter_id in self._rows]
+            if not found:
+                return [], np.zeros((0, 0), dtype=np.float32)
+            rows = np.fromiter((self._rows[voter_id] for voter_id in found), dtype=np.int64, count=len(found))
+            return found, self._matrix[rows].astype(np.float32) * self._factors[rows, None]
+
+    @property
+    def dimension(self) -> Optional[int]:
+        """Embedding dimension of the rows, or None before the first row."""
+        if self._matrix is None:
+            return None
+        return self._matrix.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the backing matrix and row factors."""
+        if self._matrix is None:
+            return 0
+        return self._matrix.nbytes + self._factors.nbytes
+
+    def __len__(self) -> int:
+        return len(self._voter_ids)
+
+    def __contains__(self, voter_id: str) -> bool:
+        return voter_id in self._rows
+
+
+# Global gallery instance (lazy loading)
+_gallery_instance: Optional[FaceGallery] = None
+
+
+def get_gallery(storage=None) -> FaceGallery:
+    """
+    Get or create the global face gallery.
+
+    On first use the gallery is loaded from storage and registered as an
+    observer, so later changes are applied incrementally. Only embeddings
+    made by the active backend's model are loaded.
+
+    Args:
+        storage: FaceStorage to load from (default: global storage instance)
+
+    Returns:
+        FaceGallery instance
+    """
+    global _gallery_instance
+    if _gallery_instance is None:
+        if storage is None:
+            from .storage import get_storage
+            storage = get_storage()
+        model_name = get_backend().model_name
+        gallery = FaceGallery(
+            initial_capacity=max(1024, storage.get_count()),
+            dtype=storage.embedding_dtype,
+            model_name=model_name
+        )
+        storage.add_observer(gallery)
+        gallery.load(storage.iter_embeddings(model_name=model_name))
+        _gallery_instance = gallery
+    return _gallery_instance
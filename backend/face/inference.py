@@ -0,0 +1,462 @@
+"""
+Inference Executor Module
+
+Runs DeepFace embedding generation outside the event loop:
+- A pool of worker processes, each loading its own FaceEmbedder/model once
+  (spawned, not forked, so no TensorFlow state is shared with the parent)
+- A bounded submission queue: when it is full new jobs are rejected
+  immediately instead of piling up behind slow inferences
+- Each worker is its own single-process pool and only takes a job when it
+  is idle, so a job's timeout counts from when it starts running, not
+  from when it was queued
+- Per-job timeouts; a worker stuck past its timeout is killed and replaced
+  on its own, the other workers keep running
+- Crash recovery: if a worker dies it is replaced and the job retried once;
+  jobs dropped by a restart or shutdown are retried too
+- Warm start: every worker loads the model and runs warm-up inferences
+  before taking jobs; warm_up() reports when the pool is ready to serve
+- Decoded frames pass the quality pre-filter (quality.py) first, so
+  blurry, dark, tiny or cut-off faces never reach the model
+- Workers can also run secondary backends (the cascade's fast stage,
+  see cascade.py) next to the main model
+- The main model runs behind the configured detection pipeline
+  (FACE_DETECTION_PIPELINE, see pipeline.py)
+
+With FACE_INFERENCE_WORKERS=0 inference runs on a single background thread
+in the server process (lowest memory, still never blocks the event loop).
+A thread cannot be killed, so a timed-out job is left to finish on its
+own and later jobs run on a fresh thread.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .backends import create_embedder
+from .cascade import CASCADE_BACKEND
+from .ingest import decode_payload
+from .pipeline import DETECTION_PIPELINE, create_pipeline
+from .quality import check_image_quality
+
+# Executor configuration (override via environment)
+INFERENCE_WORKERS = int(os.environ.get("FACE_INFERENCE_WORKERS", "1"))
+INFERENCE_MAX_QUEUE = int(os.environ.get("FACE_INFERENCE_MAX_QUEUE", "16"))
+INFERENCE_TIMEOUT = float(os.environ.get("FACE_INFERENCE_TIMEOUT", "30"))
+# First start may download weights, so warm-up gets a much longer budget
+INFERENCE_WARMUP_TIMEOUT = float(os.environ.get("FACE_INFERENCE_WARMUP_TIMEOUT", "300"))
+
+
+class InferenceUnavailable(RuntimeError):
+    """Raised when a job cannot be run (queue full, timed out, or workers crashed)."""
+
+
+# Per-process embedder and its detection pipeline, created by the pool initializer
+_worker_embedder = None
+_worker_pipeline = None
+# Per-process embedders for secondary backends, by backend name
+_worker_secondary_embedders: Dict[str, object] = {}
+
+
+def _secondary_embedder(backend: str):
+    """Return this worker's embedder for a secondary backend, loading it once."""
+    embedder = _worker_secondary_embedders.get(backend)
+    if embedder is None:
+        embedder = create_embedder(backend)
+        embedder.load_model()
+        _worker_secondary_embedders[backend] = embedder
+    return embedder
+
+
+def _init_worker():
+    """Load and warm up the embedding model(s) once per worker process."""
+    global _worker_embedder, _worker_pipeline
+    embedder = create_embedder()
+    embedder.load_model()
+    embedder.warm_up()
+    if CASCADE_BACKEND:
+        _secondary_embedder(CASCADE_BACKEND).warm_up()
+    pipeline = create_pipeline(embedder)
+    if pipeline.mode == "yolo":
+        # Load the YOLO weights now, not on the first request
+        pipeline.detector
+    _worker_pipeline = pipeline
+    _worker_embedder = embedder
+
+
+def _warm_up(_payload=None) -> int:
+    """Job body that returns once this worker's model is loaded and warm."""
+    if _worker_embedder is None:
+        _init_worker()
+    return os.getpid()
+
+
+def _decode_checked(image: Union[str, bytes]) -> np.ndarray:
+    """Decode an upload and reject it early if the frame is unusable."""
+    decoded = decode_payload(image)
+    check_image_quality(decoded)
+    return decoded
+
+
+def _generate_embedding(image: Union[str, bytes]) -> np.ndarray:
+    """Job body executed inside a worker."""
+    if _worker_embedder is None:
+        _init_worker()
+    return _worker_pipeline.embed_image(decode_payload(image))
+
+
+def _generate_ungated_embedding(image: Union[str, bytes]) -> np.ndarray:
+    """Job body that skips the quality gate (registration photos)."""
+    if _worker_embedder is None:
+        _init_worker()
+    return _worker_pipeline.embed_image(decode_payload(image), check_quality=False)
+
+
+def _generate_frame_embedding(image: np.ndarray) -> np.ndarray:
+    """Job body for a decoded frame that already passed the quality gates."""
+    if _worker_embedder is None:
+        _init_worker()
+    return _worker_pipeline.embed_image(image, check_quality=False)
+
+
+def _generate_secondary_embedding(job: Tuple[str, Union[str, bytes], bool]) -> np.ndarray:
+    """Job body for a secondary backend: (backend name, image, check_quality)."""
+    if _worker_embedder is None:
+        _init_worker()
+    backend, image, check_quality = job
+    decoded = _decode_checked(image) if check_quality else decode_payload(image)
+    return _secondary_embedder(backend).generate_embedding_from_image(decoded)
+
+
+def _generate_embeddings_batch(
+    job: Tuple[List[Union[str, bytes]], List[bool]]
+) -> List[Union[np.ndarray, Exception]]:
+    """
+    Batched job body: (images, per-image check_quality). Per-item decode,
+    then the pipeline embeds all faces in one pass.
+    """
+    if _worker_embedder is None:
+        _init_worker()
+
+    images, check_quality = job
+    results: List[Union[np.ndarray, Exception]] = [None] * len(images)
+    decoded = []
+    for position, image in enumerate(images):
+        try:
+            decoded.append((position, decode_payload(image)))
+        except ValueError as e:
+            results[position] = e
+
+    if decoded:
+        outcomes = _worker_pipeline.embed_images(
+            [image for _, image in decoded],
+            [check_quality[position] for position, _ in decoded],
+        )
+        for (position, _), outcome in zip(decoded, outcomes):
+            results[position] = outcome
+    return results
+
+
+class InferenceExecutor:
+    """
+    Bounded, timeout-aware executor for embedding generation.
+    """
+
+    def __init__(
+        self,
+        workers: int = INFERENCE_WORKERS,
+        max_queue: int = INFERENCE_MAX_QUEUE,
+        timeout: float = INFERENCE_TIMEOUT,
+    ):
+        """
+        Initialize the executor (workers start on first use or start()).
+
+        Args:
+            workers: Worker processes (0 runs inference on one in-process thread)
+            max_queue: Maximum jobs queued or running before new ones are rejected
+            timeout: Seconds a single job may take once it is running
+        """
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        # One single-worker pool per slot, so a stuck worker can be replaced alone
+        self._pools: list = []
+        self._pool_lock = threading.Lock()
+        # Idle slot numbers (created lazily so it binds to the running event loop)
+        self._idle: Optional[asyncio.Queue] = None
+        self._pending = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.rejected = 0
+        self.ready = False
+        self.warm_up_error: Optional[str] = None
+
+    def _create_pool(self):
+        if self.workers <= 0:
+            return ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-inference")
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def start(self):
+        """Start the workers if they are not running yet."""
+        with self._pool_lock:
+            if not self._pools:
+                self._pools = [self._create_pool() for _ in range(max(1, self.workers))]
+
+    def _restart(self, slot: int, broken_pool):
+        """Replace one crashed or stuck worker (only once per broken pool)."""
+        with self._pool_lock:
+            if slot >= len(self._pools) or self._pools[slot] is not broken_pool:
+                return
+            processes = getattr(broken_pool, "_processes", None) or {}
+            for process in list(processes.values()):
+                # Kill a worker stuck in inference; shutdown() alone would wait for it
+                process.terminate()
+            # In thread mode the stuck thread is abandoned and finishes on its own
+            broken_pool.shutdown(wait=False, cancel_futures=True)
+            self._pools[slot] = self._create_pool()
+            self.restarts += 1
+
+    async def _acquire(self) -> Tuple[asyncio.Queue, int]:
+        """Wait for an idle worker slot; returns (idle queue, slot)."""
+        if self._idle is None:
+            self.start()
+            self._idle = asyncio.Queue()
+            for slot in range(len(self._pools)):
+                self._idle.put_nowait(slot)
+        idle = self._idle
+        return idle, await idle.get()
+
+    def _release_when_done(self, idle: asyncio.Queue, slot: int, pool, future, timeout: float):
+        """
+        Free a slot whose caller went away only once its job has finished,
+        restarting the worker if the job is still running after timeout.
+        """
+        loop = asyncio.get_running_loop()
+        released = []
+
+        def release():
+            if not released:
+                released.append(slot)
+                idle.put_nowait(slot)
+
+        def expire():
+            if not future.done():
+                self.timeouts += 1
+                self._restart(slot, pool)
+            release()
+
+        timer = loop.call_later(timeout, expire)
+
+        def finished():
+            timer.cancel()
+            release()
+
+        def notify(_):
+            try:
+                loop.call_soon_threadsafe(finished)
+            except RuntimeError:
+                pass  # event loop already closed
+
+        future.add_done_callback(notify)
+
+    async def _run(self, func, payload, timeout: Optional[float] = None):
+        """Run func(payload) on an idle worker with queue bound, timeout and crash recovery."""
+        timeout = self.timeout if timeout is None else timeout
+        if self._pending >= self.max_queue:
+            self.rejected += 1
+            raise InferenceUnavailable("Face inference queue is full, please retry shortly")
+
+        self._pending += 1
+        try:
+            failure = "Face inference workers crashed"
+            for _ in range(2):
+                # Wait for a free worker first: the timeout only covers running
+                idle, slot = await self._acquire()
+                release = True
+                try:
+                    with self._pool_lock:
+                        pool = self._pools[slot]
+                    try:
+                        future = pool.submit(func, payload)
+                    except (BrokenProcessPool, RuntimeError):
+                        # Worker died or the pool was shut down; replace it and retry
+                        self._restart(slot, pool)
+                        continue
+
+                    wrapped = asyncio.wrap_future(future)
+                    try:
+                        done, _ = await asyncio.wait({wrapped}, timeout=timeout)
+                    except asyncio.CancelledError:
+                        # The caller went away; the worker stays busy until the job ends
+                        future.cancel()
+                        self._release_when_done(idle, slot, pool, future, timeout)
+                        release = False
+                        raise
+
+                    if not done:
+                        wrapped.cancel()
+                        self.timeouts += 1
+                        self._restart(slot, pool)
+                        raise InferenceUnavailable(f"Face inference timed out after {timeout:.0f}s")
+                    if wrapped.cancelled():
+                        # Dropped by a restart or shutdown before it ran
+                        failure = "Face inference was interrupted, please retry"
+                        continue
+                    try:
+                        result = wrapped.result()
+                    except BrokenProcessPool:
+                        # The worker died (e.g. OOM-killed); replace it and retry once
+                        failure = "Face inference workers crashed"
+                        self._restart(slot, pool)
+                        continue
+                    self.completed += 1
+                    return result
+                finally:
+                    if release:
+                        idle.put_nowait(slot)
+            raise InferenceUnavailable(failure)
+        finally:
+            self._pending -= 1
+
+    async def generate_embedding(
+        self,
+        image: Union[str, bytes],
+        backend: Optional[str] = None,
+        check_quality: bool = True,
+    ) -> np.ndarray:
+        """
+        Generate an embedding on a worker and await the result.
+
+        Args:
+            image: Base64 encoded image, or raw image bytes
+            backend: Secondary backend to use instead of the main model
+            check_quality: False to skip the quality pre-filter (registration)
+
+        Returns:
+            Embedding as numpy array
+
+        Raises:
+            ValueError: No face / multiple faces / undecodable image
+            InferenceUnavailable: Queue full, timeout, or repeated worker crash
+        """
+        if backend:
+            return await self._run(_generate_secondary_embedding, (backend, image, check_quality))
+        if not check_quality:
+            return await self._run(_generate_ungated_embedding, image)
+        return await self._run(_generate_embedding, image)
+
+    async def generate_frame_embedding(self, image: np.ndarray) -> np.ndarray:
+        """
+        Embed a decoded frame that has already passed the quality gates.
+
+        Used by streaming verification (stream.py), which decodes, tracks
+        and gates every frame itself; the worker neither decodes the frame
+        again nor repeats the quality gate's face detection.
+
+        Args:
+            image: Decoded BGR frame
+
+        Returns:
+            Embedding as numpy array
+
+        Raises:
+            ValueError: The model found no face / multiple faces
+            InferenceUnavailable: Queue full, timeout, or repeated worker crash
+        """
+        return await self._run(_generate_frame_embedding, image)
+
+    async def generate_embeddings_batch(
+        self,
+        images: List[Union[str, bytes]],
+        check_quality: Union[bool, List[bool]] = True,
+    ) -> List[Union[np.ndarray, Exception]]:
+        """
+        Generate embeddings for several images as one worker job.
+
+        Args:
+            images: Base64 encoded images and/or raw image bytes
+            check_quality: Whether to run the quality pre-filter, for all
+                           images or per image (registration photos skip it)
+
+        Returns:
+            One entry per image: embedding, or the ValueError for that image
+
+        Raises:
+            InferenceUnavailable: Queue full, timeout, or repeated worker crash
+        """
+        images = list(images)
+        if isinstance(check_quality, bool):
+            check_quality = [check_quality] * len(images)
+        return await self._run(_generate_embeddings_batch, (images, list(check_quality)))
+
+    async def warm_up(self, timeout: float = INFERENCE_WARMUP_TIMEOUT) -> bool:
+        """
+        Start the workers and wait until each has loaded and warmed its model.
+
+        Args:
+            timeout: Seconds allowed for model loading and warm-up
+
+        Returns:
+            True if inference is ready to serve traffic
+        """
+        # Spawned pools launch all workers at once; one job per worker
+        # waits until every initializer has finished
+        jobs = max(1, self.workers)
+        try:
+            await asyncio.gather(*[self._run(_warm_up, None, timeout=timeout) for _ in range(jobs)])
+        except Exception as e:
+            self.warm_up_error = str(e)
+            print(f"Error warming up face inference: {e}")
+            return False
+
+        self.ready = True
+        self.warm_up_error = None
+        return True
+
+    def stats(self) -> dict:
+        """Return executor counters."""
+        return {
+            'workers': self.workers,
+            'detection_pipeline': DETECTION_PIPELINE,
+            'ready': self.ready,
+            'pending': self._pending,
+            'completed': self.completed,
+            'timeouts': self.timeouts,
+            'restarts': self.restarts,
+            'rejected': self.rejected,
+        }
+
+    def shutdown(self):
+        """Stop all workers."""
+        with self._pool_lock:
+            for pool in self._pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._pools = []
+            self._idle = None
+
+
+# Global executor instance (lazy loading)
+_executor_instance: Optional[InferenceExecutor] = None
+
+
+def get_inference_executor() -> InferenceExecutor:
+    """
+    Get or create the global inference executor.
+
+    Returns:
+        InferenceExecutor instance
+    """
+    global _executor_instance
+    if _executor_instance is None:
+        _executor_instance = InferenceExecutor()
+    return _executor_instance
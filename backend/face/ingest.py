@@ -0,0 +1,228 @@
+"""
+Image Ingest Module
+
+Single entry point for turning an uploaded photo into a BGR array for the
+detector and embedder:
+- Payload size is checked before base64 decoding, so oversized uploads
+  are rejected without allocating them
+- Image dimensions are read from the JPEG/PNG header, and absurd pixel
+  counts (decompression bombs) are rejected before decoding
+- Large JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale
+  (IMREAD_REDUCED_COLOR_*), which skips most of the IDCT work and never
+  materializes the full-resolution frame; phone cameras send 12 MP but
+  face detection needs far less
+- The result is capped at FACE_MAX_IMAGE_SIDE pixels on its longest side
+"""
+
+import base64
+import binascii
+import os
+import struct
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+# Ingest limits (override via environment)
+MAX_IMAGE_BYTES = int(os.environ.get("FACE_MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.environ.get("FACE_MAX_IMAGE_PIXELS", str(50_000_000)))
+MAX_IMAGE_SIDE = int(os.environ.get("FACE_MAX_IMAGE_SIDE", "1280"))
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+_JPEG_STANDALONE_MARKERS = {0x01, 0xD0, 0xD1, 0xD2, 0xD3, 0xD4, 0xD5, 0xD6, 0xD7, 0xD8}
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+class ImageTooLargeError(ValueError):
+    """Raised when an upload exceeds the byte or pixel limits."""
+
+
+def image_dimensions(data: bytes) -> Optional[Tuple[int, int]]:
+    """
+    Read (width, height) from a JPEG or PNG header without decoding pixels.
+
+    Returns:
+        (width, height), or None for other formats or malformed headers
+    """
+    if data.startswith(_PNG_SIGNATURE) and len(data) >= 24:
+        width, height = struct.unpack(">II", data[16:24])
+        return width, height
+
+    if not data.startswith(b"\xff\xd8"):
+        return None
+
+    i = 2
+    size = len(data)
+    while i + 4 <= size:
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker in _JPEG_STANDALONE_MARKERS:
+            i += 2
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            # End of image / start of scan before any frame header
+            return None
+        (length,) = struct.unpack(">H", data[i + 2:i + 4])
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 9 > size:
+                return None
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+def check_base64_size(base64_string: str, max_bytes: int = MAX_IMAGE_BYTES):
+    """
+    Reject a base64 payload whose decoded size would exceed max_bytes.
+
+    Only looks at the string length, so it is cheap enough to run in the
+    server process before the image is shipped to an inference worker.
+
+    Raises:
+        ImageTooLargeError: Payload larger than max_bytes
+    """
+    # Every 4 base64 characters carry 3 bytes (a data URL prefix only overestimates)
+    if base64_string and len(base64_string) * 3 // 4 > max_bytes + 2:
+        raise ImageTooLargeError(f"Image is larger than the {max_bytes / (1024 * 1024):.1f} MB limit")
+
+
+def check_payload_size(payload: Union[str, bytes], max_bytes: int = MAX_IMAGE_BYTES):
+    """
+    Reject raw image bytes or a base64 string over max_bytes (decoded).
+
+    Raises:
+        ImageTooLargeError: Payload larger than max_bytes
+    """
+    if isinstance(payload, (bytes, bytearray)):
+        if len(payload) > max_bytes:
+            raise ImageTooLargeError(f"Image is larger than the {max_bytes / (1024 * 1024):.1f} MB limit")
+        return
+    check_base64_size(payload, max_bytes)
+
+
+def decode_base64_payload(base64_string: str, max_bytes: int = MAX_IMAGE_BYTES) -> bytes:
+    """
+    Decode a base64 (optionally data-URL) image payload to raw bytes.
+
+    Raises:
+        ImageTooLargeError: Payload larger than max_bytes
+        ValueError: Empty or invalid base64
+    """
+    if not base64_string or not base64_string.strip():
+        raise ValueError("Base64 image string is empty")
+
+    # Remove data URL prefix if present
+    if "," in base64_string:
+        base64_string = base64_string.split(",", 1)[1]
+
+    check_base64_size(base64_string, max_bytes)
+
+    try:
+        image_data = base64.b64decode(base64_string)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 encoding: {e}")
+
+    if not image_data:
+        raise ValueError("Decoded image data is empty")
+    return image_data
+
+
+def decode_image(
+    image_data: bytes,
+    max_side: int = MAX_IMAGE_SIDE,
+    max_bytes: int = MAX_IMAGE_BYTES,
+    max_pixels: int = MAX_IMAGE_PIXELS,
+) -> np.ndarray:
+    """
+    Decode encoded image bytes to a BGR array no larger than max_side.
+
+    Args:
+        image_data: Encoded image (JPEG, PNG, or anything OpenCV reads)
+        max_side: Longest side of the returned image (0 disables the cap)
+        max_bytes: Maximum encoded size
+        max_pixels: Maximum pixel count announced by the header
+
+    Returns:
+        numpy array (BGR format for OpenCV)
+
+    Raises:
+        ImageTooLargeError: Over the byte or pixel limit
+        ValueError: Empty or undecodable image
+    """
+    if not image_data:
+        raise ValueError("Image data is empty")
+    if len(image_data) > max_bytes:
+        raise ImageTooLargeError(f"Image is larger than the {max_bytes / (1024 * 1024):.1f} MB limit")
+
+    flag = cv2.IMREAD_COLOR
+    dimensions = image_dimensions(image_data)
+    if dimensions is not None:
+        width, height = dimensions
+        if width * height > max_pixels:
+            raise ImageTooLargeError(f"Image resolution {width}x{height} is too large")
+        # Only JPEG decodes faster at reduced scale; other formats are resized below
+        if max_side > 0 and image_data.startswith(b"\xff\xd8"):
+            longest = max(width, height)
+            for factor, reduced_flag in _REDUCED_FLAGS:
+                # Largest reduction that still leaves at least max_side pixels
+                if longest // factor >= max_side:
+                    flag = reduced_flag
+                    break
+
+    img = cv2.imdecode(np.frombuffer(image_data, np.uint8), flag)
+    if img is None:
+        raise ValueError("OpenCV failed to decode image. The image data may be corrupted or in an unsupported format.")
+
+    longest = max(img.shape[0], img.shape[1])
+    if max_side > 0 and longest > max_side:
+        scale = max_side / longest
+        img = cv2.resize(
+            img,
+            (max(1, round(img.shape[1] * scale)), max(1, round(img.shape[0] * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+    return img
+
+
+def decode_base64_image(base64_string: str, max_side: int = MAX_IMAGE_SIDE) -> np.ndarray:
+    """
+    Decode a base64 encoded image to a size-capped BGR array.
+
+    Args:
+        base64_string: Base64 image, optionally with a data URL prefix
+        max_side: Longest side of the returned image (0 disables the cap)
+
+    Returns:
+        numpy array (BGR format for OpenCV)
+    """
+    return decode_image(decode_base64_payload(base64_string), max_side=max_side)
+
+
+def decode_payload(payload: Union[str, bytes], max_side: int = MAX_IMAGE_SIDE) -> np.ndarray:
+    """
+    Decode an upload given either as raw image bytes (multipart) or as a
+    base64 string (JSON).
+
+    Args:
+        payload: Encoded image bytes, or base64 image string
+        max_side: Longest side of the returned image (0 disables the cap)
+
+    Returns:
+        numpy array (BGR format for OpenCV)
+    """
+    if isinstance(payload, (bytes, bytearray)):
+        return decode_image(payload, max_side=max_side)
+    return decode_base64_image(payload, max_side=max_side)
@@ -0,0 +1,285 @@
+"""
+ONNX Runtime Face Embedding Module
+
+Drop-in alternative to the DeepFace/TensorFlow FaceEmbedder for
+memory-constrained deployments:
+- The VGG-Face network runs from an ONNX export (see export_onnx_model.py)
+  on ONNX Runtime's CPU provider; TensorFlow is never imported
+- Detection and eye alignment follow DeepFace's "opencv" detector
+  backend (Haar cascades shipped with OpenCV): the whole image is rotated
+  around its center to level the eyes and the face box is re-projected
+  into the rotated image, as DeepFace's align_img_wrt_eyes() and
+  project_facial_area() do
+- Preprocessing follows DeepFace.represent(): BGR face scaled to [0, 1],
+  aspect-preserving resize with zero padding; outputs are L2-normalized
+
+The embeddings are close to DeepFace's but not bit-identical: resampling
+and rounding differ slightly, and DeepFace releases before 0.0.90 aligned
+the face crop instead of the whole image. Parity is therefore defined by
+test_onnx_parity.py: the two backends' embeddings of the same image must
+have cosine similarity of at least PARITY_MIN_SIMILARITY, and both must
+make the same accept/reject decision for every image pair. Run it on your
+own photos before switching a database registered with DeepFace.
+
+Select it with FACE_EMBEDDER_BACKEND=vgg-onnx.
+"""
+
+import os
+from typing import List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .ingest import decode_base64_image
+from .quantization import cosine_similarity
+
+ONNX_MODEL_PATH = os.environ.get("FACE_ONNX_MODEL_PATH", os.path.join("models", "vgg_face.onnx"))
+ONNX_THREADS = int(os.environ.get("FACE_ONNX_THREADS", "0"))  # 0 lets ONNX Runtime decide
+WARMUP_ITERATIONS = int(os.environ.get("FACE_WARMUP_ITERATIONS", "2"))
+
+# Minimum cosine similarity to DeepFace's embedding of the same image that
+# test_onnx_parity.py requires before this backend counts as compatible
+PARITY_MIN_SIMILARITY = 0.99
+
+# Same cascade parameters as DeepFace's OpenCV detector
+_FACE_SCALE_FACTOR = 1.1
+_FACE_MIN_NEIGHBORS = 10
+
+
+def _project_box(box: Tuple[int, int, int, int], angle: float, size: Tuple[int, int]) -> Tuple[int, int, int, int]:
+    """
+    Move a face box (x1, y1, x2, y2) to where it lands after the image is
+    rotated by `angle` degrees around its center (DeepFace's
+    project_facial_area()).
+
+    Args:
+        box: Face box in the original image
+        angle: Rotation passed to cv2.getRotationMatrix2D
+        size: (height, width) of the image
+
+    Returns:
+        Box (x1, y1, x2, y2) in the rotated image, clipped to its bounds
+    """
+    direction = 1 if angle >= 0 else -1
+    angle = abs(angle) % 360
+    if angle == 0:
+        return box
+    radians = np.radians(angle)
+    height, width = size
+    x1, y1, x2, y2 = box
+
+    # Rotate the box center around the image center; the box keeps its size
+    x = (x1 + x2) / 2.0 - width / 2.0
+    y = (y1 + y2) / 2.0 - height / 2.0
+    x_new = x * np.cos(radians) + y * direction * np.sin(radians) + width / 2.0
+    y_new = -x * direction * np.sin(radians) + y * np.cos(radians) + height / 2.0
+    half_w, half_h = (x2 - x1) / 2.0, (y2 - y1) / 2.0
+    return (
+        max(int(x_new - half_w), 0),
+        max(int(y_new - half_h), 0),
+        min(int(x_new + half_w), width),
+        min(int(y_new + half_h), height),
+    )
+
+
+class OnnxFaceEmbedder:
+    """
+    Face embedding generator backed by ONNX Runtime.
+
+    Exposes the same methods as FaceEmbedder so the inference workers and
+    endpoints can use either backend. Embeddings match DeepFace's to within
+    PARITY_MIN_SIMILARITY (checked by test_onnx_parity.py), not exactly.
+    """
+
+    def __init__(self, model_path: str = ONNX_MODEL_PATH, threads: int = ONNX_THREADS) -> None:
+        """
+        Initialize the backend (the ONNX session is created by load_model()
+        or on first use).
+
+        Args:
+            model_path: Path of the exported embedding network
+            threads: Intra-op threads for ONNX Runtime (0 = default)
+        """
+        self.model_name = "VGG-Face"
+        self.detector_backend = "opencv"
+        self.model_path = model_path
+        self.threads = threads
+        self._session = None
+        self._input_name: Optional[str] = None
+        self._input_size: Tuple[int, int] = (224, 224)
+        self._face_detector = None
+        self._eye_detector = None
+
+    def load_model(self) -> None:
+        """Create the ONNX Runtime session and load the Haar cascades."""
+        if self._session is not None:
+            return
+
+        import onnxruntime as ort
+
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(
+                f"ONNX model not found at '{self.model_path}'. Run export_onnx_model.py first."
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.threads > 0:
+            options.intra_op_num_threads = self.threads
+        session = ort.InferenceSession(self.model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+        model_input = session.get_inputs()[0]
+        height, width = model_input.shape[1], model_input.shape[2]
+        if isinstance(height, int) and isinstance(width, int):
+            self._input_size = (height, width)
+        self._input_name = model_input.name
+
+        self._face_detector = cv2.CascadeClassifier(
+            os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        )
+        self._eye_detector = cv2.CascadeClassifier(
+            os.path.join(cv2.data.haarcascades, "haarcascade_eye.xml")
+        )
+        self._session = session
+
+    def warm_up(self, iterations: int = WARMUP_ITERATIONS) -> None:
+        """Run a few forward passes so the first real request is not slower."""
+        self.load_model()
+        height, width = self._input_size
+        batch = np.full((1, height, width, 3), 0.5, dtype=np.float32)
+        for _ in range(iterations):
+            self._forward(batch)
+
+    def _detect_face(self, image: np.ndarray) -> np.ndarray:
+        """
+        Detect exactly one face, align it on the eyes and return the BGR crop.
+
+        Raises:
+            ValueError: No face or more than one face
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        faces = self._face_detector.detectMultiScale(gray, _FACE_SCALE_FACTOR, _FACE_MIN_NEIGHBORS)
+
+        if len(faces) == 0:
+            raise ValueError("No face detected in the image")
+        if len(faces) > 1:
+            raise ValueError(f"Multiple faces detected ({len(faces)}). Exactly one face is required.")
+
+        x, y, w, h = (int(v) for v in faces[0])
+        face = image[y:y + h, x:x + w]
+
+        eyes = self._eye_detector.detectMultiScale(gray[y:y + h, x:x + w], _FACE_SCALE_FACTOR, _FACE_MIN_NEIGHBORS)
+        if len(eyes) < 2:
+            return face
+
+        # Two largest detections, ordered left to right in the image; eye
+        # centers are truncated to whole pixels of the full image, as in DeepFace
+        eyes = sorted(eyes, key=lambda e: abs(e[2] * e[3]), reverse=True)[:2]
+        (ax, ay, aw, ah), (bx, by, bw, bh) = sorted(eyes, key=lambda e: e[0])
+        left = (x + int(ax + aw / 2), y + int(ay + ah / 2))
+        right = (x + int(bx + bw / 2), y + int(by + bh / 2))
+        angle = float(np.degrees(np.arctan2(right[1] - left[1], right[0] - left[0])))
+
+        # Rotate the whole image around its center, then find the face box in it
+        height, width = image.shape[:2]
+        rotation = cv2.getRotationMatrix2D((width // 2, height // 2), angle, 1.0)
+        rotated = cv2.warpAffine(
+            image, rotation, (width, height),
+            flags=cv2.INTER_CUBIC, borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0),
+        )
+        x1, y1, x2, y2 = _project_box((x, y, x + w, y + h), angle, (height, width))
+        return rotated[y1:y2, x1:x2]
+
+    def _preprocess(self, face: np.ndarray) -> np.ndarray:
+        """Scale to [0, 1], then resize with zero padding to the model input, as DeepFace does."""
+        height, width = self._input_size
+        # DeepFace scales before resizing, so interpolation is not rounded to uint8
+        face = face.astype(np.float32) / 255.0
+        factor = min(height / face.shape[0], width / face.shape[1])
+        resized = cv2.resize(face, (max(1, int(face.shape[1] * factor)), max(1, int(face.shape[0] * factor))))
+
+        pad_h = height - resized.shape[0]
+        pad_w = width - resized.shape[1]
+        padded = np.pad(
+            resized,
+            ((pad_h // 2, pad_h - pad_h // 2), (pad_w // 2, pad_w - pad_w // 2), (0, 0)),
+            mode="constant",
+        )
+        if padded.shape[:2] != (height, width):
+            padded = cv2.resize(padded, (width, height))
+        return padded
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        """Run the network on a (N, H, W, 3) batch and L2-normalize the outputs."""
+        outputs = self._session.run(None, {self._input_name: batch})[0].astype(np.float32)
+        outputs = outputs.reshape(outputs.shape[0], -1)
+        norms = np.linalg.norm(outputs, axis=1, keepdims=True)
+        return outputs / np.where(norms == 0.0, 1.0, norms)
+
+    def generate_embedding_from_base64(self, base64_image: str) -> np.ndarray:
+        """
+        Generate a face embedding from a base64 encoded image.
+
+        - Ensures exactly one face is detected.
+        """
+        image = decode_base64_image(base64_image)
+        return self.generate_embedding_from_image(image)
+
+    def _face_of(self, image: np.ndarray, detector_backend: Optional[str]) -> np.ndarray:
+        """The face region of an image; "skip" means the image already is one."""
+        if detector_backend == "skip":
+            return image
+        return self._detect_face(image)
+
+    def generate_embedding_from_image(self, image: np.ndarray, detector_backend: Optional[str] = None) -> np.ndarray:
+        """
+        Generate a face embedding from a decoded BGR image.
+
+        - Ensures exactly one face is detected.
+        - detector_backend="skip" embeds an image that is already a face crop.
+        """
+        self.load_model()
+        face = self._preprocess(self._face_of(image, detector_backend))
+        return self._forward(face[np.newaxis])[0]
+
+    def generate_embeddings_batch(
+        self, images: List[np.ndarray], detector_backend: Optional[str] = None
+    ) -> List[Union[np.ndarray, Exception]]:
+        """
+        Generate embeddings for several decoded BGR images at once.
+
+        Detection runs per image; all detected faces share one forward pass.
+
+        Args:
+            images: Decoded BGR images
+            detector_backend: "skip" when the images are already face crops
+
+        Returns:
+            One entry per input image: the embedding, or the ValueError
+            describing why that image was rejected (no face, multiple faces).
+        """
+        self.load_model()
+        results: List[Union[np.ndarray, Exception]] = [None] * len(images)
+        faces = []
+
+        for position, image in enumerate(images):
+            try:
+                faces.append((position, self._preprocess(self._face_of(image, detector_backend))))
+            except ValueError as e:
+                results[position] = e
+
+        if faces:
+            outputs = self._forward(np.stack([face for _, face in faces]))
+            for (position, _), embedding in zip(faces, outputs):
+                results[position] = embedding
+
+        return results
+
+    def compare_embeddings(self, emb1, emb2) -> float:
+        """
+        Compare two embeddings using cosine similarity.
+
+        Returns:
+            similarity score in [−1, 1], where 1.0 means identical direction.
+        """
+        return cosine_similarity(emb1, emb2)
@@ -0,0 +1,171 @@
+"""
+Detection Pipeline Module
+
+Chooses where face detection happens before embedding:
+- "embedder" (default): the embedding backend detects and aligns the face
+  itself (the DeepFace backend's detector, e.g. RetinaFace or YuNet; the
+  ONNX backends use OpenCV's Haar cascades, like DeepFace's "opencv")
+- "yolo": the YOLO detector (detector.py) finds the face in batched calls,
+  and its crop goes straight to the embedding model with the embedder's
+  detector set to "skip", so every frame is searched for a face once
+
+Select per deployment with FACE_DETECTION_PIPELINE. Both modes run the
+quality pre-filter first; in "yolo" mode it reuses the YOLO box instead
+of looking for the face again. benchmark_detection_pipeline.py compares
+the two modes for latency and match agreement on your own photos.
+"""
+
+import os
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from .quality import check_image_quality
+
+# Pipeline configuration (override via environment)
+DETECTION_PIPELINE = os.environ.get("FACE_DETECTION_PIPELINE", "embedder")
+PIPELINES = ("embedder", "yolo")
+
+
+class FacePipeline:
+    """
+    Detection + embedding for decoded images, in the configured mode.
+    """
+
+    def __init__(self, embedder, mode: str = DETECTION_PIPELINE, detector=None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            embedder: Embedder from the backend registry (see backends.py)
+            mode: "embedder" or "yolo"
+            detector: FaceDetector for "yolo" mode (default: the global one)
+        """
+        if mode not in PIPELINES:
+            raise ValueError(
+                f"Unknown detection pipeline '{mode}' (FACE_DETECTION_PIPELINE); "
+                f"choose one of: {', '.join(PIPELINES)}"
+            )
+        self.embedder = embedder
+        self.mode = mode
+        self._detector = detector
+
+    @property
+    def detector(self):
+        if self._detector is None:
+            from .detector import get_detector
+            self._detector = get_detector()
+        return self._detector
+
+    def embed_image(self, image: np.ndarray, check_quality: bool = True) -> np.ndarray:
+        """
+        Quality-check and embed one decoded BGR image.
+
+        Args:
+            image: Decoded BGR image
+            check_quality: False for frames the caller has already gated
+                           (streaming), skipping a second face detection
+
+        Raises:
+            ValueError: No face, multiple faces, or an unusable frame
+        """
+        if self.mode == "embedder":
+            if check_quality:
+                check_image_quality(image)
+            return self.embedder.generate_embedding_from_image(image)
+
+        outcome = self._embed_yolo([image], check_quality)[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    def embed_images(
+        self,
+        images: List[np.ndarray],
+        check_quality: Union[bool, Sequence[bool]] = True,
+    ) -> List[Union[np.ndarray, Exception]]:
+        """
+        Quality-check and embed several decoded BGR images.
+
+        Args:
+            images: Decoded BGR images
+            check_quality: Whether to run the quality gate, for all images
+                           or per image (registration photos skip it)
+
+        Returns:
+            One entry per image: the embedding, or the ValueError
+            describing why that image was rejected
+        """
+        if self.mode == "yolo":
+            return self._embed_yolo(images, check_quality)
+
+        gated = _quality_flags(check_quality, len(images))
+        results: List[Union[np.ndarray, Exception]] = [None] * len(images)
+        checked = []
+        for position, image in enumerate(images):
+            try:
+                if gated[position]:
+                    check_image_quality(image)
+                checked.append((position, image))
+            except ValueError as e:
+                results[position] = e
+
+        if checked:
+            outcomes = self.embedder.generate_embeddings_batch([image for _, image in checked])
+            for (position, _), outcome in zip(checked, outcomes):
+                results[position] = outcome
+        return results
+
+    def _embed_yolo(
+        self,
+        images: List[np.ndarray],
+        check_quality: Union[bool, Sequence[bool]] = True,
+    ) -> List[Union[np.ndarray, Exception]]:
+        """Detect every image in batched YOLO calls, then embed the crops in one pass."""
+        gated = _quality_flags(check_quality, len(images))
+        results: List[Union[np.ndarray, Exception]] = [None] * len(images)
+        crops = []
+
+        for position, (image, (success, detected, error)) in enumerate(
+            zip(images, self.detector.detect_faces_batch(images))
+        ):
+            if not success:
+                results[position] = ValueError(error or "No face detected in the image")
+                continue
+            x1, y1, x2, y2 = detected.bbox
+            try:
+                if gated[position]:
+                    check_image_quality(image, (x1, y1, x2 - x1, y2 - y1))
+            except ValueError as e:
+                results[position] = e
+                continue
+            crops.append((position, detected.face))
+
+        if crops:
+            outcomes = self.embedder.generate_embeddings_batch(
+                [face for _, face in crops], detector_backend="skip"
+            )
+            for (position, _), outcome in zip(crops, outcomes):
+                results[position] = outcome
+        return results
+
+
+def _quality_flags(check_quality: Union[bool, Sequence[bool]], count: int) -> List[bool]:
+    """Expand a single check_quality flag to one per image."""
+    if isinstance(check_quality, bool):
+        return [check_quality] * count
+    return list(check_quality)
+
+
+def create_pipeline(embedder, mode: Optional[str] = None) -> FacePipeline:
+    """
+    Create a pipeline around an embedder.
+
+    Args:
+        embedder: Embedder from the backend registry
+        mode: Pipeline mode (default: FACE_DETECTION_PIPELINE)
+
+    Returns:
+        FacePipeline instance
+    """
+    return FacePipeline(embedder, mode or DETECTION_PIPELINE)
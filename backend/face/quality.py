@@ -0,0 +1,349 @@
+"""
+Face Quality Pre-filter Module
+
+Cheap checks that run on the decoded frame before the recognition model,
+so hopeless webcam frames are rejected in a few milliseconds with a
+specific reason instead of going through a full embedding pass:
+- Blur: variance of the Laplacian over the (resized) face region
+- Exposure: mean brightness and contrast (standard deviation) of the face
+- Size: face box must be at least FACE_QUALITY_MIN_FACE_PX on its short side
+- Framing: a face box touching the frame edge is cut off
+- Pose: box aspect ratio, plus eye-line roll and left/right eye asymmetry
+  (yaw) when both eyes are found inside the box
+
+The face box comes from the caller's detector when one is available,
+otherwise from a Haar cascade run on a downscaled grayscale copy. When no
+single box is found the face-dependent checks are skipped and the model's
+own detector has the final say.
+
+Set FACE_QUALITY_CHECKS=0 to disable the pre-filter.
+
+The thresholds are tuned for live webcam frames. Registration photos
+(scanned ID photos, portraits taken by an operator) are often small,
+tightly cropped or unevenly lit, and rejecting one blocks enrollment
+outright rather than costing a retry, so the registration paths
+(/face/register*, register_faces.py) skip the pre-filter unless
+FACE_QUALITY_CHECKS_REGISTRATION=1.
+"""
+
+import os
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Quality thresholds (override via environment)
+QUALITY_CHECKS_ENABLED = os.environ.get("FACE_QUALITY_CHECKS", "1") != "0"
+QUALITY_CHECKS_ON_REGISTRATION = os.environ.get("FACE_QUALITY_CHECKS_REGISTRATION", "0") != "0"
+MIN_SHARPNESS = float(os.environ.get("FACE_QUALITY_MIN_SHARPNESS", "40"))
+MIN_BRIGHTNESS = float(os.environ.get("FACE_QUALITY_MIN_BRIGHTNESS", "40"))
+MAX_BRIGHTNESS = float(os.environ.get("FACE_QUALITY_MAX_BRIGHTNESS", "220"))
+MIN_CONTRAST = float(os.environ.get("FACE_QUALITY_MIN_CONTRAST", "15"))
+MIN_FACE_PX = int(os.environ.get("FACE_QUALITY_MIN_FACE_PX", "64"))
+MAX_ROLL_DEGREES = float(os.environ.get("FACE_QUALITY_MAX_ROLL", "30"))
+MAX_YAW_ASYMMETRY = float(os.environ.get("FACE_QUALITY_MAX_YAW", "0.35"))
+MIN_FACE_ASPECT = 0.55  # width / height; profile faces give narrow boxes
+MAX_FACE_ASPECT = 1.6
+
+# Sharpness is measured at a fixed scale so the threshold does not depend
+# on how close the voter stands to the camera
+_SHARPNESS_SIDE = 224
+# Frames are searched for a face at this size (Haar cost grows with area)
+_DETECT_SIDE = 320
+# When tracking, the region around the previous box is scaled so the face
+# is about this many pixels wide
+_TRACK_FACE_PX = 96
+# Smallest window the OpenCV Haar face cascade can detect
+_HAAR_MIN_PX = 24
+# A box within this fraction of the frame edge counts as cut off
+_EDGE_MARGIN = 0.01
+
+
+class FaceQualityError(ValueError):
+    """
+    Raised when a frame is not worth running the recognition model on.
+
+    Attributes:
+        reason: Machine-readable reason ("blurry", "too_dark", "too_bright",
+                "low_contrast", "face_too_small", "face_cropped", "pose",
+                or "no_face" when a face tracker lost the face)
+    """
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+    def __reduce__(self):
+        # Keep the reason when the error crosses the worker process boundary
+        return self.__class__, (self.reason, str(self))
+
+
+class QualityReport(NamedTuple):
+    """Measurements taken by FaceQualityChecker.assess()."""
+    sharpness: float
+    brightness: float
+    contrast: float
+    face_box: Optional[Tuple[int, int, int, int]]  # (x, y, w, h) in image pixels
+    roll: Optional[float]  # degrees, None when the eyes were not found
+    yaw_asymmetry: Optional[float]  # 0 = frontal, None when the eyes were not found
+
+
+def _load_cascade(filename: str):
+    """Load an OpenCV Haar cascade, or None when this OpenCV build has none."""
+    if not hasattr(cv2, "CascadeClassifier") or not hasattr(cv2, "data"):
+        return None
+    cascade = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, filename))
+    return None if cascade.empty() else cascade
+
+
+class FaceQualityChecker:
+    """
+    Scores a decoded frame and rejects it before inference when unusable.
+    """
+
+    def __init__(
+        self,
+        min_sharpness: float = MIN_SHARPNESS,
+        min_brightness: float = MIN_BRIGHTNESS,
+        max_brightness: float = MAX_BRIGHTNESS,
+        min_contrast: float = MIN_CONTRAST,
+        min_face_px: int = MIN_FACE_PX,
+        max_roll: float = MAX_ROLL_DEGREES,
+        max_yaw_asymmetry: float = MAX_YAW_ASYMMETRY,
+    ):
+        """
+        Initialize the checker (Haar cascades load on first use).
+
+        Args:
+            min_sharpness: Minimum Laplacian variance of the face region
+            min_brightness: Minimum mean gray level of the face region
+            max_brightness: Maximum mean gray level of the face region
+            min_contrast: Minimum gray-level standard deviation of the face region
+            min_face_px: Minimum face box side in pixels
+            max_roll: Maximum head tilt in degrees
+            max_yaw_asymmetry: Maximum left/right eye offset from the box center
+        """
+        self.min_sharpness = min_sharpness
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.min_contrast = min_contrast
+        self.min_face_px = min_face_px
+        self.max_roll = max_roll
+        self.max_yaw_asymmetry = max_yaw_asymmetry
+        self._face_cascade = None
+        self._eye_cascade = None
+        self._cascades_loaded = False
+
+    def _ensure_cascades(self):
+        if not self._cascades_loaded:
+            self._face_cascade = _load_cascade("haarcascade_frontalface_default.xml")
+            self._eye_cascade = _load_cascade("haarcascade_eye.xml")
+            self._cascades_loaded = True
+
+    @property
+    def can_detect(self) -> bool:
+        """True if this OpenCV build ships the Haar face cascade."""
+        self._ensure_cascades()
+        return self._face_cascade is not None
+
+    def find_face(
+        self,
+        gray: np.ndarray,
+        near: Optional[Sequence[int]] = None,
+        margin: float = 0.5,
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Return the single face box (x, y, w, h) in a grayscale frame, or None.
+
+        Args:
+            gray: Grayscale frame
+            near: Face box from the previous frame; only the area around it
+                  is searched, at scales close to its size (see tracking.py)
+            margin: Size of that area around the box, as a fraction of the box
+        """
+        self._ensure_cascades()
+        if self._face_cascade is None:
+            return None
+        if near is not None:
+            return self._find_face_near(gray, near, margin)
+
+        scale = min(1.0, _DETECT_SIDE / max(gray.shape[:2]))
+        small = gray if scale == 1.0 else cv2.resize(
+            gray, (max(1, round(gray.shape[1] * scale)), max(1, round(gray.shape[0] * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        faces = self._face_cascade.detectMultiScale(small, 1.1, 5)
+        if len(faces) != 1:
+            # None or several: leave the verdict to the model's detector
+            return None
+        return tuple(int(round(v / scale)) for v in faces[0])
+
+    def _find_face_near(
+        self, gray: np.ndarray, near: Sequence[int], margin: float
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """Search only around the previous box, for a face of about the same size."""
+        x, y, w, h = (int(v) for v in near)
+        height, width = gray.shape[:2]
+        left, top = max(0, x - int(w * margin)), max(0, y - int(h * margin))
+        right, bottom = min(width, x + w + int(w * margin)), min(height, y + h + int(h * margin))
+        region = gray[top:bottom, left:right]
+        if region.size == 0:
+            return None
+
+        scale = min(1.0, _TRACK_FACE_PX / max(w, h))
+        small = region if scale == 1.0 else cv2.resize(
+            region, (max(1, round(region.shape[1] * scale)), max(1, round(region.shape[0] * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        side = max(w, h) * scale
+        min_side = max(_HAAR_MIN_PX, int(side * 0.7))
+        max_side = max(min_side + 1, int(side * 1.4))
+        faces = self._face_cascade.detectMultiScale(
+            small, 1.1, 5, minSize=(min_side, min_side), maxSize=(max_side, max_side)
+        )
+        if len(faces) == 0:
+            return None
+
+        # Keep the candidate closest to where the face was
+        center_x, center_y = (x - left + w / 2.0) * scale, (y - top + h / 2.0) * scale
+        fx, fy, fw, fh = min(
+            faces, key=lambda f: (f[0] + f[2] / 2.0 - center_x) ** 2 + (f[1] + f[3] / 2.0 - center_y) ** 2
+        )
+        return (
+            left + int(round(fx / scale)),
+            top + int(round(fy / scale)),
+            int(round(fw / scale)),
+            int(round(fh / scale)),
+        )
+
+    def _eye_pose(self, face_gray: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
+        """Estimate (roll degrees, yaw asymmetry) from the eyes in a face crop."""
+        if self._eye_cascade is None:
+            return None, None
+
+        height, width = face_gray.shape[:2]
+        upper = face_gray[:max(1, height // 2 + height // 10)]
+        eyes = self._eye_cascade.detectMultiScale(upper, 1.1, 5)
+        if len(eyes) < 2:
+            return None, None
+
+        eyes = sorted(eyes, key=lambda e: e[2] * e[3], reverse=True)[:2]
+        (ax, ay, aw, ah), (bx, by, bw, bh) = sorted(eyes, key=lambda e: e[0])
+        left = (ax + aw / 2.0, ay + ah / 2.0)
+        right = (bx + bw / 2.0, by + bh / 2.0)
+        roll = float(np.degrees(np.arctan2(right[1] - left[1], right[0] - left[0])))
+        # Turning the head moves both eyes towards one side of the box
+        yaw = abs((left[0] + right[0]) / 2.0 - width / 2.0) / width * 2.0
+        return roll, yaw
+
+    def assess(self, image: np.ndarray, face_box: Optional[Sequence[int]] = None) -> QualityReport:
+        """
+        Measure a frame without rejecting it.
+
+        Args:
+            image: Decoded BGR image
+            face_box: (x, y, w, h) from the caller's detector, if it has one
+
+        Returns:
+            QualityReport
+        """
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        box = tuple(int(v) for v in face_box) if face_box is not None else self.find_face(gray)
+
+        roll = yaw = None
+        if box is not None:
+            x, y, w, h = box
+            region = gray[max(0, y):max(0, y) + h, max(0, x):max(0, x) + w]
+            if region.size == 0:
+                region = gray
+            elif face_box is None:
+                roll, yaw = self._eye_pose(region)
+        else:
+            region = gray
+
+        # Exposure and contrast from the face itself (or the whole frame)
+        brightness = float(region.mean())
+        contrast = float(region.std())
+
+        scale = _SHARPNESS_SIDE / max(region.shape[:2])
+        resized = cv2.resize(
+            region, (max(1, round(region.shape[1] * scale)), max(1, round(region.shape[0] * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+        sharpness = float(cv2.Laplacian(resized, cv2.CV_64F).var())
+
+        return QualityReport(sharpness, brightness, contrast, box, roll, yaw)
+
+    def check(self, image: np.ndarray, face_box: Optional[Sequence[int]] = None) -> QualityReport:
+        """
+        Measure a frame and reject it if it cannot produce a usable embedding.
+
+        Args:
+            image: Decoded BGR image
+            face_box: (x, y, w, h) from the caller's detector, if it has one
+
+        Returns:
+            QualityReport of an accepted frame
+
+        Raises:
+            FaceQualityError: Frame is blurry, badly exposed, too small,
+                              cut off, or the head is turned too far
+        """
+        report = self.assess(image, face_box)
+
+        if report.brightness < self.min_brightness:
+            raise FaceQualityError("too_dark", "Image is too dark. Please face a light source.")
+        if report.brightness > self.max_brightness:
+            raise FaceQualityError("too_bright", "Image is overexposed. Please avoid direct light behind or on the camera.")
+        if report.contrast < self.min_contrast:
+            raise FaceQualityError("low_contrast", "Image has too little contrast to recognize a face.")
+
+        if report.face_box is not None:
+            x, y, w, h = report.face_box
+            height, width = image.shape[:2]
+            if min(w, h) < self.min_face_px:
+                raise FaceQualityError("face_too_small", "Face is too small. Please move closer to the camera.")
+            margin_x, margin_y = width * _EDGE_MARGIN, height * _EDGE_MARGIN
+            if x <= margin_x or y <= margin_y or x + w >= width - margin_x or y + h >= height - margin_y:
+                raise FaceQualityError("face_cropped", "Face is cut off at the edge of the frame. Please center your face.")
+            aspect = w / float(h)
+            if not MIN_FACE_ASPECT <= aspect <= MAX_FACE_ASPECT:
+                raise FaceQualityError("pose", "Face is turned away. Please look straight at the camera.")
+
+        if report.sharpness < self.min_sharpness:
+            raise FaceQualityError("blurry", "Image is too blurry. Please hold still and make sure the camera is in focus.")
+        if report.roll is not None and abs(report.roll) > self.max_roll:
+            raise FaceQualityError("pose", "Head is tilted. Please keep your head level.")
+        if report.yaw_asymmetry is not None and report.yaw_asymmetry > self.max_yaw_asymmetry:
+            raise FaceQualityError("pose", "Face is turned away. Please look straight at the camera.")
+
+        return report
+
+
+# Global checker instance (lazy loading)
+_checker_instance: Optional[FaceQualityChecker] = None
+
+
+def get_quality_checker() -> FaceQualityChecker:
+    """
+    Get or create the global face quality checker.
+
+    Returns:
+        FaceQualityChecker instance
+    """
+    global _checker_instance
+    if _checker_instance is None:
+        _checker_instance = FaceQualityChecker()
+    return _checker_instance
+
+
+def check_image_quality(image: np.ndarray, face_box: Optional[Sequence[int]] = None) -> Optional[QualityReport]:
+    """
+    Run the global checker unless FACE_QUALITY_CHECKS=0.
+
+    Raises:
+        FaceQualityError: Frame rejected
+    """
+    if not QUALITY_CHECKS_ENABLED:
+        return None
+    return get_quality_checker().check(image, face_box)
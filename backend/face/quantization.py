@@ -0,0 +1,124 @@
+"""
+Embedding Quantization Module
+
+Compact representations for face embeddings, used both on disk (BLOB
+payload) and in memory (cache and gallery):
+- float32: full precision (default)
+- float16: half precision, 2x smaller
+- int8: per-vector scaled 8-bit integers, 4x smaller
+
+Cosine similarity is scale-invariant, so int8 vectors are scored directly
+on their integer values; the scale is only needed to recover magnitudes.
+"""
+
+import os
+import numpy as np
+from typing import NamedTuple, Union
+
+# Representation used for stored and resident embeddings
+EMBEDDING_DTYPE = os.environ.get("FACE_EMBEDDING_DTYPE", "float32")
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+
+class QuantizedVector(NamedTuple):
+    """
+    Per-vector scaled int8 embedding: original ≈ values * scale.
+    """
+    values: np.ndarray  # int8
+    scale: float
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + 4
+
+    @property
+    def size(self) -> int:
+        return self.values.size
+
+
+Embedding = Union[np.ndarray, QuantizedVector]
+
+
+def validate_dtype(dtype: str) -> str:
+    """Return dtype if it is a supported representation, else raise ValueError."""
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(
+            f"Unsupported embedding dtype '{dtype}'. Choose one of: {', '.join(SUPPORTED_DTYPES)}"
+        )
+    return dtype
+
+
+def quantize(embedding: Embedding, dtype: str) -> Embedding:
+    """
+    Convert an embedding to the given representation.
+
+    Args:
+        embedding: float array or QuantizedVector
+        dtype: "float32", "float16" or "int8"
+
+    Returns:
+        float32/float16 numpy array, or QuantizedVector for int8
+    """
+    validate_dtype(dtype)
+    vector = to_float32(embedding)
+
+    if dtype == "float32":
+        return vector
+    if dtype == "float16":
+        return vector.astype(np.float16)
+
+    peak = float(np.max(np.abs(vector))) if vector.size else 0.0
+    scale = peak / 127.0 if peak > 0.0 else 1.0
+    values = np.clip(np.rint(vector / scale), -127, 127).astype(np.int8)
+    return QuantizedVector(values, scale)
+
+
+def to_float32(embedding: Embedding) -> np.ndarray:
+    """
+    Dequantize any supported representation to a flat float32 array.
+    """
+    if isinstance(embedding, QuantizedVector):
+        return embedding.values.astype(np.float32) * np.float32(embedding.scale)
+    return np.asarray(embedding, dtype=np.float32).ravel()
+
+
+def scoring_values(embedding: Embedding) -> np.ndarray:
+    """
+    Return the array to use in cosine similarity without dequantizing.
+
+    For int8 this is the integer vector itself (the scale cancels out in
+    cosine similarity); float16/float32 arrays are returned unchanged.
+    """
+    if isinstance(embedding, QuantizedVector):
+        return embedding.values
+    return np.asarray(embedding).ravel()
+
+
+def normalize(embedding: Embedding, dtype: str) -> Embedding:
+    """
+    L2-normalize an embedding and return it in the given representation.
+    """
+    vector = to_float32(embedding)
+    norm = np.linalg.norm(vector)
+    if norm > 0.0:
+        vector = vector / norm
+    return quantize(vector, dtype)
+
+
+def cosine_similarity(a: Embedding, b: Embedding) -> float:
+    """
+    Cosine similarity between two embeddings in any supported representation.
+
+    int8 vectors are scored on their integer values since cosine similarity
+    ignores the per-vector scale.
+    """
+    a = scoring_values(a).astype(np.float32)
+    b = scoring_values(b).astype(np.float32)
+
+    a_norm = np.linalg.norm(a)
+    b_norm = np.linalg.norm(b)
+    if a_norm == 0.0 or b_norm == 0.0:
+        raise ValueError("One of the embeddings has zero norm")
+
+    return float(np.dot(a / a_norm, b / b_norm))
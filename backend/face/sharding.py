@@ -0,0 +1,337 @@
+"""
+Sharded Face Embedding Storage Module
+
+Spreads face embeddings over N SQLite files so writes to different
+voters do not contend on one database and no single file grows unbounded.
+- voter_ids are routed by a stable CRC32 hash of the full voter_id, or of
+  its EPIC prefix (first letters, which identify the issuing series)
+- Same public methods as FaceStorage; single-voter calls touch one shard
+- Listing, counting and bulk operations fan out to shards in parallel
+- A shards.json manifest pins the layout so a directory is never opened
+  with a different shard count
+"""
+
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .cache import EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_MAX_BYTES
+from .quantization import EMBEDDING_DTYPE
+from .storage import FaceStorage
+
+MANIFEST_NAME = "shards.json"
+SHARD_STRATEGIES = ("hash", "prefix")
+
+
+def shard_key(voter_id: str, shard_by: str = "hash", prefix_length: int = 3) -> str:
+    """Return the part of a voter_id used for routing."""
+    voter_id = (voter_id or "").strip().upper()
+    if shard_by == "prefix":
+        return voter_id[:prefix_length]
+    return voter_id
+
+
+def shard_index(voter_id: str, num_shards: int, shard_by: str = "hash", prefix_length: int = 3) -> int:
+    """
+    Map a voter_id to a shard number.
+
+    CRC32 is used rather than hash() because it is stable across processes
+    and Python versions.
+    """
+    key = shard_key(voter_id, shard_by, prefix_length)
+    return zlib.crc32(key.encode("utf-8")) % num_shards
+
+
+class ShardedFaceStorage:
+    """
+    FaceStorage facade over several SQLite shard files.
+    """
+
+    def __init__(
+        self,
+        db_dir: str = "face_embeddings_shards",
+        num_shards: int = 4,
+        shard_by: str = "hash",
+        prefix_length: int = 3,
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+        cache_max_bytes: int = EMBEDDING_CACHE_MAX_BYTES,
+        embedding_dtype: str = EMBEDDING_DTYPE,
+        model_name: Optional[str] = None
+    ):
+        """
+        Open (or create) a sharded database directory.
+
+        Args:
+            db_dir: Directory holding the shard files and manifest
+            num_shards: Number of shard files
+            shard_by: "hash" (full voter_id) or "prefix" (EPIC prefix)
+            prefix_length: Number of leading characters used by "prefix" routing
+            cache_size: Total get_embedding() cache entries, split across shards
+            cache_max_bytes: Total get_embedding() cache memory, split across shards
+            embedding_dtype: Representation for new and cached embeddings
+            model_name: Model recorded with new embeddings (default: configured backend)
+        """
+        if num_shards < 1:
+            raise ValueError("num_shards must be at least 1")
+        if shard_by not in SHARD_STRATEGIES:
+            raise ValueError(f"shard_by must be one of: {', '.join(SHARD_STRATEGIES)}")
+
+        self.db_path = db_dir
+        self.num_shards = num_shards
+        self.shard_by = shard_by
+        self.prefix_length = prefix_length
+        self.embedding_dtype = embedding_dtype
+
+        os.makedirs(db_dir, exist_ok=True)
+        self._check_manifest()
+
+        self.shards = [
+            FaceStorage(
+                db_path=self.shard_path(db_dir, i),
+                cache_size=cache_size // num_shards,
+                cache_max_bytes=cache_max_bytes // num_shards,
+                embedding_dtype=embedding_dtype,
+                model_name=model_name
+            )
+            for i in range(num_shards)
+        ]
+        self.model_name = self.shards[0].model_name
+        self._executor = ThreadPoolExecutor(max_workers=num_shards, thread_name_prefix="face-shard")
+
+    @staticmethod
+    def shard_path(db_dir: str, index: int) -> str:
+        """Path of one shard file."""
+        return os.path.join(db_dir, f"shard_{index:03d}.db")
+
+    def _check_manifest(self):
+        """Create the manifest, or verify it matches this configuration."""
+        path = os.path.join(self.db_path, MANIFEST_NAME)
+        layout = {
+            'num_shards': self.num_shards,
+            'shard_by': self.shard_by,
+            'prefix_length': self.prefix_length,
+        }
+
+        if os.path.exists(path):
+            with open(path) as f:
+                existing = json.load(f)
+            if existing != layout:
+                raise ValueError(
+                    f"Shard layout mismatch in '{self.db_path}': found {existing}, requested {layout}. "
+                    "Use reshard_database.py to change the layout."
+                )
+            return
+
+        with open(path, 'w') as f:
+            json.dump(layout, f, indent=2)
+
+    @classmethod
+    def open(cls, db_dir: str, **kwargs) -> "ShardedFaceStorage":
+        """
+        Open an existing sharded directory using the layout in its manifest.
+
+        Args:
+            db_dir: Directory holding the shard files and manifest
+            **kwargs: Extra FaceStorage options (cache, dtype)
+        """
+        with open(os.path.join(db_dir, MANIFEST_NAME)) as f:
+            layout = json.load(f)
+        return cls(db_dir=db_dir, **layout, **kwargs)
+
+    def _shard_for(self, voter_id: str) -> FaceStorage:
+        return self.shards[shard_index(voter_id, self.num_shards, self.shard_by, self.prefix_length)]
+
+    def _group(self, voter_ids: List[str]) -> Dict[int, List[int]]:
+        """Group input positions by shard number."""
+        groups: Dict[int, List[int]] = {}
+        for position, voter_id in enumerate(voter_ids):
+            index = shard_index(voter_id, self.num_shards, self.shard_by, self.prefix_length)
+            groups.setdefault(index, []).append(position)
+        return groups
+
+    def _fan_out(self, func) -> list:
+        """Run func(shard) on every shard in parallel and return results in shard order."""
+        return list(self._executor.map(func, self.shards))
+
+    # Observers are attached to every shard so they see all changes
+
+    def add_observer(self, observer):
+        for shard in self.shards:
+            shard.add_observer(observer)
+
+    def remove_observer(self, observer):
+        for shard in self.shards:
+            shard.remove_observer(observer)
+
+    # Single-voter operations: routed to exactly one shard
+
+    def store_embedding(
+        self,
+        voter_id: str,
+        full_name: str,
+        embedding,
+        model_name: Optional[str] = None
+    ) -> Tuple[bool, Optional[str]]:
+        return self._shard_for(voter_id).store_embedding(voter_id, full_name, embedding, model_name=model_name)
+
+    def get_embedding(self, voter_id: str) -> Optional[Dict]:
+        return self._shard_for(voter_id).get_embedding(voter_id)
+
+    def voter_exists(self, voter_id: str) -> bool:
+        return self._shard_for(voter_id).voter_exists(voter_id)
+
+    def update_embedding(
+        self,
+        voter_id: str,
+        full_name: Optional[str] = None,
+        embedding: Optional[np.ndarray] = None,
+        model_name: Optional[str] = None
+    ) -> Tuple[bool, Optional[str]]:
+        return self._shard_for(voter_id).update_embedding(
+            voter_id, full_name=full_name, embedding=embedding, model_name=model_name
+        )
+
+    def delete_embedding(self, voter_id: str) -> Tuple[bool, Optional[str]]:
+        return self._shard_for(voter_id).delete_embedding(voter_id)
+
+    # Bulk operations: split by shard, executed in parallel
+
+    def store_embeddings_many(
+        self,
+        records: List[Tuple],
+        model_name: Optional[str] = None
+    ) -> List[Tuple[str, bool, Optional[str]]]:
+        results: List[Tuple[str, bool, Optional[str]]] = [None] * len(records)
+        groups = self._group([record[0] for record in records])
+
+        def run(item):
+            index, positions = item
+            return positions, self.shards[index].store_embeddings_many(
+                [records[p] for p in positions], model_name=model_name
+            )
+
+        for positions, outcomes in self._executor.map(run, groups.items()):
+            for position, outcome in zip(positions, outcomes):
+                results[position] = outcome
+        return results
+
+    def get_embeddings_many(self, voter_ids: List[str]) -> Dict[str, Dict]:
+        groups = self._group(voter_ids)
+
+        def run(item):
+            index, positions = item
+            return self.shards[index].get_embeddings_many([voter_ids[p] for p in positions])
+
+        records = {}
+        for found in self._executor.map(run, groups.items()):
+            records.update(found)
+        return records
+
+    def delete_embeddings_many(self, voter_ids: List[str]) -> List[Tuple[str, bool, Optional[str]]]:
+        results: List[Tuple[str, bool, Optional[str]]] = [None] * len(voter_ids)
+        groups = self._group(voter_ids)
+
+        def run(item):
+            index, positions = item
+            return positions, self.shards[index].delete_embeddings_many([voter_ids[p] for p in positions])
+
+        for positions, outcomes in self._executor.map(run, groups.items()):
+            for position, outcome in zip(positions, outcomes):
+                results[position] = outcome
+        return results
+
+    def import_rows(self, rows: List[Tuple[str, str, bytes, str, Optional[str]]]) -> int:
+        groups = self._group([row[0] for row in rows])
+
+        def run(item):
+            index, positions = item
+            return self.shards[index].import_rows([rows[p] for p in positions])
+
+        return sum(self._executor.map(run, groups.items()))
+
+    def import_secondary_rows(self, rows: List[Tuple[str, str, bytes, str]]) -> int:
+        groups = self._group([row[0] for row in rows])
+
+        def run(item):
+            index, positions = item
+            return self.shards[index].import_secondary_rows([rows[p] for p in positions])
+
+        return sum(self._executor.map(run, groups.items()))
+
+    def delete_all(self, vacuum: bool = False) -> int:
+        return sum(self._fan_out(lambda shard: shard.delete_all(vacuum=vacuum)))
+
+    # Secondary (per-model) embeddings follow their voter's shard
+
+    def store_secondary_embedding(self, voter_id: str, model_name: str, embedding) -> Tuple[bool, Optional[str]]:
+        return self._shard_for(voter_id).store_secondary_embedding(voter_id, model_name, embedding)
+
+    def store_secondary_embeddings_many(
+        self,
+        model_name: str,
+        records: List[Tuple[str, np.ndarray]]
+    ) -> List[Tuple[str, bool, Optional[str]]]:
+        results: List[Tuple[str, bool, Optional[str]]] = [None] * len(records)
+        groups = self._group([record[0] for record in records])
+
+        def run(item):
+            index, positions = item
+            return positions, self.shards[index].store_secondary_embeddings_many(
+                model_name, [records[p] for p in positions]
+            )
+
+        for positions, outcomes in self._executor.map(run, groups.items()):
+            for position, outcome in zip(positions, outcomes):
+                results[position] = outcome
+        return results
+
+    def get_secondary_embedding(self, voter_id: str, model_name: str):
+        return self._shard_for(voter_id).get_secondary_embedding(voter_id, model_name)
+
+    def voters_missing_secondary(self, model_name: str) -> List[str]:
+        missing = self._fan_out(lambda shard: shard.voters_missing_secondary(model_name))
+        return sorted(voter_id for shard_missing in missing for voter_id in shard_missing)
+
+    # Whole-gallery reads: fanned out in parallel
+
+    def list_all_voters(self) -> List[Dict]:
+        voters = [voter for shard_voters in self._fan_out(FaceStorage.list_all_voters) for voter in shard_voters]
+        voters.sort(key=lambda voter: voter['timestamp'], reverse=True)
+        return voters
+
+    def get_count(self) -> int:
+        return sum(self._fan_out(FaceStorage.get_count))
+
+    def iter_embeddings(self, batch_size: int = 1000, model_name: Optional[str] = None):
+        for shard in self.shards:
+            yield from shard.iter_embeddings(batch_size=batch_size, model_name=model_name)
+
+    def export_rows(self, batch_size: int = 1000):
+        for shard in self.shards:
+            yield from shard.export_rows(batch_size=batch_size)
+
+    def export_secondary_rows(self, batch_size: int = 1000):
+        for shard in self.shards:
+            yield from shard.export_secondary_rows(batch_size=batch_size)
+
+    def count_legacy_rows(self) -> int:
+        return sum(self._fan_out(FaceStorage.count_legacy_rows))
+
+    def iter_embedding_rows(self, batch_size: int = 1000):
+        # Ordered by voter_id within each shard, not across shards
+        for shard in self.shards:
+            yield from shard.iter_embedding_rows(batch_size=batch_size)
+
+    def migrate_embeddings_to_blob(self, batch_size: int = 500) -> Tuple[int, int]:
+        outcomes = self._fan_out(lambda shard: shard.migrate_embeddings_to_blob(batch_size=batch_size))
+        return sum(migrated for migrated, _ in outcomes), sum(failed for _, failed in outcomes)
+
+    def close(self):
+        """Close all shard connections and the fan-out pool."""
+        for shard in self.shards:
+            shard.close()
+        self._executor.shutdown(wait=True)
@@ -2,19 +2,154 @@
 Face Embedding Storage Module
 
 Stores face embeddings in SQLite database.
-- Stores voter_id, full_name, embedding, timestamp
+- Stores voter_id, full_name, embedding, timestamp and the model_name
+  of the backend that produced the embedding
 - Enforces one voter_id → one embedding (unique constraint)
+- Optionally keeps secondary embeddings per voter from other models
+  (e.g. the fast first stage of cascade verification)
 - Rejects duplicate registrations
-- Serializes embeddings as JSON
+- Serializes embeddings as little-endian BLOBs in float32, float16 or
+  per-vector scaled int8 (legacy JSON rows are still readable and can be
+  migrated in place)
 """
 
 import sqlite3
 import json
+import struct
+import threading
 import numpy as np
-from typing import Optional, Dict, List, Tuple
+from typing import Optional, Dict, List, NamedTuple, Tuple
 from datetime import datetime
 import os
 
+from .backends import get_backend
+from .cache import EmbeddingCache, EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_MAX_BYTES
+from .quantization import (
+    EMBEDDING_DTYPE,
+    QuantizedVector,
+    normalize,
+    quantize,
+    to_float32,
+    validate_dtype,
+)
+
+
+# Binary embedding format:
+#   magic (2 bytes) | version (1 byte) | dtype code (1 byte) | dim (uint32)
+# followed by `dim` little-endian values of the given dtype. int8 payloads
+# are prefixed with their float32 scale.
+EMBEDDING_MAGIC = b"FE"
+EMBEDDING_FORMAT_VERSION = 1
+EMBEDDING_HEADER = struct.Struct("<2sBBI")
+EMBEDDING_SCALE = struct.Struct("<f")
+EMBEDDING_DTYPES = {
+    1: np.dtype("<f4"),
+    2: np.dtype("<f2"),
+    3: np.dtype("i1"),
+}
+_DTYPE_CODES = {
+    "float32": 1,
+    "float16": 2,
+    "int8": 3,
+}
+
+
+class StoredEmbedding(NamedTuple):
+    """One face_embeddings row as stored, for maintenance tools."""
+    voter_id: str
+    format: str  # "blob" or "json" (legacy TEXT row)
+    length: int  # stored size: bytes for BLOBs, characters for JSON
+    embedding: Optional[np.ndarray]  # float32, None if the row cannot be decoded
+    error: Optional[str]
+
+
+class ConnectionManager:
+    """
+    Hands out one SQLite connection per thread.
+    
+    Every connection runs in WAL mode with synchronous=NORMAL, so readers
+    never block behind a writer and commits avoid a full fsync. Each
+    connection keeps its own prepared-statement cache; the storage layer
+    only issues a small, fixed set of SQL strings so they are compiled once
+    per thread and reused.
+    
+    In-memory databases (":memory:") are private to a connection, so they
+    fall back to a single connection shared by all threads.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        busy_timeout_ms: int = 5000,
+        cache_size_kib: int = 16384,
+        cached_statements: int = 256,
+    ):
+        """
+        Initialize the connection manager.
+        
+        Args:
+            db_path: Path to SQLite database file
+            busy_timeout_ms: How long a writer waits for the write lock
+            cache_size_kib: Page cache size per connection, in KiB
+            cached_statements: Prepared statements kept per connection
+        """
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kib = cache_size_kib
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[sqlite3.Connection] = []
+        self._shared = db_path == ":memory:"
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open and configure a new connection."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+        )
+        conn.row_factory = sqlite3.Row  # Enable column access by name
+        
+        if not self._shared:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        # Negative cache_size is interpreted as KiB rather than pages
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kib)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    def get(self) -> sqlite3.Connection:
+        """Return the calling thread's connection, opening it on first use."""
+        if self._shared:
+            with self._lock:
+                if not self._connections:
+                    self._connections.append(self._connect())
+                return self._connections[0]
+        
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close_all(self):
+        """Close every connection opened by this manager."""
+        with self._lock:
+            connections = self._connections
+            self._connections = []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Connection owned by another thread that is still running
+                pass
+        self._local = threading.local()
+
 
 class FaceStorage:
     """
@@ -23,27 +158,76 @@ class FaceStorage:
     Schema:
     - voter_id: TEXT PRIMARY KEY (unique, one embedding per voter)
     - full_name: TEXT (voter's full name)
-    - embedding: TEXT (JSON-serialized embedding vector)
+    - embedding: BLOB (header + raw little-endian float32 vector;
+      rows written by older versions may still hold a JSON TEXT list)
     - timestamp: TEXT (ISO format timestamp)
+    - model_name: TEXT (recognition model that produced the embedding;
+      NULL for rows written before it was recorded)
+    
+    secondary_embeddings holds at most one extra embedding per
+    (voter_id, model_name). Those rows follow the primary one: they are
+    removed when the voter is deleted or re-registered with a new
+    embedding; export_secondary_rows()/import_secondary_rows() copy them.
+    """
+    
+    _INSERT_SQL = """
+        INSERT INTO face_embeddings (voter_id, full_name, embedding, timestamp, model_name)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(voter_id) DO NOTHING
+    """
+    
+    _DELETE_SQL = """
+        DELETE FROM face_embeddings
+        WHERE voter_id = ?
+    """
+    
+    # Only registered voters may have secondary embeddings
+    _INSERT_SECONDARY_SQL = """
+        INSERT INTO secondary_embeddings (voter_id, model_name, embedding, timestamp)
+        SELECT voter_id, ?, ?, ? FROM face_embeddings WHERE voter_id = ?
+        ON CONFLICT(voter_id, model_name) DO UPDATE
+        SET embedding = excluded.embedding, timestamp = excluded.timestamp
+    """
+    
+    _DELETE_SECONDARY_SQL = """
+        DELETE FROM secondary_embeddings
+        WHERE voter_id = ?
     """
     
-    def __init__(self, db_path: str = "face_embeddings.db"):
+    # Stay below SQLite's default host-parameter limit for IN (...) queries
+    _MAX_VARIABLES = 900
+    
+    def __init__(
+        self,
+        db_path: str = "face_embeddings.db",
+        cache_size: int = EMBEDDING_CACHE_SIZE,
+        cache_max_bytes: int = EMBEDDING_CACHE_MAX_BYTES,
+        embedding_dtype: str = EMBEDDING_DTYPE,
+        model_name: Optional[str] = None
+    ):
         """
         Initialize the face storage with SQLite database.
         
         Args:
             db_path: Path to SQLite database file
+            cache_size: Maximum voters kept in the get_embedding() LRU cache (0 disables it)
+            cache_max_bytes: Memory bound for the get_embedding() LRU cache
+            embedding_dtype: Representation for newly written and cached
+                embeddings: "float32", "float16" or "int8"
+            model_name: Model recorded with new embeddings (default: the
+                configured embedder backend's model)
         """
         self.db_path = db_path
-        self.conn = None
+        self.embedding_dtype = validate_dtype(embedding_dtype)
+        self.model_name = model_name or get_backend().model_name
+        self.connections = ConnectionManager(db_path)
+        self.cache = EmbeddingCache(max_entries=cache_size, max_bytes=cache_max_bytes)
+        self._observers = []
         self._initialize_database()
     
     def _get_connection(self) -> sqlite3.Connection:
-        """Get or create database connection."""
-        if self.conn is None:
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.conn.row_factory = sqlite3.Row  # Enable column access by name
-        return self.conn
+        """Get the calling thread's database connection."""
+        return self.connections.get()
     
     def _initialize_database(self):
         """Create database table if it doesn't exist."""
@@ -55,55 +239,166 @@ class FaceStorage:
             CREATE TABLE IF NOT EXISTS face_embeddings (
                 voter_id TEXT PRIMARY KEY,
                 full_name TEXT NOT NULL,
-                embedding TEXT NOT NULL,
-                timestamp TEXT NOT NULL
+                embedding BLOB NOT NULL,
+                timestamp TEXT NOT NULL,
+                model_name TEXT
             )
         """)
         
+        # Databases created before model_name was recorded
+        cursor.execute("PRAGMA table_info(face_embeddings)")
+        if "model_name" not in {row['name'] for row in cursor.fetchall()}:
+            try:
+                cursor.execute("ALTER TABLE face_embeddings ADD COLUMN model_name TEXT")
+            except sqlite3.OperationalError as e:
+                # Another process added it first
+                if "duplicate column" not in str(e):
+                    raise
+        
         # Create index on voter_id for faster lookups (though PRIMARY KEY already creates one)
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_voter_id ON face_embeddings(voter_id)
         """)
         
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS secondary_embeddings (
+                voter_id TEXT NOT NULL,
+                model_name TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                timestamp TEXT NOT NULL,
+                PRIMARY KEY (voter_id, model_name)
+            )
+        """)
+        
         conn.commit()
     
-    def _serialize_embedding(self, embedding: np.ndarray) -> str:
+    def add_observer(self, observer):
         """
-        Serialize numpy embedding array to JSON string.
+        Register an observer that mirrors embedding changes.
+        
+        Observers must provide upsert(voter_id, embedding) and
+        remove(voter_id); they are called after each successful commit.
         
         Args:
-            embedding: numpy array representing face embedding
+            observer: Object implementing upsert() and remove()
+        """
+        if observer not in self._observers:
+            self._observers.append(observer)
+    
+    def remove_observer(self, observer):
+        """Unregister a previously added observer."""
+        if observer in self._observers:
+            self._observers.remove(observer)
+    
+    def _notify_upsert(self, voter_id: str, embedding: np.ndarray, model_name: Optional[str]):
+        """Propagate a stored/updated embedding (and the model that made it) to observers."""
+        for observer in self._observers:
+            try:
+                observer.upsert(voter_id, embedding, model_name=model_name)
+            except Exception as e:
+                print(f"Error notifying observer of update: {str(e)}")
+    
+    def _notify_remove(self, voter_id: str):
+        """Propagate a deleted embedding to observers."""
+        for observer in self._observers:
+            try:
+                observer.remove(voter_id)
+            except Exception as e:
+                print(f"Error notifying observer of deletion: {str(e)}")
+    
+    def _serialize_embedding(self, embedding) -> bytes:
+        """
+        Serialize an embedding to a binary BLOB in the configured dtype.
+        
+        Args:
+            embedding: numpy array (or QuantizedVector) representing face embedding
             
         Returns:
-            JSON string representation of the embedding
+            Header followed by the raw little-endian values (int8 payloads
+            carry their scale first)
         """
-        # Convert numpy array to Python list
-        embedding_list = embedding.tolist()
+        compact = quantize(embedding, self.embedding_dtype)
+        
+        if isinstance(compact, QuantizedVector):
+            header = EMBEDDING_HEADER.pack(
+                EMBEDDING_MAGIC,
+                EMBEDDING_FORMAT_VERSION,
+                _DTYPE_CODES["int8"],
+                compact.values.size,
+            )
+            return header + EMBEDDING_SCALE.pack(compact.scale) + compact.values.tobytes()
         
-        # Serialize to JSON
-        return json.dumps(embedding_list)
+        dtype_code = _DTYPE_CODES[self.embedding_dtype]
+        vector = np.ascontiguousarray(compact, dtype=EMBEDDING_DTYPES[dtype_code])
+        header = EMBEDDING_HEADER.pack(
+            EMBEDDING_MAGIC,
+            EMBEDDING_FORMAT_VERSION,
+            dtype_code,
+            vector.size,
+        )
+        return header + vector.tobytes()
     
-    def _deserialize_embedding(self, embedding_json: str) -> np.ndarray:
+    def _deserialize_embedding(self, data, keep_quantized: bool = False):
         """
-        Deserialize JSON string to numpy embedding array.
+        Deserialize a stored embedding.
+        
+        Accepts both the binary BLOB format and legacy JSON strings so that
+        databases can be migrated while the service keeps running.
         
         Args:
-            embedding_json: JSON string representation of embedding
+            data: BLOB bytes or legacy JSON string representation of embedding
+            keep_quantized: Return the stored representation (float16 array
+                or QuantizedVector) instead of converting to float32
             
         Returns:
-            numpy array representing face embedding
+            numpy array representing face embedding (float32 unless
+            keep_quantized). Arrays decoded from BLOBs are read-only views
+            over the stored bytes.
         """
-        # Deserialize from JSON
-        embedding_list = json.loads(embedding_json)
+        if isinstance(data, str):
+            # Legacy JSON row
+            return np.array(json.loads(data), dtype=np.float32)
+        
+        buffer = memoryview(data)
+        if len(buffer) < EMBEDDING_HEADER.size:
+            raise ValueError("Embedding BLOB is shorter than its header")
         
-        # Convert to numpy array
-        return np.array(embedding_list, dtype=np.float32)
+        magic, version, dtype_code, dim = EMBEDDING_HEADER.unpack_from(buffer)
+        if magic != EMBEDDING_MAGIC or version != EMBEDDING_FORMAT_VERSION:
+            raise ValueError("Unrecognized embedding BLOB header")
+        
+        dtype = EMBEDDING_DTYPES.get(dtype_code)
+        if dtype is None:
+            raise ValueError(f"Unsupported embedding dtype code: {dtype_code}")
+        
+        offset = EMBEDDING_HEADER.size
+        if dtype_code == _DTYPE_CODES["int8"]:
+            offset += EMBEDDING_SCALE.size
+        
+        expected = offset + dim * dtype.itemsize
+        if len(buffer) != expected:
+            raise ValueError(
+                f"Embedding BLOB size mismatch: expected {expected} bytes, got {len(buffer)}"
+            )
+        
+        values = np.frombuffer(buffer, dtype=dtype, count=dim, offset=offset)
+        
+        if dtype_code == _DTYPE_CODES["int8"]:
+            (scale,) = EMBEDDING_SCALE.unpack_from(buffer, EMBEDDING_HEADER.size)
+            compact = QuantizedVector(values, scale)
+        else:
+            compact = values.astype(dtype.newbyteorder("="), copy=False)
+        
+        if keep_quantized:
+            return compact
+        return to_float32(compact)
     
     def store_embedding(
         self, 
         voter_id: str, 
         full_name: str, 
-        embedding: np.ndarray
+        embedding,
+        model_name: Optional[str] = None
     ) -> Tuple[bool, Optional[str]]:
         """
         Store face embedding for a voter.
@@ -115,6 +410,7 @@ class FaceStorage:
             voter_id: Unique voter identifier (EPIC number or similar)
             full_name: Full name of the voter
             embedding: Face embedding vector as numpy array
+            model_name: Model that produced the embedding (default: self.model_name)
             
         Returns:
             Tuple of (success, error_message)
@@ -131,27 +427,30 @@ class FaceStorage:
         if embedding is None or embedding.size == 0:
             return False, "embedding cannot be empty"
         
-        # Check if voter_id already exists (duplicate check)
-        if self.voter_exists(voter_id):
-            return False, f"Duplicate registration: voter_id '{voter_id}' already exists in database"
-        
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
             
-            # Serialize embedding to JSON
-            embedding_json = self._serialize_embedding(embedding)
+            # Serialize embedding to binary BLOB
+            embedding_blob = self._serialize_embedding(embedding)
             
             # Get current timestamp
             timestamp = datetime.utcnow().isoformat()
             
-            # Insert into database
-            cursor.execute("""
-                INSERT INTO face_embeddings (voter_id, full_name, embedding, timestamp)
-                VALUES (?, ?, ?, ?)
-            """, (voter_id.strip(), full_name.strip(), embedding_json, timestamp))
-            
+            # Insert into database; an existing voter_id leaves the row untouched
+            # (duplicate check without a separate SELECT round trip)
+            cursor.execute(
+                self._INSERT_SQL,
+                (voter_id.strip(), full_name.strip(), embedding_blob, timestamp, model_name or self.model_name)
+            )
+            inserted = cursor.rowcount
             conn.commit()
+            
+            if inserted == 0:
+                return False, f"Duplicate registration: voter_id '{voter_id}' already exists in database"
+            
+            self.cache.invalidate(voter_id.strip())
+            self._notify_upsert(voter_id.strip(), embedding, model_name or self.model_name)
             return True, None
             
         except sqlite3.IntegrityError as e:
@@ -164,40 +463,64 @@ class FaceStorage:
         """
         Retrieve face embedding for a voter.
         
+        Served from the in-process LRU cache when possible; repeated lookups
+        of the same voter_id do not touch the database until it is updated
+        or deleted.
+        
         Args:
             voter_id: Unique voter identifier
             
         Returns:
-            Dictionary with keys: voter_id, full_name, embedding (numpy array), timestamp
+            Dictionary with keys: voter_id, full_name, embedding (read-only,
+            L2-normalized numpy array, or QuantizedVector in int8 mode),
+            timestamp, model_name
             Returns None if voter_id not found
         """
         if not voter_id or not voter_id.strip():
             return None
         
+        voter_id = voter_id.strip()
+        cached = self.cache.get(voter_id)
+        if cached is not None:
+            return dict(cached)
+        
         try:
+            token = self.cache.begin_read()
             conn = self._get_connection()
             cursor = conn.cursor()
             
             cursor.execute("""
-                SELECT voter_id, full_name, embedding, timestamp
+                SELECT voter_id, full_name, embedding, timestamp, model_name
                 FROM face_embeddings
                 WHERE voter_id = ?
-            """, (voter_id.strip(),))
+            """, (voter_id,))
             
             row = cursor.fetchone()
             
             if row is None:
                 return None
             
-            # Deserialize embedding
-            embedding = self._deserialize_embedding(row['embedding'])
+            # Deserialize and pre-normalize embedding (in the configured
+            # representation) so cosine similarity reduces to a dot product
+            embedding = normalize(
+                self._deserialize_embedding(row['embedding'], keep_quantized=True),
+                self.embedding_dtype
+            )
+            if isinstance(embedding, QuantizedVector):
+                embedding.values.flags.writeable = False
+            else:
+                embedding.flags.writeable = False
             
-            return {
+            record = {
                 'voter_id': row['voter_id'],
                 'full_name': row['full_name'],
                 'embedding': embedding,
-                'timestamp': row['timestamp']
+                'timestamp': row['timestamp'],
+                'model_name': row['model_name']
             }
+            self.cache.put(voter_id, record, token)
+            
+            return dict(record)
             
         except Exception as e:
             print(f"Error retrieving embedding: {str(e)}")
@@ -237,7 +560,8 @@ class FaceStorage:
         self, 
         voter_id: str, 
         full_name: Optional[str] = None,
-        embedding: Optional[np.ndarray] = None
+        embedding: Optional[np.ndarray] = None,
+        model_name: Optional[str] = None
     ) -> Tuple[bool, Optional[str]]:
         """
         Update existing face embedding for a voter.
@@ -246,6 +570,7 @@ class FaceStorage:
             voter_id: Unique voter identifier
             full_name: New full name (optional, only updates if provided)
             embedding: New embedding vector (optional, only updates if provided)
+            model_name: Model that produced the new embedding (default: self.model_name)
             
         Returns:
             Tuple of (success, error_message)
@@ -253,9 +578,6 @@ class FaceStorage:
         if not voter_id or not voter_id.strip():
             return False, "voter_id cannot be empty"
         
-        if not self.voter_exists(voter_id):
-            return False, f"voter_id '{voter_id}' does not exist. Use store_embedding() for new registrations."
-        
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
@@ -268,9 +590,11 @@ class FaceStorage:
                 params.append(full_name.strip())
             
             if embedding is not None:
-                embedding_json = self._serialize_embedding(embedding)
+                embedding_blob = self._serialize_embedding(embedding)
                 updates.append("embedding = ?")
-                params.append(embedding_json)
+                params.append(embedding_blob)
+                updates.append("model_name = ?")
+                params.append(model_name or self.model_name)
             
             if not updates:
                 return False, "No fields to update"
@@ -290,8 +614,20 @@ class FaceStorage:
             """
             
             cursor.execute(query, params)
+            updated = cursor.rowcount
+            if updated and embedding is not None:
+                # Secondary embeddings describe the old face
+                cursor.execute(self._DELETE_SECONDARY_SQL, (voter_id.strip(),))
             conn.commit()
             
+            if updated == 0:
+                return False, f"voter_id '{voter_id}' does not exist. Use store_embedding() for new registrations."
+            
+            self.cache.invalidate(voter_id.strip())
+            
+            if embedding is not None:
+                self._notify_upsert(voter_id.strip(), embedding, model_name or self.model_name)
+            
             return True, None
             
         except Exception as e:
@@ -310,37 +646,382 @@ class FaceStorage:
         if not voter_id or not voter_id.strip():
             return False, "voter_id cannot be empty"
         
-        if not self.voter_exists(voter_id):
-            return False, f"voter_id '{voter_id}' does not exist"
-        
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
             
-            cursor.execute("""
-                DELETE FROM face_embeddings
-                WHERE voter_id = ?
-            """, (voter_id.strip(),))
-            
+            cursor.execute(self._DELETE_SQL, (voter_id.strip(),))
+            deleted = cursor.rowcount
+            cursor.execute(self._DELETE_SECONDARY_SQL, (voter_id.strip(),))
             conn.commit()
+            
+            if deleted == 0:
+                return False, f"voter_id '{voter_id}' does not exist"
+            
+            self.cache.invalidate(voter_id.strip())
+            self._notify_remove(voter_id.strip())
             return True, None
             
         except Exception as e:
             return False, f"Error deleting embedding: {str(e)}"
     
+    def _existing_voter_ids(self, cursor: sqlite3.Cursor, voter_ids: List[str]) -> set:
+        """Return the subset of voter_ids present in the table (chunked IN queries)."""
+        existing = set()
+        for start in range(0, len(voter_ids), self._MAX_VARIABLES):
+            chunk = voter_ids[start:start + self._MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(
+                f"SELECT voter_id FROM face_embeddings WHERE voter_id IN ({placeholders})",
+                chunk
+            )
+            existing.update(row['voter_id'] for row in cursor.fetchall())
+        return existing
+    
+    def store_embeddings_many(
+        self,
+        records: List[Tuple],
+        model_name: Optional[str] = None
+    ) -> List[Tuple[str, bool, Optional[str]]]:
+        """
+        Store many face embeddings in a single transaction.
+        
+        Same rules as store_embedding(): invalid rows and voter_ids that
+        already exist (in the database or earlier in the batch) are rejected
+        individually; every other row is inserted with one executemany and
+        one commit.
+        
+        Args:
+            records: List of (voter_id, full_name, embedding) or
+                (voter_id, full_name, embedding, model_name) tuples
+            model_name: Model that produced the embeddings, for records that
+                do not name one (default: self.model_name)
+            
+        Returns:
+            List of (voter_id, success, error_message), one per input record
+        """
+        results: List[Tuple[str, bool, Optional[str]]] = [None] * len(records)
+        pending = []  # (position, voter_id, full_name, embedding, model_name)
+        seen = set()
+        
+        for position, record in enumerate(records):
+            voter_id, full_name, embedding = record[:3]
+            record_model = (record[3] if len(record) > 3 else None) or model_name or self.model_name
+            if not voter_id or not voter_id.strip():
+                results[position] = (voter_id, False, "voter_id cannot be empty")
+            elif not full_name or not full_name.strip():
+                results[position] = (voter_id, False, "full_name cannot be empty")
+            elif embedding is None or embedding.size == 0:
+                results[position] = (voter_id, False, "embedding cannot be empty")
+            elif voter_id.strip() in seen:
+                results[position] = (voter_id, False, f"Duplicate registration: voter_id '{voter_id}' appears more than once in batch")
+            else:
+                seen.add(voter_id.strip())
+                pending.append((position, voter_id.strip(), full_name.strip(), embedding, record_model))
+        
+        if not pending:
+            return results
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            # Take the write lock up front so the existence check and the
+            # inserts see the same snapshot
+            cursor.execute("BEGIN IMMEDIATE")
+            existing = self._existing_voter_ids(cursor, [item[1] for item in pending])
+            
+            timestamp = datetime.utcnow().isoformat()
+            rows = []
+            inserted = []
+            for position, voter_id, full_name, embedding, record_model in pending:
+                if voter_id in existing:
+                    results[position] = (voter_id, False, f"Duplicate registration: voter_id '{voter_id}' already exists in database")
+                    continue
+                rows.append((voter_id, full_name, self._serialize_embedding(embedding), timestamp, record_model))
+                inserted.append((position, voter_id, embedding, record_model))
+            
+            cursor.executemany(self._INSERT_SQL, rows)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            for position, voter_id, _, _, _ in pending:
+                if results[position] is None:
+                    results[position] = (voter_id, False, f"Error storing embedding: {str(e)}")
+            return results
+        
+        for position, voter_id, embedding, record_model in inserted:
+            results[position] = (voter_id, True, None)
+            self.cache.invalidate(voter_id)
+            self._notify_upsert(voter_id, embedding, record_model)
+        
+        return results
+    
+    def get_embeddings_many(self, voter_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Retrieve face embeddings for many voters with chunked IN queries.
+        
+        Args:
+            voter_ids: Unique voter identifiers
+            
+        Returns:
+            Dictionary mapping voter_id to the same record get_embedding()
+            returns; voter_ids that are not found are omitted
+        """
+        wanted = list(dict.fromkeys(v.strip() for v in voter_ids if v and v.strip()))
+        records = {}
+        
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            for start in range(0, len(wanted), self._MAX_VARIABLES):
+                chunk = wanted[start:start + self._MAX_VARIABLES]
+                placeholders = ", ".join("?" * len(chunk))
+                cursor.execute(f"""
+                    SELECT voter_id, full_name, embedding, timestamp, model_name
+                    FROM face_embeddings
+                    WHERE voter_id IN ({placeholders})
+                """, chunk)
+                
+                for row in cursor.fetchall():
+                    records[row['voter_id']] = {
+                        'voter_id': row['voter_id'],
+                        'full_name': row['full_name'],
+                        'embedding': self._deserialize_embedding(row['embedding']),
+                        'timestamp': row['timestamp'],
+                        'model_name': row['model_name']
+                    }
+            
+        except Exception as e:
+            print(f"Error retrieving embeddings: {str(e)}")
+        
+        return records
+    
+    def delete_embeddings_many(self, voter_ids: List[str]) -> List[Tuple[str, bool, Optional[str]]]:
+        """
+        Delete many face embeddings in a single transaction.
+        
+        Args:
+            voter_ids: Unique voter identifiers
+            
+        Returns:
+            List of (voter_id, success, error_message), one per input voter_id
+        """
+        results: List[Tuple[str, bool, Optional[str]]] = [None] * len(voter_ids)
+        pending = []
+        
+        for position, voter_id in enumerate(voter_ids):
+            if not voter_id or not voter_id.strip():
+                results[position] = (voter_id, False, "voter_id cannot be empty")
+            else:
+                pending.append((position, voter_id.strip()))
+        
+        if not pending:
+            return results
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            existing = self._existing_voter_ids(cursor, [voter_id for _, voter_id in pending])
+            cursor.executemany(self._DELETE_SQL, [(voter_id,) for voter_id in existing])
+            cursor.executemany(self._DELETE_SECONDARY_SQL, [(voter_id,) for voter_id in existing])
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            for position, voter_id in pending:
+                results[position] = (voter_id, False, f"Error deleting embedding: {str(e)}")
+            return results
+        
+        removed = set()
+        for position, voter_id in pending:
+            if voter_id in existing and voter_id not in removed:
+                removed.add(voter_id)
+                results[position] = (voter_id, True, None)
+                self.cache.invalidate(voter_id)
+                self._notify_remove(voter_id)
+            else:
+                results[position] = (voter_id, False, f"voter_id '{voter_id}' does not exist")
+        
+        return results
+    
+    def delete_all(self, vacuum: bool = False) -> int:
+        """
+        Delete every stored embedding with a single DELETE statement.
+        
+        Args:
+            vacuum: Also run VACUUM afterwards to return freed pages to the OS
+            
+        Returns:
+            Number of deleted rows
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute("SELECT voter_id FROM face_embeddings")
+            voter_ids = [row['voter_id'] for row in cursor.fetchall()]
+            cursor.execute("DELETE FROM face_embeddings")
+            cursor.execute("DELETE FROM secondary_embeddings")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        self.cache.clear()
+        for voter_id in voter_ids:
+            self._notify_remove(voter_id)
+        
+        if vacuum:
+            cursor.execute("VACUUM")
+        
+        return len(voter_ids)
+    
+    def store_secondary_embedding(
+        self,
+        voter_id: str,
+        model_name: str,
+        embedding
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Store (or replace) a voter's embedding from a secondary model.
+        
+        Args:
+            voter_id: Registered voter identifier
+            model_name: Model that produced the embedding
+            embedding: Face embedding vector as numpy array
+            
+        Returns:
+            Tuple of (success, error_message); fails if voter_id is not registered
+        """
+        return self.store_secondary_embeddings_many(model_name, [(voter_id, embedding)])[0][1:]
+    
+    def store_secondary_embeddings_many(
+        self,
+        model_name: str,
+        records: List[Tuple[str, np.ndarray]]
+    ) -> List[Tuple[str, bool, Optional[str]]]:
+        """
+        Store many secondary embeddings from one model in a single transaction.
+        
+        Args:
+            model_name: Model that produced the embeddings
+            records: List of (voter_id, embedding) tuples
+            
+        Returns:
+            List of (voter_id, success, error_message), one per input record
+        """
+        results: List[Tuple[str, bool, Optional[str]]] = [None] * len(records)
+        pending = []
+        
+        if not model_name or not model_name.strip():
+            return [(voter_id, False, "model_name cannot be empty") for voter_id, _ in records]
+        
+        timestamp = datetime.utcnow().isoformat()
+        for position, (voter_id, embedding) in enumerate(records):
+            if not voter_id or not voter_id.strip():
+                results[position] = (voter_id, False, "voter_id cannot be empty")
+            elif embedding is None or embedding.size == 0:
+                results[position] = (voter_id, False, "embedding cannot be empty")
+            else:
+                pending.append((position, voter_id.strip(), self._serialize_embedding(embedding)))
+        
+        if not pending:
+            return results
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            stored = []
+            for position, voter_id, blob in pending:
+                cursor.execute(self._INSERT_SECONDARY_SQL, (model_name, blob, timestamp, voter_id))
+                stored.append(cursor.rowcount > 0)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            for position, voter_id, _ in pending:
+                results[position] = (voter_id, False, f"Error storing embedding: {str(e)}")
+            return results
+        
+        for (position, voter_id, _), inserted in zip(pending, stored):
+            if inserted:
+                results[position] = (voter_id, True, None)
+            else:
+                results[position] = (voter_id, False, f"voter_id '{voter_id}' does not exist")
+        return results
+    
+    def get_secondary_embedding(self, voter_id: str, model_name: str):
+        """
+        Retrieve a voter's embedding from a secondary model.
+        
+        Args:
+            voter_id: Unique voter identifier
+            model_name: Secondary model name
+            
+        Returns:
+            L2-normalized embedding (QuantizedVector in int8 mode), or None
+            if the voter has none for this model
+        """
+        if not voter_id or not voter_id.strip():
+            return None
+        
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT embedding
+                FROM secondary_embeddings
+                WHERE voter_id = ? AND model_name = ?
+            """, (voter_id.strip(), model_name))
+            
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            return normalize(
+                self._deserialize_embedding(row['embedding'], keep_quantized=True),
+                self.embedding_dtype
+            )
+            
+        except Exception as e:
+            print(f"Error retrieving secondary embedding: {str(e)}")
+            return None
+    
+    def voters_missing_secondary(self, model_name: str) -> List[str]:
+        """
+        List registered voter_ids that have no embedding from model_name.
+        
+        Args:
+            model_name: Secondary model name
+            
+        Returns:
+            List of voter_ids
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT voter_id FROM face_embeddings
+            WHERE voter_id NOT IN (
+                SELECT voter_id FROM secondary_embeddings WHERE model_name = ?
+            )
+            ORDER BY voter_id
+        """, (model_name,))
+        return [row['voter_id'] for row in cursor.fetchall()]
+    
     def list_all_voters(self) -> List[Dict]:
         """
         List all registered voters (without embeddings).
         
         Returns:
-            List of dictionaries with keys: voter_id, full_name, timestamp
+            List of dictionaries with keys: voter_id, full_name, timestamp, model_name
         """
         try:
             conn = self._get_connection()
             cursor = conn.cursor()
             
             cursor.execute("""
-                SELECT voter_id, full_name, timestamp
+                SELECT voter_id, full_name, timestamp, model_name
                 FROM face_embeddings
                 ORDER BY timestamp DESC
             """)
@@ -351,7 +1032,8 @@ class FaceStorage:
                 {
                     'voter_id': row['voter_id'],
                     'full_name': row['full_name'],
-                    'timestamp': row['timestamp']
+                    'timestamp': row['timestamp'],
+                    'model_name': row['model_name']
                 }
                 for row in rows
             ]
@@ -360,6 +1042,149 @@ class FaceStorage:
             print(f"Error listing voters: {str(e)}")
             return []
     
+    def iter_embeddings(self, batch_size: int = 1000, model_name: Optional[str] = None):
+        """
+        Iterate over all stored embeddings.
+        
+        Args:
+            batch_size: Number of rows fetched from SQLite at a time
+            model_name: Only yield embeddings made by this model (rows
+                without a recorded model are included)
+            
+        Yields:
+            Tuples of (voter_id, embedding numpy array)
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        if model_name is None:
+            cursor.execute("""
+                SELECT voter_id, embedding
+                FROM face_embeddings
+            """)
+        else:
+            cursor.execute("""
+                SELECT voter_id, embedding
+                FROM face_embeddings
+                WHERE model_name IS NULL OR model_name = '' OR model_name = ?
+            """, (model_name,))
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row['voter_id'], self._deserialize_embedding(row['embedding'])
+    
+    def export_rows(self, batch_size: int = 1000):
+        """
+        Iterate over raw stored rows without decoding embeddings.
+        
+        Args:
+            batch_size: Number of rows fetched from SQLite at a time
+            
+        Yields:
+            Tuples of (voter_id, full_name, embedding BLOB/JSON, timestamp, model_name)
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT voter_id, full_name, embedding, timestamp, model_name
+            FROM face_embeddings
+        """)
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row['voter_id'], row['full_name'], row['embedding'], row['timestamp'], row['model_name']
+    
+    def import_rows(self, rows: List[Tuple[str, str, bytes, str, Optional[str]]]) -> int:
+        """
+        Insert raw rows (as produced by export_rows) in one transaction.
+        
+        Embeddings, timestamps and model names are copied verbatim; voter_ids that
+        already exist are left untouched. Intended for offline tools such
+        as resharding.
+        
+        Args:
+            rows: List of (voter_id, full_name, embedding, timestamp, model_name) tuples
+            
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.executemany(self._INSERT_SQL, rows)
+            inserted = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        for voter_id, _, embedding, _, model_name in rows:
+            self.cache.invalidate(voter_id)
+            if self._observers:
+                self._notify_upsert(voter_id, self._deserialize_embedding(embedding), model_name)
+        
+        return inserted
+    
+    def export_secondary_rows(self, batch_size: int = 1000):
+        """
+        Iterate over raw secondary embedding rows without decoding them.
+        
+        Yields:
+            Tuples of (voter_id, model_name, embedding BLOB, timestamp)
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT voter_id, model_name, embedding, timestamp
+            FROM secondary_embeddings
+        """)
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row['voter_id'], row['model_name'], row['embedding'], row['timestamp']
+    
+    def import_secondary_rows(self, rows: List[Tuple[str, str, bytes, str]]) -> int:
+        """
+        Insert raw secondary rows (as produced by export_secondary_rows) in
+        one transaction. Rows for voters not present here are skipped, so
+        import the primary rows first.
+        
+        Args:
+            rows: List of (voter_id, model_name, embedding, timestamp) tuples
+            
+        Returns:
+            Number of rows inserted or replaced
+        """
+        if not rows:
+            return 0
+        
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.executemany(
+                self._INSERT_SECONDARY_SQL,
+                [(model_name, embedding, timestamp, voter_id) for voter_id, model_name, embedding, timestamp in rows]
+            )
+            inserted = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return inserted
+    
     def get_count(self) -> int:
         """
         Get total number of stored embeddings.
@@ -380,11 +1205,119 @@ class FaceStorage:
             print(f"Error getting count: {str(e)}")
             return 0
     
+    def count_legacy_rows(self) -> int:
+        """
+        Count embeddings still stored as legacy JSON text.
+        
+        Returns:
+            Number of rows migrate_embeddings_to_blob() would convert
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) as count
+            FROM face_embeddings
+            WHERE typeof(embedding) = 'text'
+        """)
+        return cursor.fetchone()['count']
+    
+    def iter_embedding_rows(self, batch_size: int = 1000):
+        """
+        Iterate over every stored embedding with its on-disk format.
+        
+        Unlike iter_embeddings(), rows that fail to decode are reported
+        (with the error) instead of raising.
+        
+        Args:
+            batch_size: Number of rows fetched from SQLite at a time
+            
+        Yields:
+            StoredEmbedding tuples, ordered by voter_id
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT voter_id, embedding, typeof(embedding) as embedding_type,
+                   LENGTH(embedding) as embedding_length
+            FROM face_embeddings
+            ORDER BY voter_id
+        """)
+        
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                fmt = "blob" if row['embedding_type'] == 'blob' else "json"
+                try:
+                    embedding, error = self._deserialize_embedding(row['embedding']), None
+                except ValueError as e:
+                    embedding, error = None, str(e)
+                yield StoredEmbedding(row['voter_id'], fmt, row['embedding_length'], embedding, error)
+    
+    def migrate_embeddings_to_blob(self, batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Convert legacy JSON embedding rows to the binary BLOB format in place.
+        
+        Rows are written in this storage's embedding_dtype
+        (FACE_EMBEDDING_DTYPE: float32, float16 or int8), like new
+        registrations.
+        
+        Rows are converted in small batches, each committed in its own short
+        transaction, so the service can keep reading and writing while the
+        migration runs (readers understand both formats). Safe to re-run:
+        only rows still stored as TEXT are touched.
+        
+        Args:
+            batch_size: Number of rows converted per transaction
+            
+        Returns:
+            Tuple of (migrated_count, failed_count)
+        """
+        conn = self._get_connection()
+        migrated = 0
+        failed = 0
+        last_voter_id = ""
+        
+        while True:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT voter_id, embedding
+                FROM face_embeddings
+                WHERE typeof(embedding) = 'text' AND voter_id > ?
+                ORDER BY voter_id
+                LIMIT ?
+            """, (last_voter_id, batch_size))
+            rows = cursor.fetchall()
+            
+            if not rows:
+                break
+            
+            updates = []
+            for row in rows:
+                try:
+                    embedding = self._deserialize_embedding(row['embedding'])
+                    updates.append((self._serialize_embedding(embedding), row['voter_id'], row['embedding']))
+                except Exception as e:
+                    print(f"Error migrating embedding for {row['voter_id']}: {str(e)}")
+                    failed += 1
+            
+            # Only replace the row if it was not rewritten concurrently
+            cursor.executemany("""
+                UPDATE face_embeddings
+                SET embedding = ?
+                WHERE voter_id = ? AND embedding = ?
+            """, updates)
+            migrated += cursor.rowcount
+            conn.commit()
+            
+            last_voter_id = rows[-1]['voter_id']
+        
+        return migrated, failed
+    
     def close(self):
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Close all database connections."""
+        self.connections.close_all()
 
 
 # Global storage instance (lazy loading)
@@ -396,14 +1329,26 @@ def get_storage(db_path: str = "face_embeddings.db") -> FaceStorage:
     Get or create the global face storage instance.
     Uses singleton pattern for efficiency.
     
+    Set FACE_STORAGE_SHARDS > 1 to use ShardedFaceStorage instead; shard
+    files live in FACE_STORAGE_SHARD_DIR and voter_ids are routed by
+    FACE_STORAGE_SHARD_BY ("hash" or "prefix").
+    
     Args:
         db_path: Path to SQLite database file (default: "face_embeddings.db")
     
     Returns:
-        FaceStorage instance
+        FaceStorage (or ShardedFaceStorage) instance
     """
     global _storage_instance
     if _storage_instance is None:
-        _storage_instance = FaceStorage(db_path=db_path)
+        num_shards = int(os.environ.get("FACE_STORAGE_SHARDS", "1"))
+        if num_shards > 1:
+            from .sharding import ShardedFaceStorage
+            _storage_instance = ShardedFaceStorage(
+                db_dir=os.environ.get("FACE_STORAGE_SHARD_DIR", "face_embeddings_shards"),
+                num_shards=num_shards,
+                shard_by=os.environ.get("FACE_STORAGE_SHARD_BY", "hash")
+            )
+        else:
+            _storage_instance = FaceStorage(db_path=db_path)
     return _storage_instance
-
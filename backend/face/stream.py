@@ -0,0 +1,252 @@
+"""
+Streaming Verification Module
+
+Verifies a voter from a live stream of webcam frames (the WebSocket
+endpoint in main.py) and reports the verdict as soon as it is reached:
+- Only the newest frame is kept while one is being processed; frames that
+  arrive in the meantime are dropped instead of queueing up behind the
+  model, so the verdict is always based on what the camera sees now
+- Each frame is decoded and its face located with the box tracker
+  (tracking.py), then passed through the quality gates using that box;
+  frames without a face or failing a gate are reported back with the
+  reason and never reach the model
+- Frames that pass are handed to the inference workers already decoded
+  and gated, so the workers neither decode them again nor repeat the
+  quality gate's face detection, and the burst decision rule (burst.py)
+  decides: a clear match or a clear
+  mismatch ends the stream immediately, otherwise the mean of the
+  embedded frames decides after FACE_STREAM_MAX_INFERENCES inferences
+- FACE_STREAM_TIMEOUT seconds after the stream opens it is decided on
+  whatever it has
+
+The verifier is transport-agnostic: it takes a receive() coroutine for
+frames and an on_frame() coroutine for per-frame updates.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, NamedTuple, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .burst import BurstDecider
+from .ingest import ImageTooLargeError, decode_payload
+from .quality import FaceQualityError, check_image_quality
+from .tracking import FaceTracker
+
+# Streaming configuration (override via environment)
+STREAM_MAX_INFERENCES = int(os.environ.get("FACE_STREAM_MAX_INFERENCES", "5"))
+STREAM_TIMEOUT = float(os.environ.get("FACE_STREAM_TIMEOUT", "20"))
+
+# Decoding, tracking and quality gates run here, off the event loop. One
+# thread: the shared Haar cascades are not safe to use concurrently, and
+# each frame only takes a few milliseconds.
+_prepare_executor: Optional[ThreadPoolExecutor] = None
+
+
+class StreamFrame(NamedTuple):
+    """What happened to one frame of the stream."""
+    index: int  # position in the stream, counting dropped frames
+    status: str  # "embedded" or "skipped"
+    similarity: Optional[float]  # None unless embedded
+    box: Optional[Tuple[int, int, int, int]]  # tracked face box (x, y, w, h)
+    reason: Optional[str]  # why the frame was skipped (quality reason, "no_face", ...)
+    error: Optional[str]  # human-readable reason
+    elapsed_ms: float
+
+
+class StreamResult(NamedTuple):
+    """Verdict for a whole stream."""
+    verified: bool
+    similarity: Optional[float]  # score the decision was based on
+    decision: str  # "accepted" / "rejected" (early exit), "aggregated" or "timeout"
+    frames_received: int
+    frames_processed: int
+    frames_dropped: int
+    inferences: int
+    elapsed_ms: float  # from opening the stream to the verdict
+
+
+def _skip_reason(error: ValueError) -> str:
+    if isinstance(error, FaceQualityError):
+        return error.reason
+    if isinstance(error, ImageTooLargeError):
+        return "too_large"
+    return "rejected"
+
+
+class StreamVerifier:
+    """
+    Verifies one stream of frames against one registered embedding.
+    """
+
+    def __init__(
+        self,
+        registered_embedding,
+        embed: Callable[[np.ndarray], Awaitable[np.ndarray]],
+        compare: Callable[[np.ndarray, object], float],
+        threshold: float,
+        max_inferences: int = STREAM_MAX_INFERENCES,
+        timeout: float = STREAM_TIMEOUT,
+        tracker: Optional[FaceTracker] = None,
+    ):
+        """
+        Initialize the verifier.
+
+        Args:
+            registered_embedding: Stored embedding of the claimed voter
+            embed: Coroutine function producing an embedding for one decoded,
+                   already gated frame; raises ValueError when the model
+                   rejects the frame
+            compare: Similarity function (higher is more similar)
+            threshold: Similarity needed to verify
+            max_inferences: Embedded frames after which the mean decides
+            timeout: Seconds after the stream opens before it is decided
+            tracker: Face tracker for this stream (default: a new one)
+        """
+        self.registered_embedding = registered_embedding
+        self.embed = embed
+        self.compare = compare
+        self.max_inferences = max_inferences
+        self.timeout = timeout
+        self.tracker = tracker or FaceTracker()
+        self.decider = BurstDecider(threshold)
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self.inferences = 0
+
+    def _prepare(self, payload: Union[str, bytes]) -> Tuple[np.ndarray, Optional[Tuple[int, int, int, int]]]:
+        """
+        Decode a frame, track the face and apply the quality gates.
+
+        Returns:
+            (decoded frame, tracked face box or None when tracking is unavailable)
+
+        Raises:
+            ValueError: Frame undecodable, too large, without a face, or
+                        failing a quality gate
+        """
+        image = decode_payload(payload)
+        box = None
+        if self.tracker.available:
+            box = self.tracker.update(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+            if box is None:
+                raise FaceQualityError("no_face", "No face found. Please look straight at the camera.")
+        check_image_quality(image, box)
+        return image, box
+
+    async def process(self, index: int, payload: Union[str, bytes]) -> Tuple[StreamFrame, Optional[tuple]]:
+        """
+        Gate and (if it passes) embed one frame.
+
+        Returns:
+            (StreamFrame, decision) where decision is (verified, similarity,
+            "accepted"/"rejected") once the outcome is clear, else None
+
+        Raises:
+            InferenceUnavailable: From embed()
+        """
+        global _prepare_executor
+        if _prepare_executor is None:
+            _prepare_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-stream")
+
+        started = time.perf_counter()
+        self.frames_processed += 1
+        box = None
+        try:
+            loop = asyncio.get_running_loop()
+            image, box = await loop.run_in_executor(_prepare_executor, self._prepare, payload)
+            embedding = await self.embed(image)
+            self.inferences += 1
+        except ValueError as e:
+            frame = StreamFrame(index, "skipped", None, box, _skip_reason(e), str(e),
+                                (time.perf_counter() - started) * 1000.0)
+            return frame, None
+
+        similarity = float(self.compare(embedding, self.registered_embedding))
+        frame = StreamFrame(index, "embedded", similarity, box, None, None, (time.perf_counter() - started) * 1000.0)
+        return frame, self.decider.add(similarity)
+
+    async def run(
+        self,
+        receive: Callable[[], Awaitable[Optional[Union[str, bytes]]]],
+        on_frame: Callable[[StreamFrame], Awaitable[None]],
+    ) -> Optional[StreamResult]:
+        """
+        Consume frames until a verdict is reached.
+
+        Args:
+            receive: Coroutine returning the next frame, or None when the
+                     client has closed the stream
+            on_frame: Coroutine called with every processed frame
+
+        Returns:
+            StreamResult, or None if the client left before a verdict
+
+        Raises:
+            InferenceUnavailable: Inference queue full, timed out or crashed
+        """
+        latest: list = []  # newest unprocessed frame (at most one)
+        arrived = asyncio.Event()
+        closed = False
+
+        async def read():
+            nonlocal closed
+            try:
+                while True:
+                    payload = await receive()
+                    if payload is None:
+                        break
+                    self.frames_received += 1
+                    if latest:
+                        # Still busy with an older frame: keep only the newest
+                        latest.clear()
+                        self.frames_dropped += 1
+                    latest.append((self.frames_received - 1, payload))
+                    arrived.set()
+            finally:
+                closed = True
+                arrived.set()
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        reader = asyncio.create_task(read())
+        try:
+            while True:
+                if not latest:
+                    if closed:
+                        return None
+                    try:
+                        await asyncio.wait_for(arrived.wait(), self.timeout - (loop.time() - started))
+                    except asyncio.TimeoutError:
+                        return self._result(started, timed_out=True)
+                    arrived.clear()
+                    continue
+
+                index, payload = latest.pop()
+                frame, decision = await self.process(index, payload)
+                await on_frame(frame)
+
+                if decision is not None:
+                    return self._result(started, decision)
+                if self.inferences >= self.max_inferences:
+                    return self._result(started)
+                if loop.time() - started >= self.timeout:
+                    return self._result(started, timed_out=True)
+        finally:
+            reader.cancel()
+
+    def _result(self, started: float, decision: Optional[tuple] = None, timed_out: bool = False) -> StreamResult:
+        verified, similarity, label = decision or self.decider.aggregate()
+        if timed_out and similarity is None:
+            label = "timeout"
+        elapsed_ms = (asyncio.get_running_loop().time() - started) * 1000.0
+        return StreamResult(
+            verified, similarity, label,
+            self.frames_received, self.frames_processed, self.frames_dropped,
+            self.inferences, elapsed_ms,
+        )
@@ -0,0 +1,94 @@
+"""
+Face Box Tracking Module
+
+Follows one face across the frames of a webcam stream so the whole frame
+is not searched for a face every time:
+- The first frame (and every FACE_TRACK_REDETECT_INTERVAL-th after it)
+  runs full detection over the downscaled frame
+- In between, only the area around the previous box is searched, at
+  scales close to the previous face size, which costs a fraction of a
+  full pass
+- If the face is not found near its last position the tracker falls back
+  to full detection on the same frame
+
+Periodic full detection also catches a second person stepping into the
+frame (full detection only accepts a single face). Detection uses the
+quality checker's Haar cascade (quality.py); when this OpenCV build has
+none, `available` is False and callers should skip tracking.
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .quality import FaceQualityChecker, get_quality_checker
+
+# Tracking configuration (override via environment)
+TRACK_REDETECT_INTERVAL = int(os.environ.get("FACE_TRACK_REDETECT_INTERVAL", "10"))
+TRACK_SEARCH_MARGIN = float(os.environ.get("FACE_TRACK_SEARCH_MARGIN", "0.5"))
+
+
+class FaceTracker:
+    """
+    Tracks the single face box of one stream (not shared between streams).
+    """
+
+    def __init__(
+        self,
+        checker: Optional[FaceQualityChecker] = None,
+        redetect_interval: int = TRACK_REDETECT_INTERVAL,
+        search_margin: float = TRACK_SEARCH_MARGIN,
+    ):
+        """
+        Initialize the tracker.
+
+        Args:
+            checker: Quality checker whose face detector is used (default: the global one)
+            redetect_interval: Frames tracked before full detection runs again
+            search_margin: Area searched around the previous box, as a fraction of its size
+        """
+        self.checker = checker or get_quality_checker()
+        self.redetect_interval = redetect_interval
+        self.search_margin = search_margin
+        self.box: Optional[Tuple[int, int, int, int]] = None
+        self._tracked_since_detect = 0
+        self.full_detections = 0
+        self.tracked_frames = 0
+        self.lost = 0
+
+    @property
+    def available(self) -> bool:
+        return self.checker.can_detect
+
+    def update(self, gray: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Locate the face in the next frame of the stream.
+
+        Args:
+            gray: Grayscale frame
+
+        Returns:
+            Face box (x, y, w, h), or None when no single face was found
+        """
+        if self.box is not None and self._tracked_since_detect < self.redetect_interval:
+            box = self.checker.find_face(gray, near=self.box, margin=self.search_margin)
+            if box is not None:
+                self.box = box
+                self._tracked_since_detect += 1
+                self.tracked_frames += 1
+                return box
+            self.lost += 1
+
+        self.box = self.checker.find_face(gray)
+        self._tracked_since_detect = 0
+        self.full_detections += 1
+        return self.box
+
+    def stats(self) -> dict:
+        """Return how often full detection was needed."""
+        return {
+            'full_detections': self.full_detections,
+            'tracked_frames': self.tracked_frames,
+            'lost': self.lost,
+        }
@@ -0,0 +1,127 @@
+"""
+Backfill fast-model embeddings for cascade verification.
+
+Voters registered before the cascade was enabled only have their VGG-Face
+embedding, so /face/verify sends them straight to the full model. This
+script finds those voters, embeds their registration photos
+(./registration_images/<voter_id>.<ext>, as used by register_faces.py)
+with the fast backend and stores the result as a secondary embedding.
+
+Embeddings are one-way, so voters without a source photo cannot be
+backfilled; they keep working through the full model and get a fast
+embedding the next time they register.
+
+Usage:
+    FACE_CASCADE_BACKEND=sface-yunet python backfill_cascade_embeddings.py
+    python backfill_cascade_embeddings.py --backend facenet-opencv --images ./registration_images
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import cv2
+
+from backend.face import get_storage
+from backend.face.backends import create_embedder, get_backend
+from backend.face.cascade import CASCADE_BACKEND
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+
+def find_photos(directory: str) -> dict:
+    """Map voter_id (filename without extension) to photo path."""
+    path = Path(directory)
+    if not path.is_dir():
+        return {}
+    return {
+        file.stem.strip(): file
+        for file in sorted(path.iterdir())
+        if file.is_file() and file.suffix.lower() in IMAGE_EXTENSIONS
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill fast-model embeddings for cascade verification")
+    parser.add_argument("--backend", default=CASCADE_BACKEND or "sface-yunet", help="Fast backend (default: FACE_CASCADE_BACKEND)")
+    parser.add_argument("--images", default="./registration_images", help="Directory of <voter_id>.<ext> photos")
+    parser.add_argument("--batch-size", type=int, default=100, help="Embeddings stored per transaction")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Backfill Cascade Embeddings")
+    print("=" * 70)
+    print()
+
+    try:
+        backend = get_backend(args.backend)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    storage = get_storage()
+    missing = storage.voters_missing_secondary(backend.model_name)
+    print(f"Backend: {backend.name} ({backend.model_name})")
+    print(f"Voters without a {backend.model_name} embedding: {len(missing)}")
+    if not missing:
+        print("Nothing to do.")
+        return
+
+    photos = find_photos(args.images)
+    todo = [voter_id for voter_id in missing if voter_id in photos]
+    no_photo = len(missing) - len(todo)
+    print(f"  → {len(todo)} with a registration photo, {no_photo} without")
+    print()
+
+    if not todo:
+        return
+
+    print(f"Loading {backend.name}...")
+    embedder = create_embedder(backend.name)
+    embedder.load_model()
+    print("  ✓ Embedder loaded")
+    print()
+
+    stored = 0
+    failed = []
+    batch = []
+
+    def flush():
+        nonlocal stored
+        for voter_id, success, error in storage.store_secondary_embeddings_many(backend.model_name, batch):
+            if success:
+                stored += 1
+            else:
+                failed.append((voter_id, error))
+        batch.clear()
+
+    for position, voter_id in enumerate(todo, start=1):
+        try:
+            image = cv2.imread(str(photos[voter_id]))
+            if image is None:
+                raise ValueError(f"Failed to load image: {photos[voter_id]}")
+            embedding = embedder.generate_embedding_from_image(image)
+        except Exception as e:
+            failed.append((voter_id, str(e)))
+            continue
+
+        batch.append((voter_id, embedding))
+        if len(batch) >= args.batch_size:
+            flush()
+            print(f"  → {position}/{len(todo)} processed")
+    flush()
+
+    print()
+    print("=" * 70)
+    print("Backfill Summary")
+    print("=" * 70)
+    print(f"  ✓ Stored: {stored}")
+    print(f"  ⊘ No registration photo: {no_photo}")
+    print(f"  ✗ Failed: {len(failed)}")
+    for voter_id, error in failed:
+        print(f"    ✗ {voter_id}: {error}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
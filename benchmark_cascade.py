@@ -0,0 +1,155 @@
+"""
+Benchmark cascade verification against the single-model (VGG-Face) path.
+
+Takes a directory of face photos named <person>_<anything>.<ext>; the
+first photo of each person (in name order) is the enrolled reference and
+every photo is verified against every other person's reference plus its
+own. Each photo is embedded once by both models, then for every pair:
+- Single-model path: full-model embedding, verified at --threshold
+- Cascade path: fast-model embedding first; the full model only when the
+  fast similarity falls inside [--reject-below, --accept-above)
+
+Reports average per-verification latency of both paths, how often stage
+one decided alone, and how often the cascade reached the same decision
+as the single-model path (split into genuine and impostor pairs).
+
+Usage:
+    python benchmark_cascade.py photos/
+    python benchmark_cascade.py photos/ --fast sface-yunet --accept-above 0.65 --reject-below 0.25
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.face.backends import create_embedder, get_backend
+from backend.face.cascade import CASCADE_ACCEPT_ABOVE, CASCADE_BACKEND, CASCADE_REJECT_BELOW, CascadeVerifier
+from backend.face.ingest import decode_image
+from backend.face.quantization import cosine_similarity
+
+SIMILARITY_THRESHOLD = 0.50
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+
+def embed_all(backend_name: str, photos: list) -> dict:
+    """Embed every photo once; returns {path: (embedding or None, elapsed ms)}."""
+    embedder = create_embedder(backend_name)
+    embedder.load_model()
+    embedder.warm_up(1)
+
+    results = {}
+    for path in photos:
+        image = decode_image(path.read_bytes())
+        start = time.perf_counter()
+        try:
+            embedding = embedder.generate_embedding_from_image(image)
+        except ValueError:
+            embedding = None
+        results[path] = (embedding, (time.perf_counter() - start) * 1000.0)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("images", help="Directory of <person>_<n>.<ext> photos")
+    parser.add_argument("--fast", default=CASCADE_BACKEND or "sface-yunet", help="Stage-one backend")
+    parser.add_argument("--full", default=None, help="Stage-two backend (default: FACE_EMBEDDER_BACKEND)")
+    parser.add_argument("--accept-above", type=float, default=CASCADE_ACCEPT_ABOVE, help="Stage-one accept similarity")
+    parser.add_argument("--reject-below", type=float, default=CASCADE_REJECT_BELOW, help="Stage-one reject similarity")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD, help="Full-model verify threshold")
+    args = parser.parse_args()
+
+    photos = sorted(
+        path for path in Path(args.images).iterdir()
+        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    if len(photos) < 2:
+        print(f"Error: need at least two photos in '{args.images}'")
+        sys.exit(1)
+
+    fast_backend = get_backend(args.fast)
+    full_backend = get_backend(args.full)
+    cascade = CascadeVerifier(fast_backend.name, args.accept_above, args.reject_below)
+
+    print("=" * 70)
+    print("Cascade Verification Benchmark")
+    print("=" * 70)
+    print(f"Photos: {len(photos)} in {args.images}")
+    print(f"Stage one: {fast_backend.name}  (accept >= {args.accept_above:.2f}, reject < {args.reject_below:.2f})")
+    print(f"Stage two: {full_backend.name}  (threshold {args.threshold:.2f})")
+    print()
+
+    print(f"Embedding with {fast_backend.name}...")
+    fast = embed_all(fast_backend.name, photos)
+    print(f"Embedding with {full_backend.name}...")
+    full = embed_all(full_backend.name, photos)
+    print()
+
+    # Reference = first photo of each person
+    references = {}
+    for path in photos:
+        references.setdefault(path.stem.split("_")[0], path)
+
+    single_ms = []
+    cascade_ms = []
+    stage_one = 0
+    agree = {True: [0, 0], False: [0, 0]}  # genuine? -> [agreeing, total]
+    skipped = 0
+
+    for probe in photos:
+        person = probe.stem.split("_")[0]
+        for reference_person, reference in references.items():
+            if reference == probe:
+                continue
+            full_probe, full_ms = full[probe]
+            full_reference, _ = full[reference]
+            if full_probe is None or full_reference is None:
+                # Single-model path rejects the frame outright
+                skipped += 1
+                continue
+
+            single = cosine_similarity(full_probe, full_reference) >= args.threshold
+            single_ms.append(full_ms)
+
+            fast_probe, fast_ms = fast[probe]
+            fast_reference, _ = fast[reference]
+            decision = None
+            if fast_probe is not None and fast_reference is not None:
+                decision = cascade.decide_fast(cosine_similarity(fast_probe, fast_reference))
+            if decision is None:
+                decision = single
+                cascade_ms.append(fast_ms + full_ms)
+            else:
+                stage_one += 1
+                cascade_ms.append(fast_ms)
+
+            genuine = reference_person == person
+            agree[genuine][0] += int(decision == single)
+            agree[genuine][1] += 1
+
+    pairs = len(single_ms)
+    if not pairs:
+        print("Error: the full model found no faces in these photos")
+        sys.exit(1)
+
+    agreeing = agree[True][0] + agree[False][0]
+    print("=" * 70)
+    print("Results")
+    print("=" * 70)
+    print(f"Pairs verified: {pairs} ({agree[True][1]} genuine, {agree[False][1]} impostor), {skipped} skipped (no face)")
+    print(f"Single-model avg latency: {np.mean(single_ms):8.1f} ms")
+    print(f"Cascade avg latency:      {np.mean(cascade_ms):8.1f} ms  ({np.mean(single_ms) / np.mean(cascade_ms):.2f}x)")
+    print(f"Decided by stage one:     {stage_one / pairs:8.1%}")
+    print(f"Decision agreement:       {agreeing / pairs:8.2%}")
+    for genuine, label in ((True, "genuine"), (False, "impostor")):
+        matched, total = agree[genuine]
+        if total:
+            print(f"  {label:<9} pairs:        {matched / total:8.2%}  ({total - matched} disagreements)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark the YOLO-crop detection pipeline against the embedder's own detector.
+
+Takes a directory of face photos named <person>_<anything>.<ext> and embeds
+every photo through both pipelines (see backend/face/pipeline.py):
+- embedder: the embedding backend detects and aligns the face itself
+- yolo: batched YOLO detection, crop passed with detector_backend="skip"
+
+Reports per-image latency of both pipelines (one image at a time and as a
+batch), how often they disagree on whether a usable face was found, the
+cosine similarity between the two embeddings of the same photo, and how
+often they reach the same verify decision for every pair of photos
+(split into genuine and impostor pairs).
+
+Quality checks are applied in both pipelines; set FACE_QUALITY_CHECKS=0
+to measure detection and embedding alone.
+
+Usage:
+    python benchmark_detection_pipeline.py photos/
+    python benchmark_detection_pipeline.py photos/ --backend arcface-onnx --threshold 0.45
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.face.backends import create_embedder, get_backend
+from backend.face.ingest import decode_image
+from backend.face.pipeline import PIPELINES, FacePipeline
+from backend.face.quantization import cosine_similarity
+
+SIMILARITY_THRESHOLD = 0.50
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp'}
+
+
+def run_pipeline(pipeline: FacePipeline, images: list, batch_size: int):
+    """
+    Embed every image one at a time, then again in batches.
+
+    Returns:
+        (embeddings or None per image, avg single ms, avg batched ms per image)
+    """
+    pipeline.embed_images(images[:1])  # warm-up (loads YOLO in "yolo" mode)
+
+    embeddings = []
+    single_ms = []
+    for image in images:
+        start = time.perf_counter()
+        try:
+            embeddings.append(pipeline.embed_image(image))
+        except ValueError:
+            embeddings.append(None)
+        single_ms.append((time.perf_counter() - start) * 1000.0)
+
+    start = time.perf_counter()
+    for offset in range(0, len(images), batch_size):
+        pipeline.embed_images(images[offset:offset + batch_size])
+    batched_ms = (time.perf_counter() - start) * 1000.0 / len(images)
+
+    return embeddings, float(np.mean(single_ms)), batched_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("images", help="Directory of <person>_<n>.<ext> photos")
+    parser.add_argument("--backend", default=None, help="Embedding backend (default: FACE_EMBEDDER_BACKEND)")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD, help="Verify threshold")
+    parser.add_argument("--batch-size", type=int, default=8, help="Images per batched call")
+    args = parser.parse_args()
+
+    photos = sorted(
+        path for path in Path(args.images).iterdir()
+        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS
+    )
+    if len(photos) < 2:
+        print(f"Error: need at least two photos in '{args.images}'")
+        sys.exit(1)
+
+    backend = get_backend(args.backend)
+    images = [decode_image(path.read_bytes()) for path in photos]
+
+    print("=" * 70)
+    print("Detection Pipeline Benchmark")
+    print("=" * 70)
+    print(f"Photos: {len(photos)} in {args.images}")
+    print(f"Backend: {backend.name}  (threshold {args.threshold:.2f})")
+    print()
+
+    embedder = create_embedder(backend.name)
+    embedder.load_model()
+    embedder.warm_up(1)
+
+    results = {}
+    for mode in PIPELINES:
+        print(f"Running '{mode}' pipeline...")
+        results[mode] = run_pipeline(FacePipeline(embedder, mode), images, args.batch_size)
+    print()
+
+    current, _, _ = results["embedder"]
+    yolo, _, _ = results["yolo"]
+
+    found_disagreements = sum(1 for a, b in zip(current, yolo) if (a is None) != (b is None))
+    same_photo = [cosine_similarity(a, b) for a, b in zip(current, yolo) if a is not None and b is not None]
+
+    agree = {True: [0, 0], False: [0, 0]}  # genuine? -> [agreeing, total]
+    for i, j in itertools.combinations(range(len(photos)), 2):
+        if current[i] is None or current[j] is None or yolo[i] is None or yolo[j] is None:
+            continue
+        decision = cosine_similarity(current[i], current[j]) >= args.threshold
+        yolo_decision = cosine_similarity(yolo[i], yolo[j]) >= args.threshold
+        genuine = photos[i].stem.split("_")[0] == photos[j].stem.split("_")[0]
+        agree[genuine][0] += int(decision == yolo_decision)
+        agree[genuine][1] += 1
+
+    print("=" * 70)
+    print("Results")
+    print("=" * 70)
+    for mode in PIPELINES:
+        embeddings, single_ms, batched_ms = results[mode]
+        found = sum(1 for embedding in embeddings if embedding is not None)
+        print(
+            f"{mode:<9} avg latency: {single_ms:8.1f} ms single, {batched_ms:8.1f} ms/image batched"
+            f"  ({found}/{len(photos)} usable)"
+        )
+    print(f"Speedup (yolo vs embedder): {results['embedder'][1] / results['yolo'][1]:.2f}x single, "
+          f"{results['embedder'][2] / results['yolo'][2]:.2f}x batched")
+    print(f"Face-found disagreements:  {found_disagreements}")
+    if same_photo:
+        print(f"Same-photo similarity:     mean {np.mean(same_photo):.3f}, min {np.min(same_photo):.3f}")
+
+    pairs = agree[True][1] + agree[False][1]
+    if pairs:
+        agreeing = agree[True][0] + agree[False][0]
+        print(f"Decision agreement:        {agreeing / pairs:8.2%}  ({pairs} pairs)")
+        for genuine, label in ((True, "genuine"), (False, "impostor")):
+            matched, total = agree[genuine]
+            if total:
+                print(f"  {label:<9} pairs:        {matched / total:8.2%}  ({total - matched} disagreements)")
+    else:
+        print("Decision agreement:        n/a (fewer than two photos usable by both pipelines)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark the duplicate-face ANN index against brute-force search.
+
+Builds synthetic galleries of clustered unit vectors at each requested
+size (1M rows by default), then measures per-query latency of
+IVFIndex.search() against an exact scan of the same gallery rows and how
+often the index finds the true nearest face to a noisy duplicate.
+
+The gallery is generated in chunks and only held once (inside the index's
+gallery), so 1M rows fit in memory at --dim 512; use --dtype float16/int8
+for larger dimensions (1M x 4096 float32 would need 16 GB).
+
+Usage:
+    python benchmark_duplicate_index.py --sizes 100000,1000000 --dim 512
+"""
+
+import argparse
+import time
+import numpy as np
+
+from backend.face.ann_index import IVFIndex
+from backend.face.quantization import EMBEDDING_DTYPE, validate_dtype
+
+CHUNK_SIZE = 50000
+
+
+def make_clustered_gallery(size: int, dim: int, rng, chunk_size: int = CHUNK_SIZE):
+    """
+    Random embeddings grouped around many centres, like real face data.
+
+    Yields (voter_id, vector) pairs, generated chunk by chunk.
+    """
+    centres = rng.standard_normal((max(1, size // 100), dim)).astype(np.float32)
+    for start in range(0, size, chunk_size):
+        count = min(chunk_size, size - start)
+        labels = rng.integers(0, len(centres), size=count)
+        vectors = centres[labels] + 0.8 * rng.standard_normal((count, dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        for offset in range(count):
+            yield f"V{start + offset:07d}", vectors[offset]
+
+
+def run(size: int, args) -> tuple:
+    """Build an index of `size` rows and time its queries; return the report row."""
+    rng = np.random.default_rng(0)
+    index = IVFIndex(nprobe=args.nprobe, dtype=args.dtype)
+    start = time.perf_counter()
+    index.load(make_clustered_gallery(size, args.dim, rng))
+    loaded = time.perf_counter() - start
+    index.join_training()
+    trained = time.perf_counter() - start - loaded
+
+    # Probes are noisy copies of registered faces
+    targets = rng.choice(size, size=min(args.queries, size), replace=False)
+    _, originals = index.gallery.get_vectors([f"V{i:07d}" for i in targets])
+    probes = originals + args.noise * rng.standard_normal(originals.shape).astype(np.float32) / np.sqrt(args.dim)
+
+    ann_times = []
+    brute_times = []
+    hits = 0
+    for probe in probes:
+        start = time.perf_counter()
+        result = index.search(probe, top_k=1)
+        ann_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        exact = index.gallery.search(probe, top_k=1)
+        brute_times.append(time.perf_counter() - start)
+
+        if result and result[0][0] == exact[0][0]:
+            hits += 1
+
+    ann_ms = np.array(ann_times) * 1000
+    brute_ms = np.array(brute_times) * 1000
+    return (
+        size, index.num_lists, loaded, trained,
+        np.percentile(ann_ms, 50), np.percentile(ann_ms, 99),
+        np.percentile(brute_ms, 50), np.percentile(brute_ms, 99),
+        hits / len(probes), index.gallery.nbytes / 1024 ** 2,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000", help="Comma-separated gallery sizes")
+    parser.add_argument("--dim", type=int, default=512, help="Embedding dimension (ArcFace/Facenet512: 512)")
+    parser.add_argument("--dtype", default=EMBEDDING_DTYPE, help="Gallery row dtype (float32, float16, int8)")
+    parser.add_argument("--queries", type=int, default=200, help="Duplicate probes to run per size")
+    parser.add_argument("--nprobe", type=int, default=8, help="Partitions scored per query")
+    parser.add_argument("--noise", type=float, default=0.3, help="Noise added to duplicate probes")
+    args = parser.parse_args()
+    args.dtype = validate_dtype(args.dtype)
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print("=" * 70)
+    print("Duplicate-Face Index Benchmark")
+    print("=" * 70)
+    print(f"dim={args.dim}, dtype={args.dtype}, nprobe={args.nprobe}, {args.queries} queries per size")
+    print()
+
+    rows = []
+    for size in sizes:
+        print(f"Building {size} rows...")
+        rows.append(run(size, args))
+
+    print()
+    print(f"{'Rows':<9} {'Lists':<7} {'Load s':<8} {'Train s':<8} {'IVF p50':<9} {'IVF p99':<9} "
+          f"{'Exact p50':<10} {'Exact p99':<10} {'Recall@1':<9} {'MB':<7}")
+    print("-" * 90)
+    for size, lists, loaded, trained, ann_p50, ann_p99, brute_p50, brute_p99, recall, megabytes in rows:
+        print(f"{size:<9} {lists:<7} {loaded:<8.1f} {trained:<8.1f} {ann_p50:<9.2f} {ann_p99:<9.2f} "
+              f"{brute_p50:<10.2f} {brute_p99:<10.2f} {recall:<9.1%} {megabytes:<7.0f}")
+    print("=" * 90)
+    print("Latencies in ms; exact = full scan of the same gallery rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark quantized embedding representations (float16 / int8) against float32.
+
+Reports, for each representation:
+- Bytes per stored BLOB and resident gallery memory
+- Verification agreement: same accept/reject decision as float32 at the
+  verification threshold, for genuine and impostor pairs
+- Identification agreement: same top-1 voter_id as the float32 gallery
+
+Uses embeddings from an existing database when --db is given (probes are
+the stored embeddings plus noise), otherwise a synthetic gallery.
+
+Usage:
+    python benchmark_quantization.py --size 20000
+    python benchmark_quantization.py --db face_embeddings.db
+"""
+
+import argparse
+import numpy as np
+
+from backend.face.gallery import FaceGallery
+from backend.face.quantization import SUPPORTED_DTYPES, normalize, scoring_values
+from backend.face.storage import FaceStorage
+
+SIMILARITY_THRESHOLD = 0.50
+
+
+def cosine(a, b) -> float:
+    """Cosine similarity computed the same way as FaceEmbedder.compare_embeddings."""
+    a = scoring_values(a).astype(np.float32)
+    b = scoring_values(b).astype(np.float32)
+    return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def load_gallery(args, rng):
+    """Return (voter_ids, enrolled float32 matrix)."""
+    if args.db:
+        storage = FaceStorage(db_path=args.db, cache_size=0)
+        items = list(storage.iter_embeddings())
+        storage.close()
+        if not items:
+            raise SystemExit(f"No embeddings found in {args.db}")
+        voter_ids = [voter_id for voter_id, _ in items]
+        return voter_ids, np.vstack([embedding for _, embedding in items]).astype(np.float32)
+
+    enrolled = rng.standard_normal((args.size, args.dim)).astype(np.float32)
+    return [f"V{i:07d}" for i in range(args.size)], enrolled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", help="Existing face_embeddings.db to benchmark")
+    parser.add_argument("--size", type=int, default=20000, help="Synthetic gallery size")
+    parser.add_argument("--dim", type=int, default=4096, help="Synthetic embedding dimension")
+    parser.add_argument("--probes", type=int, default=1000, help="Number of probe faces")
+    parser.add_argument("--noise", type=float, default=1.0, help="Probe noise relative to signal")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    voter_ids, enrolled = load_gallery(args, rng)
+    count, dim = enrolled.shape
+
+    # Probes: noisy re-captures of randomly chosen voters
+    targets = rng.choice(count, size=min(args.probes, count), replace=False)
+    noise = rng.standard_normal((len(targets), dim)).astype(np.float32)
+    noise *= args.noise * np.linalg.norm(enrolled[targets], axis=1, keepdims=True) / np.sqrt(dim)
+    probes = enrolled[targets] + noise
+    impostors = (targets + 1 + rng.integers(0, max(1, count - 1), size=len(targets))) % count
+
+    print("=" * 70)
+    print("Embedding Quantization Benchmark")
+    print("=" * 70)
+    print(f"Gallery: {count} x {dim}, probes: {len(targets)}, threshold: {SIMILARITY_THRESHOLD}")
+    print()
+
+    reference = {}
+    rows = []
+    for dtype in SUPPORTED_DTYPES:
+        storage = FaceStorage(db_path=":memory:", cache_size=0, embedding_dtype=dtype)
+        blob_bytes = len(storage._serialize_embedding(enrolled[0]))
+        storage.close()
+
+        gallery = FaceGallery(initial_capacity=count, dtype=dtype)
+        gallery.load(zip(voter_ids, enrolled))
+
+        stored = [normalize(enrolled[i], dtype) for i in range(count)]
+        genuine = np.array([cosine(probe, stored[t]) >= SIMILARITY_THRESHOLD for probe, t in zip(probes, targets)])
+        impostor = np.array([cosine(probe, stored[i]) >= SIMILARITY_THRESHOLD for probe, i in zip(probes, impostors)])
+        top1 = [gallery.search(probe, top_k=1)[0][0] for probe in probes]
+
+        if dtype == "float32":
+            reference = {'genuine': genuine, 'impostor': impostor, 'top1': top1}
+
+        rows.append((
+            dtype,
+            blob_bytes,
+            gallery.nbytes / (1024 * 1024),
+            np.mean(genuine == reference['genuine']),
+            np.mean(impostor == reference['impostor']),
+            np.mean([a == b for a, b in zip(top1, reference['top1'])]),
+        ))
+
+    base_memory = rows[0][2]
+    print(f"{'dtype':<9} {'BLOB (B)':<10} {'Gallery (MiB)':<15} {'Saved':<8} {'Verify gen.':<12} {'Verify imp.':<12} {'Top-1':<8}")
+    print("-" * 70)
+    for dtype, blob_bytes, memory, genuine, impostor, top1 in rows:
+        saved = 1.0 - memory / base_memory if base_memory else 0.0
+        print(f"{dtype:<9} {blob_bytes:<10} {memory:<15.1f} {saved:<8.0%} {genuine:<12.2%} {impostor:<12.2%} {top1:<8.2%}")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
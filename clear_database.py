@@ -1,5 +1,8 @@
 """
 Clear all face embeddings from the database.
+
+Usage:
+    python clear_database.py --yes [--vacuum]
 """
 
 import sys
@@ -31,18 +34,21 @@ def main():
     if not skip_confirm:
         print("To delete all entries, run with --yes flag:")
         print("  python clear_database.py --yes")
+        print("Add --vacuum to also shrink the database file.")
         return
     
+    vacuum = '--vacuum' in sys.argv
+    
     print("Deleting all entries...")
     
-    deleted_count = 0
-    for voter in voters:
-        success, error = storage.delete_embedding(voter['voter_id'])
-        if success:
-            print(f"  [OK] Deleted: {voter['voter_id']}")
-            deleted_count += 1
-        else:
-            print(f"  [FAIL] Failed to delete {voter['voter_id']}: {error}")
+    try:
+        deleted_count = storage.delete_all(vacuum=vacuum)
+    except Exception as e:
+        print(f"  [FAIL] Failed to delete entries: {e}")
+        sys.exit(1)
+    
+    if vacuum:
+        print("  [OK] Database vacuumed")
     
     print()
     print("=" * 70)
@@ -0,0 +1,57 @@
+"""
+Export the DeepFace VGG-Face embedding network to ONNX.
+
+The exported model is what FACE_EMBEDDER_BACKEND=vgg-onnx loads
+(FACE_ONNX_MODEL_PATH, default models/vgg_face.onnx). The batch dimension
+is left dynamic so micro-batched requests share one forward pass.
+
+Needs the TensorFlow stack plus tf2onnx, only on the machine doing the
+export:
+    pip install deepface tf-keras tf2onnx onnx
+
+Usage:
+    python export_onnx_model.py
+    python export_onnx_model.py --output models/vgg_face.onnx --opset 13
+"""
+
+import argparse
+import os
+
+from backend.face.onnx_embedder import ONNX_MODEL_PATH
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default=ONNX_MODEL_PATH, help="Where to write the ONNX model")
+    parser.add_argument("--opset", type=int, default=13, help="ONNX opset version")
+    args = parser.parse_args()
+
+    import tensorflow as tf
+    import tf2onnx
+    from backend.face.embedder import MODEL_NAME
+    from deepface import DeepFace
+
+    print("=" * 70)
+    print("Export Face Embedding Model to ONNX")
+    print("=" * 70)
+
+    print(f"Loading {MODEL_NAME} through DeepFace...")
+    keras_model = DeepFace.build_model(MODEL_NAME).model
+    input_shape = tuple(keras_model.input_shape[1:])
+    print(f"  Input shape: (batch, {', '.join(str(d) for d in input_shape)})")
+    print(f"  Output shape: {keras_model.output_shape}")
+
+    signature = (tf.TensorSpec((None,) + input_shape, tf.float32, name="input"),)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    print(f"Converting with opset {args.opset}...")
+    tf2onnx.convert.from_keras(keras_model, input_signature=signature, opset=args.opset, output_path=args.output)
+
+    size_mb = os.path.getsize(args.output) / (1024 * 1024)
+    print(f"✓ Wrote {args.output} ({size_mb:.1f} MB)")
+    print()
+    print("Next: python test_onnx_parity.py <face images> to compare against DeepFace")
+
+
+if __name__ == "__main__":
+    main()
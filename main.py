@@ -6,19 +6,39 @@ No Selenium needed - purely API-based approach.
 FastAPI Backend with EPIC/CAPTCHA functionality and Face Recognition endpoints.
 """
 
+import os
+import asyncio
+import functools
 import requests
 import json
 import base64
 import traceback
 from PIL import Image
 from io import BytesIO
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, File, Form, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import Optional
-from backend.face import get_embedder, get_storage
+from typing import Optional, List
+from backend.face import get_embedder, get_async_storage, get_gallery
+from backend.face import get_inference_executor, get_micro_batcher, get_backend, InferenceUnavailable
+from backend.face.ingest import ImageTooLargeError, MAX_IMAGE_BYTES, check_payload_size
+from backend.face.burst import BURST_MAX_FRAMES, verify_burst
+from backend.face.cascade import get_cascade_verifier
+from backend.face.stream import StreamVerifier
+from backend.face.quality import QUALITY_CHECKS_ON_REGISTRATION
+from backend.face.ann_index import DUPLICATE_SIMILARITY_THRESHOLD, DUPLICATE_ACTION, store_unique_embedding
+from backend.eci import build_search_body, extract_voter_details, get_eci_client, get_state_code
+from backend.eci.client import CAPTCHA_API_URL, HEADERS, PORTAL_URL, SEARCH_API_URL
 import numpy as np
 
+# Load and warm up the face model at startup (set to 0 to load on first request)
+PRELOAD_FACE_MODEL = os.environ.get("FACE_PRELOAD_MODEL", "1") == "1"
+
+# DeepFace's default ArcFace + cosine verification threshold is ~0.68
+# User requested override to 0.50
+SIMILARITY_THRESHOLD = 0.50
+
 
 class VoterIDFetcher:
     def __init__(self, epic_number, state=None):
@@ -36,27 +56,11 @@ class VoterIDFetcher:
         self.session = requests.Session()
         
         # API endpoints
-        self.captcha_api_url = "https://gateway-voters.eci.gov.in/api/v1/captcha-service/generateCaptcha"
-        self.search_api_url = "https://gateway-voters.eci.gov.in/api/v1/elastic/search-by-epic-from-national-display"
+        self.captcha_api_url = CAPTCHA_API_URL
+        self.search_api_url = SEARCH_API_URL
         
         # Set up session headers to match browser request
-        self.session.headers.update({
-            'accept': 'application/json, text/plain, */*',
-            'accept-language': 'en-IN,en;q=0.9,hi;q=0.8,mr;q=0.7',
-            'applicationname': 'ELECTORAL-SEARCH',
-            'appname': 'ELECTORAL-SEARCH',
-            'channelidobo': 'ELECTORAL-SEARCH',
-            'content-type': 'application/json',
-            'origin': 'https://electoralsearch.eci.gov.in',
-            'referer': 'https://electoralsearch.eci.gov.in/',
-            'sec-ch-ua': '"Google Chrome";v="143", "Chromium";v="143", "Not A(Brand";v="24"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"Windows"',
-            'sec-fetch-dest': 'empty',
-            'sec-fetch-mode': 'cors',
-            'sec-fetch-site': 'same-site',
-            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36'
-        })
+        self.session.headers.update(HEADERS)
         
     def establish_session(self):
         """
@@ -66,7 +70,7 @@ class VoterIDFetcher:
         try:
             # Visit the main page to get cookies
             response = self.session.get(
-                "https://electoralsearch.eci.gov.in/",
+                PORTAL_URL,
                 timeout=30
             )
             print(f"Session established. Status: {response.status_code}")
@@ -147,37 +151,9 @@ class VoterIDFetcher:
     
     def get_state_code(self, state_name):
         """
-        Map state name to state code.
-        Add more mappings as needed.
+        Map state name to state code (mappings live in backend/eci/client.py).
         """
-        state_mapping = {
-            "maharashtra": "S13",
-            "delhi": "S07",
-            "karnataka": "S10",
-            "tamil nadu": "S22",
-            "west bengal": "S25",
-            "uttar pradesh": "S24",
-            "gujarat": "S06",
-            "rajasthan": "S20",
-            "madhya pradesh": "S12",
-            "kerala": "S11",
-            "andhra pradesh": "S01",
-            "telangana": "S29",
-            "bihar": "S04",
-            "odisha": "S18",
-            "punjab": "S19",
-            "haryana": "S08",
-            "assam": "S03",
-            "jharkhand": "S09",
-            "chhattisgarh": "S26",
-            "uttarakhand": "S28",
-            "himachal pradesh": "S02",
-            "goa": "S05",
-            # Add more states as needed
-        }
-        
-        state_lower = state_name.lower().strip()
-        return state_mapping.get(state_lower)
+        return get_state_code(state_name)
     
     def get_captcha_input(self):
         """
@@ -202,22 +178,8 @@ class VoterIDFetcher:
             print("Error: CAPTCHA text or ID is missing!")
             return None
         
-        # Prepare request body - exact format from browser network inspection
-        request_body = {
-            "isPortal": True,  # Boolean flag indicating portal access
-            "epicNumber": self.epic_number.upper(),
-            "captchaData": self.captcha_text.lower(),
-            "captchaId": self.captcha_id,
-            "securityKey": "na"  # Fixed value as per API requirement
-        }
-        
-        # Add state code if provided
-        # Note: stateCd requires state code (e.g., "S13") not state name
-        # If state name is provided, we'll try to map it to state code
-        if self.state:
-            state_code = self.get_state_code(self.state)
-            if state_code:
-                request_body["stateCd"] = state_code
+        # Prepare request body (state name is mapped to its state code)
+        request_body = build_search_body(self.epic_number, self.captcha_text, self.captcha_id, self.state)
         
         print(f"Request body: {json.dumps(request_body, indent=2)}")
         print(f"Session cookies: {self.session.cookies.get_dict()}")
@@ -264,112 +226,7 @@ class VoterIDFetcher:
         """
         Extract and format voter details from API response.
         """
-        if not api_response:
-            return None
-        
-        print("Extracting voter details from API response...")
-        
-        # Check if there's an error or no results
-        if isinstance(api_response, dict):
-            # Check for error messages
-            if "message" in api_response:
-                message = str(api_response.get("message", ""))
-                if "not found" in message.lower() or "no data" in message.lower():
-                    print(f"API Message: {message}")
-                    return None
-            
-            # Check for success/error indicators
-            if "status" in api_response:
-                status = api_response.get("status")
-                if status and "error" in str(status).lower():
-                    error_msg = api_response.get("message", "Unknown error")
-                    print(f"API Error: {error_msg}")
-                    return None
-        
-        # Extract voter details - structure may vary, so we'll try multiple patterns
-        voter_data = {}
-        
-        # Common field mappings based on actual API response
-        field_mappings = {
-            'epic_number': ['epicNumber', 'epic', 'epicNo'],
-            'name': ['fullName', 'name', 'electorName', 'voterName'],
-            'first_name': ['applicantFirstName'],
-            'last_name': ['applicantLastName'],
-            'relative_name': ['relativeFullName', 'relativeName', 'relationName', 'fatherName', 'husbandName'],
-            'relation_type': ['relationType'],
-            'age': ['age'],
-            'gender': ['gender'],
-            'state': ['stateName', 'state'],
-            'district': ['districtValue', 'district', 'districtName'],
-            'assembly_constituency': ['asmblyName', 'assemblyConstituency', 'constituency', 'acName'],
-            'ac_number': ['acNumber'],
-            'parliament_constituency': ['prlmntName'],
-            'parliament_number': ['prlmntNo'],
-            'part_number': ['partNumber', 'partNo'],
-            'part_name': ['partName'],
-            'serial_number': ['partSerialNumber', 'serialNumber', 'serialNo', 'slNo'],
-            'section_number': ['sectionNo'],
-            'polling_station': ['psbuildingName', 'pollingStation', 'psName'],
-            'polling_station_address': ['buildingAddress'],
-            'polling_station_room': ['psRoomDetails'],
-            'part_lat_long': ['partLatLong', 'latLong'],
-        }
-        
-        # Try to extract from response
-        # The response is a list with objects containing "content" field
-        data_to_process = None
-        
-        if isinstance(api_response, list) and len(api_response) > 0:
-            # Get first result
-            first_result = api_response[0]
-            # The actual voter data is in the "content" field
-            if isinstance(first_result, dict) and "content" in first_result:
-                data_to_process = first_result["content"]
-            else:
-                data_to_process = first_result
-        elif isinstance(api_response, dict):
-            # Check if data is nested
-            if "content" in api_response:
-                data_to_process = api_response["content"]
-            elif "data" in api_response:
-                data_to_process = api_response["data"]
-                if isinstance(data_to_process, list) and len(data_to_process) > 0:
-                    data_to_process = data_to_process[0]
-                    if isinstance(data_to_process, dict) and "content" in data_to_process:
-                        data_to_process = data_to_process["content"]
-            elif "response" in api_response:
-                data_to_process = api_response["response"]
-                if isinstance(data_to_process, list) and len(data_to_process) > 0:
-                    data_to_process = data_to_process[0]
-            else:
-                data_to_process = api_response
-        
-        if data_to_process and isinstance(data_to_process, dict):
-            # Extract fields using mappings
-            for field_name, possible_keys in field_mappings.items():
-                for key in possible_keys:
-                    # Case-insensitive key matching
-                    for actual_key in data_to_process.keys():
-                        if key.lower() == actual_key.lower():
-                            value = data_to_process[actual_key]
-                            if value and str(value).strip() not in ['', 'N/A', 'NA', 'null', 'None']:
-                                voter_data[field_name] = str(value).strip()
-                                break
-                    if field_name in voter_data:
-                        break
-            
-            # If no structured data found, try to get all non-empty string values
-            if not voter_data:
-                print("Warning: Could not map fields using known keys. Extracting all fields...")
-                for key, value in data_to_process.items():
-                    if isinstance(value, (str, int)) and str(value).strip() not in ['', 'N/A', 'NA', 'null', 'None']:
-                        voter_data[key] = str(value).strip()
-        else:
-            # Fallback: return the raw response structure
-            print("Warning: Could not parse API response structure. Returning raw data.")
-            return api_response
-        
-        return voter_data if voter_data else None
+        return extract_voter_details(api_response)
     
     def run(self):
         """Main execution method."""
@@ -435,6 +292,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_warm_up_task = None
+
+
+@app.on_event("startup")
+async def start_inference():
+    """
+    Load and warm up the face model in the background.
+
+    Runs as a task so the server starts answering /health/live immediately;
+    /health/ready reports 503 until inference is warm.
+    """
+    global _warm_up_task
+    if PRELOAD_FACE_MODEL:
+        _warm_up_task = asyncio.create_task(get_inference_executor().warm_up())
+
+
+@app.on_event("shutdown")
+async def shutdown_inference():
+    """Stop inference worker processes."""
+    get_inference_executor().shutdown()
+
+
+@app.on_event("shutdown")
+async def close_eci_client():
+    """Close pooled connections to the ECI gateway."""
+    await get_eci_client().aclose()
+
 # Pydantic models for request/response
 class GenerateCaptchaResponse(BaseModel):
     success: bool
@@ -463,6 +347,8 @@ class FaceRegisterResponse(BaseModel):
     message: str
     voter_id: Optional[str] = None
     cropped_face: Optional[str] = None  # Base64 encoded cropped face image
+    duplicate_of: Optional[str] = None  # voter_id with a near-identical face (flag mode)
+    duplicate_similarity: Optional[float] = None
 
 class FaceVerifyRequest(BaseModel):
     voter_id: str
@@ -474,6 +360,41 @@ class FaceVerifyResponse(BaseModel):
     confidence: Optional[float] = None
     message: str
     cropped_face: Optional[str] = None  # Base64 encoded cropped face image
+    stage: Optional[int] = None  # 1 = decided by the fast cascade model, 2 = full model
+
+class FaceVerifyBurstRequest(BaseModel):
+    voter_id: str
+    images: List[str]  # base64 encoded frames, in capture order
+
+class FaceBurstFrame(BaseModel):
+    index: int
+    similarity: Optional[float] = None  # None if the frame was unusable
+    elapsed_ms: float
+    error: Optional[str] = None
+
+class FaceVerifyBurstResponse(BaseModel):
+    success: bool
+    verified: bool
+    confidence: Optional[float] = None
+    message: str
+    decision: str  # "accepted" / "rejected" (stopped early) or "aggregated"
+    frames_received: int
+    frames_processed: int
+    frames: List[FaceBurstFrame] = []
+
+class FaceIdentifyRequest(BaseModel):
+    image: str  # base64 encoded image
+    top_k: int = 5  # number of candidate voter_ids to return
+
+class FaceIdentifyMatch(BaseModel):
+    voter_id: str
+    similarity: float
+    above_threshold: bool
+
+class FaceIdentifyResponse(BaseModel):
+    success: bool
+    matches: List[FaceIdentifyMatch] = []
+    message: str
 
 # FastAPI Endpoints
 
@@ -487,10 +408,62 @@ async def root():
             "generate_captcha": "GET /captcha/generate",
             "search_voter": "POST /voter/search",
             "face_register": "POST /face/register",
-            "face_verify": "POST /face/verify"
+            "face_register_upload": "POST /face/register/upload (multipart)",
+            "face_verify": "POST /face/verify",
+            "face_verify_upload": "POST /face/verify/upload (multipart)",
+            "face_verify_burst": "POST /face/verify/burst",
+            "face_verify_burst_upload": "POST /face/verify/burst/upload (multipart)",
+            "face_verify_stream": "WS /face/verify/stream?voter_id=...",
+            "face_identify": "POST /face/identify",
+            "face_metrics": "GET /face/metrics",
+            "health_live": "GET /health/live",
+            "health_ready": "GET /health/ready"
         }
     }
 
+@app.get("/health/live")
+async def health_live():
+    """Liveness probe: the process is up and serving HTTP."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def health_ready():
+    """
+    Readiness probe: route traffic here only once face inference is warm
+    and the embedding database answers.
+    """
+    executor = get_inference_executor()
+    checks = {"inference": executor.ready, "storage": False}
+
+    try:
+        await get_async_storage().get_count()
+        checks["storage"] = True
+    except Exception as e:
+        print(f"Readiness storage check failed: {e}")
+
+    if not PRELOAD_FACE_MODEL and not executor.ready:
+        # Model loads lazily on first request; nothing to wait for
+        checks["inference"] = True
+
+    ready = all(checks.values())
+    content = {"status": "ready" if ready else "starting", "checks": checks}
+    if executor.warm_up_error:
+        content["error"] = executor.warm_up_error
+    return JSONResponse(status_code=200 if ready else 503, content=content)
+
+@app.get("/face/metrics")
+async def face_metrics():
+    """
+    Inference counters: worker pool, micro-batching, the content-hash
+    result cache (hit_rate shows how many uploads were resends), and how
+    often the cascade's fast stage decided on its own.
+    """
+    return {
+        "inference": get_inference_executor().stats(),
+        "batching": get_micro_batcher().stats(),
+        "cascade": get_cascade_verifier().stats()
+    }
+
 @app.get("/captcha/generate", response_model=GenerateCaptchaResponse)
 async def generate_captcha():
     """
@@ -498,38 +471,11 @@ async def generate_captcha():
     Returns base64 encoded CAPTCHA image and session ID.
     """
     try:
-        # Create a temporary fetcher instance
-        fetcher = VoterIDFetcher(epic_number="dummy", state=None)
-        
-        # Establish session
-        if not fetcher.establish_session():
-            return GenerateCaptchaResponse(
-                success=False,
-                error="Failed to establish session with ECI website"
-            )
-        
-        # Generate CAPTCHA
-        if not fetcher.generate_captcha():
-            return GenerateCaptchaResponse(
-                success=False,
-                error="Failed to generate CAPTCHA"
-            )
-        
-        # Get the CAPTCHA data from the saved file
-        try:
-            with open("captcha.png", "rb") as f:
-                captcha_image_data = f.read()
-                captcha_base64 = base64.b64encode(captcha_image_data).decode('utf-8')
-        except Exception as e:
-            return GenerateCaptchaResponse(
-                success=False,
-                error=f"Failed to read CAPTCHA image: {str(e)}"
-            )
-        
+        captcha_base64, captcha_id = await get_eci_client().generate_captcha()
         return GenerateCaptchaResponse(
             success=True,
             captcha=captcha_base64,
-            id=fetcher.captcha_id
+            id=captcha_id
         )
     except Exception as e:
         return GenerateCaptchaResponse(
@@ -544,24 +490,17 @@ async def search_voter(request: SearchVoterRequest):
     Requires CAPTCHA text and CAPTCHA ID from generate_captcha endpoint.
     """
     try:
-        # Create fetcher instance
-        fetcher = VoterIDFetcher(epic_number=request.epicNumber, state=request.state)
-        fetcher.captcha_text = request.captchaText
-        fetcher.captcha_id = request.captchaId
-        
-        # Establish session
-        if not fetcher.establish_session():
-            return SearchVoterResponse(
-                success=False,
-                error="Failed to establish session with ECI website"
-            )
-        
-        # Call search API
-        api_response = fetcher.call_search_api()
+        # Call search API through the shared gateway client
+        api_response = await get_eci_client().search_by_epic(
+            request.epicNumber,
+            request.captchaText,
+            request.captchaId,
+            state=request.state
+        )
         
         if api_response:
             # Extract voter details
-            voter_details = fetcher.extract_voter_details(api_response)
+            voter_details = extract_voter_details(api_response)
             
             if voter_details:
                 return SearchVoterResponse(
@@ -584,63 +523,346 @@ async def search_voter(request: SearchVoterRequest):
             error=str(e)
         )
 
+async def _generate_embedding(image, check_quality: bool = True):
+    """
+    Generate an embedding on the inference worker pool (not the event loop),
+    mapping ingest/inference failures to HTTP errors.
+
+    Args:
+        image: Base64 encoded image (JSON endpoints) or raw bytes (upload endpoints)
+        check_quality: False to skip the quality pre-filter (registration photos)
+    """
+    try:
+        return await get_micro_batcher().generate_embedding(image, check_quality=check_quality)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        # DeepFace will raise if no face or multiple faces are detected
+        raise HTTPException(status_code=400, detail=str(e))
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+async def _read_upload(image: UploadFile) -> bytes:
+    """
+    Read an uploaded image into a single bytes object, refusing to read
+    past the ingest size limit.
+    """
+    data = await image.read(MAX_IMAGE_BYTES + 1)
+    if not data:
+        raise HTTPException(status_code=400, detail="image file is required")
+    if len(data) > MAX_IMAGE_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Image is larger than the {MAX_IMAGE_BYTES / (1024 * 1024):.1f} MB limit"
+        )
+    return data
+
+async def _register_face(voter_id: str, full_name: Optional[str], image) -> FaceRegisterResponse:
+    """
+    Register a face for a voter ID (shared by the JSON and upload endpoints).
+    
+    Flow:
+    1. Reject voter_ids that are already registered
+    2. Use DeepFace to detect exactly one face and generate embedding
+    3. Check the ANN index for the same face under another voter_id
+       (rejected or flagged depending on FACE_DUPLICATE_ACTION) and
+    4. Store embedding in DB (rejects if voter_id already exists), with
+       3 and 4 done as one atomic step
+    5. Store the cascade's fast-model embedding (if the cascade is enabled)
+    6. Return success response
+    """
+    # Step 1: Check if voter_id already exists (duplicate check)
+    # Database calls run on the storage thread pool, not the event loop
+    storage = get_async_storage()
+    if await storage.voter_exists(voter_id):
+        raise HTTPException(
+            status_code=400, 
+            detail=f"Duplicate registration: voter_id '{voter_id}' already exists in database"
+        )
+    
+    # Step 2: Generate embedding from the image using DeepFace
+    # (the webcam quality gate is off for registration photos by default)
+    embedding = await _generate_embedding(image, check_quality=QUALITY_CHECKS_ON_REGISTRATION)
+    
+    # Steps 3-4: Look for the same face registered under a different voter_id
+    # and store the embedding, atomically and off the event loop (the index
+    # is built from the database on first use)
+    # Use full_name from the request or voter_id as fallback
+    full_name = full_name.strip() if full_name else voter_id
+    _check_gallery_dimension(await storage.run(get_gallery, storage.storage), embedding)
+    
+    result = await storage.run(
+        store_unique_embedding,
+        storage.storage,
+        voter_id,
+        full_name,
+        embedding,
+        model_name=get_backend().model_name,
+        threshold=DUPLICATE_SIMILARITY_THRESHOLD,
+        action=DUPLICATE_ACTION
+    )
+    duplicate_of, duplicate_similarity = result.duplicate_of, result.duplicate_similarity
+    
+    if not result.stored and duplicate_of:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"Duplicate face: this face is already registered under voter_id '{duplicate_of}' "
+                f"(similarity: {duplicate_similarity:.2%})"
+            )
+        )
+    
+    if not result.stored:
+        raise HTTPException(status_code=400, detail=result.error)
+    
+    # Step 5: Store the fast model's embedding for cascade verification
+    await _store_cascade_embedding(voter_id, image)
+    
+    # Step 6: Return success response
+    message = f"Face successfully registered for voter_id: {voter_id}"
+    if duplicate_of:
+        message += f" (flagged: face matches voter_id '{duplicate_of}')"
+    
+    return FaceRegisterResponse(
+        success=True,
+        message=message,
+        voter_id=voter_id,
+        cropped_face=None,
+        duplicate_of=duplicate_of,
+        duplicate_similarity=duplicate_similarity
+    )
+
+async def _store_cascade_embedding(voter_id: str, image):
+    """
+    Store the fast model's embedding for a newly registered voter.
+    
+    Best effort: a voter without one is simply verified by the full model.
+    """
+    cascade = get_cascade_verifier()
+    if not cascade.enabled:
+        return
+    
+    try:
+        embedding = await get_micro_batcher().generate_embedding(
+            image, backend=cascade.backend, check_quality=QUALITY_CHECKS_ON_REGISTRATION
+        )
+    except (ValueError, InferenceUnavailable) as e:
+        print(f"Skipping cascade embedding for voter_id '{voter_id}': {e}")
+        return
+    
+    success, error = await get_async_storage().store_secondary_embedding(voter_id, cascade.model_name, embedding)
+    if not success:
+        print(f"Error storing cascade embedding for voter_id '{voter_id}': {error}")
+
+async def _verify_face(voter_id: str, image) -> FaceVerifyResponse:
+    """
+    Verify a face against a registered voter ID (shared by the JSON and
+    upload endpoints).
+    """
+    # Step 1: Check if voter_id exists in database
+    registered_data = await _get_registered_face(voter_id)
+    
+    # Step 2: Get registered embeddings (the fast model's one if the cascade is on)
+    registered_embedding = registered_data['embedding']
+    cascade = get_cascade_verifier()
+    registered_fast = None
+    if cascade.enabled:
+        registered_fast = await get_async_storage().get_secondary_embedding(voter_id, cascade.model_name)
+    
+    # Step 3: Embed the captured face and compare with cosine similarity;
+    # the full model only runs when the fast stage is not conclusive
+    embedder = get_embedder()
+    similarity_threshold = SIMILARITY_THRESHOLD
+    try:
+        result = await cascade.verify(
+            image,
+            registered_fast,
+            registered_embedding,
+            embed_fast=functools.partial(get_micro_batcher().generate_embedding, backend=cascade.backend),
+            embed_full=_generate_embedding,
+            compare=embedder.compare_embeddings,
+            threshold=similarity_threshold,
+        )
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    verified = result.verified
+    confidence = result.similarity
+    
+    # Step 4: Return verification result
+    if verified:
+        message = f"Face verified successfully! Similarity: {confidence:.2%}"
+    elif result.stage == 1:
+        message = f"Face verification failed. Similarity: {confidence:.2%} (fast check)"
+    else:
+        message = f"Face verification failed. Similarity: {confidence:.2%} (threshold: {similarity_threshold:.2%})"
+    
+    return FaceVerifyResponse(
+        success=True,
+        verified=verified,
+        confidence=confidence,
+        message=message,
+        cropped_face=None,
+        stage=result.stage
+    )
+
+def _check_gallery_dimension(gallery, embedding):
+    """
+    Reject (409) an embedding whose size differs from the gallery's rows.
+    
+    The gallery only holds the active model's embeddings (plus legacy rows
+    without a recorded model), so a mismatch means those rows came from
+    another model and cannot be compared.
+    """
+    dimension = np.asarray(embedding).size
+    if gallery.dimension is not None and dimension != gallery.dimension:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"Embedding has {dimension} dimensions, but the registered faces have "
+                f"{gallery.dimension}: they were made by a model other than the server's "
+                f"'{get_backend().model_name}' and must be registered again."
+            )
+        )
+
+async def _get_registered_face(voter_id: str) -> dict:
+    """
+    Load a voter's registered embedding, rejecting unknown voter_ids (404)
+    and embeddings made by a different model (409).
+    """
+    storage = get_async_storage()
+    registered_data = await storage.get_embedding(voter_id)
+    
+    if not registered_data:
+        raise HTTPException(
+            status_code=404,
+            detail=f"voter_id '{voter_id}' not found in database. Please register first."
+        )
+    
+    # Embeddings from different models are not comparable
+    model_name = get_backend().model_name
+    registered_model = registered_data.get('model_name')
+    if registered_model and registered_model != model_name:
+        raise HTTPException(
+            status_code=409,
+            detail=(
+                f"voter_id '{voter_id}' was registered with model '{registered_model}', "
+                f"but the server now uses '{model_name}'. Please register again."
+            )
+        )
+    return registered_data
+
+async def _verify_face_burst(voter_id: str, images: list) -> FaceVerifyBurstResponse:
+    """
+    Verify a burst of frames against a registered voter ID (shared by the
+    JSON and upload endpoints), stopping at the first conclusive frame.
+    """
+    if not images:
+        raise HTTPException(status_code=400, detail="at least one image is required")
+    if len(images) > BURST_MAX_FRAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BURST_MAX_FRAMES} frames can be verified in one burst"
+        )
+    
+    # Reject oversized frames before any inference runs
+    try:
+        for image in images:
+            check_payload_size(image)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    registered_data = await _get_registered_face(voter_id)
+    
+    embedder = get_embedder()
+    try:
+        result = await verify_burst(
+            images,
+            registered_data['embedding'],
+            embed=get_micro_batcher().generate_embedding,
+            compare=embedder.compare_embeddings,
+            threshold=SIMILARITY_THRESHOLD,
+        )
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    if result.similarity is None:
+        # No frame had a usable face: same answer as a single failed verify
+        raise HTTPException(status_code=400, detail=result.frames[-1].error)
+    
+    confidence = result.similarity
+    processed = len(result.frames)
+    if result.verified:
+        message = f"Face verified successfully! Similarity: {confidence:.2%} ({processed} of {len(images)} frames)"
+    else:
+        message = (
+            f"Face verification failed. Similarity: {confidence:.2%} "
+            f"(threshold: {SIMILARITY_THRESHOLD:.2%}, {processed} of {len(images)} frames)"
+        )
+    
+    return FaceVerifyBurstResponse(
+        success=True,
+        verified=result.verified,
+        confidence=confidence,
+        message=message,
+        decision=result.decision,
+        frames_received=len(images),
+        frames_processed=processed,
+        frames=[FaceBurstFrame(**frame._asdict()) for frame in result.frames]
+    )
+
 @app.post("/face/register", response_model=FaceRegisterResponse)
 async def face_register(request: FaceRegisterRequest):
     """
     Register a face for a voter ID.
     
-    Flow:
-    1. Accept voter_id and base64 image
-    2. Use DeepFace (ArcFace + RetinaFace) to detect exactly one face and generate embedding
-    3. Store embedding in DB (rejects if voter_id already exists)
-    4. Return success response
+    Accepts voter_id and a base64 image in a JSON body. Prefer
+    POST /face/register/upload for new clients: it sends the raw image
+    without the base64 overhead.
     """
     try:
-        # Step 1: Validate inputs
+        # Validate inputs
         if not request.voter_id or not request.voter_id.strip():
             raise HTTPException(status_code=400, detail="voter_id is required")
         
         if not request.image or not request.image.strip():
             raise HTTPException(status_code=400, detail="image (base64) is required")
         
-        voter_id = request.voter_id.strip()
-        
-        # Check if voter_id already exists (duplicate check)
-        storage = get_storage()
-        if storage.voter_exists(voter_id):
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Duplicate registration: voter_id '{voter_id}' already exists in database"
-            )
+        return await _register_face(request.voter_id.strip(), request.full_name, request.image)
         
-        # Step 2: Generate embedding from base64 image using DeepFace
-        embedder = get_embedder()
-        try:
-            embedding = embedder.generate_embedding_from_base64(request.image)
-        except ValueError as e:
-            # DeepFace will raise if no face or multiple faces are detected
-            raise HTTPException(status_code=400, detail=str(e))
-        
-        # Step 3: Store embedding in DB
-        # Get full_name from request or use voter_id as fallback
-        full_name = request.full_name.strip() if request.full_name else voter_id
-        
-        store_success, store_error = storage.store_embedding(
-            voter_id=voter_id,
-            full_name=full_name,
-            embedding=embedding
+    except HTTPException:
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during face processing"
         )
+
+@app.post("/face/register/upload", response_model=FaceRegisterResponse)
+async def face_register_upload(
+    voter_id: str = Form(...),
+    image: UploadFile = File(...),
+    full_name: Optional[str] = Form(None)
+):
+    """
+    Register a face for a voter ID from a multipart/form-data upload.
+    
+    Same flow as POST /face/register, but the image arrives as raw JPEG/PNG
+    bytes and is decoded directly, with no base64 string or JSON parsing.
+    """
+    try:
+        if not voter_id or not voter_id.strip():
+            raise HTTPException(status_code=400, detail="voter_id is required")
         
-        if not store_success:
-            raise HTTPException(status_code=400, detail=store_error)
-        
-        # Step 4: Return success response
-        return FaceRegisterResponse(
-            success=True,
-            message=f"Face successfully registered for voter_id: {voter_id}",
-            voter_id=voter_id,
-            cropped_face=None
-        )
+        data = await _read_upload(image)
+        return await _register_face(voter_id.strip(), full_name, data)
         
     except HTTPException:
         raise
@@ -667,51 +889,236 @@ async def face_verify(request: FaceVerifyRequest):
         if not request.image or not request.image.strip():
             raise HTTPException(status_code=400, detail="image (base64) is required")
         
-        voter_id = request.voter_id.strip()
+        return await _verify_face(request.voter_id.strip(), request.image)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during face processing"
+        )
+
+@app.post("/face/verify/upload", response_model=FaceVerifyResponse)
+async def face_verify_upload(
+    voter_id: str = Form(...),
+    image: UploadFile = File(...)
+):
+    """
+    Verify a face against a registered voter ID from a multipart/form-data
+    upload (raw image bytes instead of base64 JSON).
+    """
+    try:
+        if not voter_id or not voter_id.strip():
+            raise HTTPException(status_code=400, detail="voter_id is required")
         
-        # Step 1: Check if voter_id exists in database
-        storage = get_storage()
-        registered_data = storage.get_embedding(voter_id)
+        data = await _read_upload(image)
+        return await _verify_face(voter_id.strip(), data)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during face processing"
+        )
+
+@app.post("/face/verify/burst", response_model=FaceVerifyBurstResponse)
+async def face_verify_burst(request: FaceVerifyBurstRequest):
+    """
+    Verify a short burst of webcam frames against a registered voter ID.
+    - Accepts voter_id and up to FACE_BURST_MAX_FRAMES base64 frames.
+    - Frames are embedded in order; a clear match verifies after one
+      inference and a clear mismatch stops early, so only borderline
+      captures pay for extra frames.
+    - Returns the similarity and timing of every frame processed.
+    """
+    try:
+        if not request.voter_id or not request.voter_id.strip():
+            raise HTTPException(status_code=400, detail="voter_id is required")
         
-        if not registered_data:
+        images = [image for image in request.images if image and image.strip()]
+        return await _verify_face_burst(request.voter_id.strip(), images)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during face processing"
+        )
+
+@app.post("/face/verify/burst/upload", response_model=FaceVerifyBurstResponse)
+async def face_verify_burst_upload(
+    voter_id: str = Form(...),
+    images: List[UploadFile] = File(...)
+):
+    """
+    Burst verification from a multipart/form-data upload (one "images"
+    part per frame, in capture order).
+    """
+    try:
+        if not voter_id or not voter_id.strip():
+            raise HTTPException(status_code=400, detail="voter_id is required")
+        if len(images) > BURST_MAX_FRAMES:
             raise HTTPException(
-                status_code=404,
-                detail=f"voter_id '{voter_id}' not found in database. Please register first."
+                status_code=400,
+                detail=f"At most {BURST_MAX_FRAMES} frames can be verified in one burst"
             )
         
-        # Step 2: Generate embedding from captured face using DeepFace
-        embedder = get_embedder()
+        frames = [await _read_upload(image) for image in images]
+        return await _verify_face_burst(voter_id.strip(), frames)
+    except HTTPException:
+        raise
+    except Exception as exc:
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error during face processing"
+        )
+
+@app.websocket("/face/verify/stream")
+async def face_verify_stream(websocket: WebSocket, voter_id: str = ""):
+    """
+    Verify a voter from a live stream of webcam frames.
+    
+    Protocol:
+    - Connect with ?voter_id=...; the server answers {"type": "ready"}
+      (or {"type": "error", "status": 404/409, ...} and closes)
+    - Send frames as binary messages (raw JPEG/PNG) or text messages
+      (base64), as fast as the camera delivers them
+    - The server tracks the face box across frames, skips frames without
+      a face or failing the quality gates, and only embeds the rest;
+      every processed frame is answered with {"type": "frame", ...}
+      (status, reason, box, similarity)
+    - As soon as the outcome is clear the server sends
+      {"type": "verdict", ...} and closes the connection
+    """
+    await websocket.accept()
+    
+    async def fail(status_code: int, detail: str):
+        await websocket.send_json({"type": "error", "status": status_code, "detail": detail})
+        await websocket.close(code=1008 if status_code < 500 else 1011)
+    
+    try:
+        voter_id = voter_id.strip()
+        if not voter_id:
+            await fail(400, "voter_id is required")
+            return
+        try:
+            registered_data = await _get_registered_face(voter_id)
+        except HTTPException as e:
+            await fail(e.status_code, e.detail)
+            return
+        
+        verifier = StreamVerifier(
+            registered_data['embedding'],
+            embed=get_inference_executor().generate_frame_embedding,
+            compare=get_embedder().compare_embeddings,
+            threshold=SIMILARITY_THRESHOLD,
+        )
+        
+        async def receive():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return None
+            if message.get("bytes") is not None:
+                return message["bytes"]
+            return message.get("text") or ""
+        
+        async def on_frame(frame):
+            await websocket.send_json({"type": "frame", **frame._asdict()})
+        
+        await websocket.send_json({
+            "type": "ready",
+            "voter_id": voter_id,
+            "max_inferences": verifier.max_inferences,
+            "timeout": verifier.timeout
+        })
         try:
-            captured_embedding = embedder.generate_embedding_from_base64(request.image)
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
+            result = await verifier.run(receive, on_frame)
+        except InferenceUnavailable as e:
+            await fail(503, str(e))
+            return
         
-        # Step 3: Get registered embedding
-        registered_embedding = registered_data['embedding']
+        if result is None:
+            # Client closed the stream before a verdict
+            return
         
-        # Step 4: Compare embeddings using cosine similarity
-        similarity = embedder.compare_embeddings(captured_embedding, registered_embedding)
+        if result.similarity is None:
+            message = "No usable face in the stream. Please look straight at the camera and try again."
+        elif result.verified:
+            message = f"Face verified successfully! Similarity: {result.similarity:.2%}"
+        else:
+            message = (
+                f"Face verification failed. Similarity: {result.similarity:.2%} "
+                f"(threshold: {SIMILARITY_THRESHOLD:.2%})"
+            )
+        await websocket.send_json({
+            "type": "verdict",
+            **result._asdict(),
+            "confidence": result.similarity,
+            "message": message,
+            "tracking": verifier.tracker.stats()
+        })
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        traceback.print_exc()
+        try:
+            await fail(500, "Internal server error during face processing")
+        except Exception:
+            pass
+
+@app.post("/face/identify", response_model=FaceIdentifyResponse)
+async def face_identify(request: FaceIdentifyRequest):
+    """
+    Identify a face against all registered voters (1:N search).
+    - Accepts a base64 encoded image and the number of candidates to return.
+    - Scores the probe against the in-memory gallery with one matrix-vector product.
+    - Returns the top-k voter_ids ordered by cosine similarity.
+    """
+    try:
+        if not request.image or not request.image.strip():
+            raise HTTPException(status_code=400, detail="image (base64) is required")
+        
+        if request.top_k < 1 or request.top_k > 100:
+            raise HTTPException(status_code=400, detail="top_k must be between 1 and 100")
         
-        # DeepFace's default ArcFace + cosine verification threshold is ~0.68
-        # DeepFace's default ArcFace + cosine verification threshold is ~0.68
-        # User requested override to 0.50
-        similarity_threshold = 0.50
+        # Step 1: Load (or reuse) the in-memory gallery
+        storage = get_async_storage()
+        gallery = await storage.run(get_gallery, storage.storage)
+        if len(gallery) == 0:
+            raise HTTPException(status_code=404, detail="No faces registered in database")
         
-        verified = similarity >= similarity_threshold
-        confidence = float(similarity)
+        # Step 2: Generate embedding from captured face using DeepFace
+        probe_embedding = await _generate_embedding(request.image)
+        
+        _check_gallery_dimension(gallery, probe_embedding)
+        
+        # Step 3: Score against every registered voter at once
+        # (a full-gallery scan, so it runs on the storage pool, off the event loop)
+        similarity_threshold = SIMILARITY_THRESHOLD
+        results = await storage.run(gallery.search, probe_embedding, top_k=request.top_k)
+        matches = [
+            FaceIdentifyMatch(
+                voter_id=voter_id,
+                similarity=similarity,
+                above_threshold=similarity >= similarity_threshold
+            )
+            for voter_id, similarity in results
+        ]
         
-        # Step 7: Return verification result
-        if verified:
-            message = f"Face verified successfully! Similarity: {confidence:.2%}"
+        if matches and matches[0].above_threshold:
+            message = f"Best match: {matches[0].voter_id} (similarity: {matches[0].similarity:.2%})"
         else:
-            message = f"Face verification failed. Similarity: {confidence:.2%} (threshold: {similarity_threshold:.2%})"
+            message = f"No match above threshold ({similarity_threshold:.2%})"
         
-        return FaceVerifyResponse(
+        return FaceIdentifyResponse(
             success=True,
-            verified=verified,
-            confidence=confidence,
-            message=message,
-            cropped_face=None
+            matches=matches,
+            message=message
         )
     except HTTPException:
         raise
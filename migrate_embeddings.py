@@ -0,0 +1,43 @@
+"""
+Migrate face embeddings from legacy JSON TEXT rows to binary BLOBs.
+
+Rows are written in the configured FACE_EMBEDDING_DTYPE (float32 by
+default; float16 or int8 give smaller BLOBs), the same representation new
+registrations use.
+
+Safe to run while the API is serving requests: rows are converted in small
+transactions and the storage layer reads both formats. Re-running is a no-op
+once every row has been converted.
+"""
+
+import sys
+from backend.face import get_storage
+
+def main():
+    print("=" * 70)
+    print("Migrating Face Embeddings to Binary Format")
+    print("=" * 70)
+    print()
+    
+    storage = get_storage()
+    pending = storage.count_legacy_rows()
+    
+    if pending == 0:
+        print("All embeddings are already stored in binary format.")
+        return
+    
+    print(f"Found {pending} embedding(s) stored as JSON.")
+    print(f"Converting to {storage.embedding_dtype} BLOBs...")
+    
+    migrated, failed = storage.migrate_embeddings_to_blob()
+    
+    print()
+    print("=" * 70)
+    print(f"Migration complete! Converted {migrated} embedding(s) to {storage.embedding_dtype}, {failed} failed.")
+    print("=" * 70)
+    
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Profile the registered embedder backends (model/detector pairs).
+
+Each backend runs in its own fresh Python process so memory numbers are
+not polluted by another framework. Reports, per backend:
+- Load time: imports + model load (what a cold start pays)
+- Peak RSS after loading and after inference
+- Per-image latency (p50 / p95 / mean) for single-image embedding
+- Batched throughput through generate_embeddings_batch()
+
+With --max-rss-mb it recommends the fastest backend that fits the memory
+budget; set FACE_EMBEDDER_BACKEND to that name.
+
+Usage:
+    python profile_backends.py --list
+    python profile_backends.py face.jpg
+    python profile_backends.py face.jpg --max-rss-mb 450
+    python profile_backends.py face.jpg --runs 50 --batch 8 --backends vgg-opencv vgg-onnx
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_child(backend: str, image_path: str, runs: int, batch: int):
+    """Measure one backend inside this (fresh) process and print a JSON result."""
+    start = time.perf_counter()
+    import cv2
+    from backend.face.backends import create_embedder
+
+    embedder = create_embedder(backend)
+    embedder.load_model()
+    load_time = time.perf_counter() - start
+    rss_loaded = peak_rss_mb()
+
+    image = cv2.imread(image_path)
+    if image is None:
+        raise SystemExit(f"Cannot read image: {image_path}")
+
+    # First call pays for graph tracing / allocation; report it separately
+    start = time.perf_counter()
+    embedder.generate_embedding_from_image(image)
+    first_call = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        embedder.generate_embedding_from_image(image)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch_runs = max(1, runs // batch)
+    for _ in range(batch_runs):
+        embedder.generate_embeddings_batch([image] * batch)
+    batch_elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    print(json.dumps({
+        'backend': backend,
+        'load_s': load_time,
+        'first_call_s': first_call,
+        'rss_loaded_mb': rss_loaded,
+        'rss_peak_mb': peak_rss_mb(),
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        'mean_ms': sum(latencies) / len(latencies) * 1000,
+        'batch_images_per_s': batch_runs * batch / batch_elapsed,
+    }))
+
+
+def list_backends():
+    """Print every registered backend and whether it can run here."""
+    from backend.face.backends import BACKENDS, EMBEDDER_BACKEND, get_backend, is_installed
+
+    active = get_backend(EMBEDDER_BACKEND).name
+    print(f"{'backend':<20} {'model':<12} {'detector':<11} {'dim':>5}  {'installed':<9} description")
+    for backend in BACKENDS.values():
+        marker = "*" if backend.name == active else " "
+        print(f"{marker}{backend.name:<19} {backend.model_name:<12} {backend.detector_backend:<11} "
+              f"{backend.embedding_dim:>5}  {'yes' if is_installed(backend) else 'no':<9} {backend.description}")
+    print()
+    print("* = active (FACE_EMBEDDER_BACKEND)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("image", nargs="?", help="Image containing exactly one face")
+    parser.add_argument("--runs", type=int, default=20, help="Timed single-image inferences per backend")
+    parser.add_argument("--batch", type=int, default=8, help="Batch size for the throughput test")
+    parser.add_argument("--backends", nargs="+", help="Backends to profile (default: all installed)")
+    parser.add_argument("--max-rss-mb", type=float, help="Memory budget used for the recommendation")
+    parser.add_argument("--list", action="store_true", help="List registered backends and exit")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.list:
+        list_backends()
+        return
+    if not args.image:
+        parser.error("image is required unless --list is given")
+
+    if args.child:
+        run_child(args.child, args.image, args.runs, args.batch)
+        return
+
+    from backend.face.backends import get_backend, installed_backends
+
+    names = args.backends or [backend.name for backend in installed_backends()]
+    for name in names:
+        get_backend(name)  # fail fast on typos
+    if not names:
+        print("No backends are installed (pip install deepface tf-keras, or onnxruntime)")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("Embedder Backend Profile")
+    print("=" * 70)
+    print(f"Image: {args.image}, runs: {args.runs}, batch: {args.batch}")
+    print(f"Backends: {', '.join(names)}")
+    print()
+
+    results = []
+    for backend in names:
+        print(f"Running {backend}...")
+        proc = subprocess.run(
+            [sys.executable, __file__, args.image, "--runs", str(args.runs),
+             "--batch", str(args.batch), "--child", backend],
+            capture_output=True, text=True
+        )
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            print(f"✗ {backend} failed:")
+            print(proc.stderr.strip()[-2000:])
+            continue
+        results.append(json.loads(lines[-1]))
+
+    if not results:
+        sys.exit(1)
+
+    print()
+    print(f"{'backend':<20} {'load s':>8} {'1st call s':>11} {'RSS load MB':>12} {'RSS peak MB':>12} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'batch img/s':>12}")
+    for r in results:
+        print(f"{r['backend']:<20} {r['load_s']:>8.2f} {r['first_call_s']:>11.2f} {r['rss_loaded_mb']:>12.0f} "
+              f"{r['rss_peak_mb']:>12.0f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['batch_images_per_s']:>12.1f}")
+
+    if args.max_rss_mb:
+        fitting = [r for r in results if r['rss_peak_mb'] <= args.max_rss_mb]
+        print()
+        if fitting:
+            best = min(fitting, key=lambda r: r['p50_ms'])
+            print(f"✓ Fastest backend within {args.max_rss_mb:.0f} MB: {best['backend']} "
+                  f"(peak RSS {best['rss_peak_mb']:.0f} MB, p50 {best['p50_ms']:.1f} ms)")
+            print(f"  Set FACE_EMBEDDER_BACKEND={best['backend']}")
+        else:
+            print(f"✗ No profiled backend fits within {args.max_rss_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
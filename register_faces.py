@@ -5,7 +5,8 @@ Purpose:
 - Batch register face embeddings from images into SQLite database
 - Loads images from ./registration_images/ directory
 - Extracts voter_id from filename (without extension)
-- Detects faces, generates embeddings, and stores in database
+- Detects faces, generates embeddings, and stores them in database in
+  batches (one transaction per batch)
 
 Requirements:
 - Images should be in ./registration_images/ directory
@@ -23,6 +24,7 @@ import numpy as np
 
 # Import existing face detection, embedding, and storage modules
 from backend.face import get_detector, get_embedder, get_storage
+from backend.face.quality import QUALITY_CHECKS_ON_REGISTRATION, check_image_quality
 
 
 def get_image_files(directory: str) -> list:
@@ -103,29 +105,29 @@ def image_to_base64(image: np.ndarray) -> str:
     return f"data:image/jpeg;base64,{image_base64}"
 
 
-def register_face_from_image(
+def generate_face_embedding(
     image_path: Path,
     embedder,
-    storage,
+    existing_voter_ids: set,
 ) -> tuple:
     """
-    Register a single face from an image file.
+    Generate the face embedding for a single image file.
     
     Steps:
     1. Extract voter_id from filename
     2. Check if voter_id already exists (skip if exists)
     3. Load image
     4. Generate embedding using DeepFace (ArcFace)
-    5. Store embedding in SQLite database
+    
+    Storing is done afterwards in batches (see store_batch).
     
     Args:
         image_path: Path to image file
-        detector: FaceDetector instance
         embedder: FaceEmbedder instance
-        storage: FaceStorage instance
+        existing_voter_ids: voter_ids already registered in the database
         
     Returns:
-        Tuple of (voter_id, success, message)
+        Tuple of (voter_id, embedding or None, message)
     """
     # Step 1: Extract voter_id from filename (without extension)
     voter_id = extract_voter_id(str(image_path))
@@ -133,14 +135,19 @@ def register_face_from_image(
     print(f"\nProcessing: {image_path.name} (voter_id: {voter_id})")
     
     # Step 2: Check if voter_id already exists in database
-    if storage.voter_exists(voter_id):
-        return voter_id, False, f"SKIPPED: voter_id '{voter_id}' already exists in database"
+    if voter_id in existing_voter_ids:
+        return voter_id, None, f"SKIPPED: voter_id '{voter_id}' already exists in database"
     
     try:
         # Step 3: Load image from file
         image = load_image(image_path)
         print(f"  ✓ Image loaded successfully")
         
+        # Step 3b: Reject blurry/dark/tiny faces before running the model
+        # (only with FACE_QUALITY_CHECKS_REGISTRATION=1, see quality.py)
+        if QUALITY_CHECKS_ON_REGISTRATION:
+            check_image_quality(image)
+        
         # Step 4: Generate embedding using DeepFace (ArcFace) from base64 image
         print(f"  → Generating embedding with DeepFace...")
         image_base64 = image_to_base64(image)
@@ -149,26 +156,39 @@ def register_face_from_image(
         # Embedding is already a numpy array, no need to convert to list
         # The storage module will handle serialization
         print(f"  ✓ Embedding generated (shape: {embedding.shape})")
-        
-        # Step 5: Store embedding in SQLite database
-        # Use voter_id as full_name if not available
-        print(f"  → Storing in database...")
-        store_success, store_error = storage.store_embedding(
-            voter_id=voter_id,
-            full_name=voter_id,  # Use voter_id as name since we don't have full name
-            embedding=embedding
-        )
-        
-        if not store_success:
-            return voter_id, False, f"Database storage failed: {store_error}"
-        
-        print(f"  ✓ Successfully stored in database")
-        return voter_id, True, "Registration successful"
+        return voter_id, embedding, "Embedding generated"
         
     except Exception as e:
         error_msg = f"Error processing image: {str(e)}"
         print(f"  ✗ {error_msg}")
-        return voter_id, False, error_msg
+        return voter_id, None, error_msg
+
+
+def store_batch(storage, batch: list, results: dict, model_name: str = None):
+    """
+    Store a batch of embeddings in one transaction and record the outcome.
+    
+    Args:
+        storage: FaceStorage instance
+        batch: List of (voter_id, embedding) tuples
+        results: Summary dict with 'success' and 'failed' lists
+        model_name: Model that produced the embeddings (default: the storage's)
+    """
+    if not batch:
+        return
+    
+    print(f"\n  → Storing {len(batch)} embedding(s) in database...")
+    # Use voter_id as full_name since we don't have full name
+    outcomes = storage.store_embeddings_many([
+        (voter_id, voter_id, embedding) for voter_id, embedding in batch
+    ], model_name=model_name)
+    
+    for voter_id, success, error in outcomes:
+        if success:
+            results['success'].append((voter_id, "Registration successful"))
+        else:
+            results['failed'].append((voter_id, f"Database storage failed: {error}"))
+    batch.clear()
 
 
 def main():
@@ -182,6 +202,7 @@ def main():
     
     # Configuration
     registration_dir = "./registration_images"
+    batch_size = 100  # embeddings stored per transaction
     
     # Step 1: Get all image files from registration directory
     print(f"Step 1: Loading images from '{registration_dir}'...")
@@ -217,20 +238,27 @@ def main():
         'skipped': []
     }
     
+    existing_voter_ids = {voter['voter_id'] for voter in storage.list_all_voters()}
+    batch = []
+    
     for image_path in image_files:
-        voter_id, success, message = register_face_from_image(
+        voter_id, embedding, message = generate_face_embedding(
             image_path,
             embedder,
-            storage,
+            existing_voter_ids,
         )
         
-        if success:
-            results['success'].append((voter_id, message))
+        if embedding is not None:
+            batch.append((voter_id, embedding))
+            if len(batch) >= batch_size:
+                store_batch(storage, batch, results, model_name=embedder.model_name)
         elif 'SKIPPED' in message:
             results['skipped'].append((voter_id, message))
         else:
             results['failed'].append((voter_id, message))
     
+    store_batch(storage, batch, results, model_name=embedder.model_name)
+    
     # Step 4: Print summary
     print()
     print("=" * 70)
@@ -0,0 +1,112 @@
+"""
+Offline resharding tool for face embeddings.
+
+Copies every row from a source database (a single face_embeddings.db file
+or a sharded directory) into a new sharded directory. Embedding BLOBs and
+timestamps are copied verbatim, secondary (cascade) embeddings included.
+Stop the API before running; point FACE_STORAGE_SHARD_DIR at the new
+directory afterwards.
+
+Usage:
+    python reshard_database.py --source face_embeddings.db --dest face_embeddings_shards --shards 8
+    python reshard_database.py --source old_shards --dest new_shards --shards 16 --shard-by prefix
+"""
+
+import argparse
+import os
+import sys
+
+from backend.face import FaceStorage, ShardedFaceStorage
+from backend.face.sharding import MANIFEST_NAME, SHARD_STRATEGIES
+
+
+def open_source(path: str):
+    """Open a single-file or sharded source database."""
+    if os.path.isdir(path):
+        if not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+            raise ValueError(f"'{path}' has no {MANIFEST_NAME}; not a sharded database")
+        return ShardedFaceStorage.open(path, cache_size=0)
+    if not os.path.exists(path):
+        raise ValueError(f"Source database '{path}' does not exist")
+    return FaceStorage(db_path=path, cache_size=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reshard the face embeddings database")
+    parser.add_argument("--source", required=True, help="Source .db file or sharded directory")
+    parser.add_argument("--dest", required=True, help="Destination directory (must be new or empty)")
+    parser.add_argument("--shards", type=int, required=True, help="Number of destination shards")
+    parser.add_argument("--shard-by", choices=SHARD_STRATEGIES, default="hash", help="Routing strategy")
+    parser.add_argument("--prefix-length", type=int, default=3, help="EPIC prefix length for --shard-by prefix")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows copied per transaction")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Resharding Face Embeddings Database")
+    print("=" * 70)
+    print()
+
+    if os.path.abspath(args.source) == os.path.abspath(args.dest):
+        print("Error: --source and --dest must be different")
+        sys.exit(1)
+
+    if os.path.isdir(args.dest) and os.listdir(args.dest):
+        print(f"Error: destination '{args.dest}' is not empty")
+        sys.exit(1)
+
+    try:
+        source = open_source(args.source)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    total = source.get_count()
+    print(f"Source: {args.source} ({total} embeddings)")
+    print(f"Destination: {args.dest} ({args.shards} shards, by {args.shard_by})")
+    print()
+
+    dest = ShardedFaceStorage(
+        db_dir=args.dest,
+        num_shards=args.shards,
+        shard_by=args.shard_by,
+        prefix_length=args.prefix_length,
+        cache_size=0
+    )
+
+    copied = 0
+    batch = []
+    for row in source.export_rows(batch_size=args.batch_size):
+        batch.append(row)
+        if len(batch) >= args.batch_size:
+            copied += dest.import_rows(batch)
+            batch = []
+            print(f"  → Copied {copied}/{total}")
+    copied += dest.import_rows(batch)
+
+    # Secondary (cascade) embeddings follow their voters
+    secondary = 0
+    batch = []
+    for row in source.export_secondary_rows(batch_size=args.batch_size):
+        batch.append(row)
+        if len(batch) >= args.batch_size:
+            secondary += dest.import_secondary_rows(batch)
+            batch = []
+    secondary += dest.import_secondary_rows(batch)
+    if secondary:
+        print(f"  → Copied {secondary} secondary embeddings")
+
+    dest_count = dest.get_count()
+    source.close()
+    dest.close()
+
+    print()
+    print("=" * 70)
+    print(f"Resharding complete! Copied {copied} of {total} embeddings ({dest_count} in destination).")
+    print("=" * 70)
+
+    if dest_count != total:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
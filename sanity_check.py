@@ -3,11 +3,11 @@ Quick sanity check for face embeddings database.
 
 Checks:
 1. Number of registered voters
-2. Embedding lengths (should be ~1000-4000 chars for JSON string)
+2. Embedding format and size (binary BLOB header/dimension, or legacy JSON
+   string of ~1000-4000 chars)
 3. Embedding uniqueness (should be different for each voter)
 """
 
-import sqlite3
 from backend.face import get_storage
 
 def main():
@@ -16,19 +16,9 @@ def main():
     print("=" * 70)
     print()
     
-    # Get storage instance
+    # Get storage instance (single database or every shard)
     storage = get_storage()
-    conn = storage._get_connection()
-    cursor = conn.cursor()
-    
-    # Query: SELECT voter_id, LENGTH(embedding) FROM face_embeddings;
-    cursor.execute("""
-        SELECT voter_id, LENGTH(embedding) as embedding_length, embedding
-        FROM face_embeddings
-        ORDER BY voter_id
-    """)
-    
-    rows = cursor.fetchall()
+    rows = sorted(storage.iter_embedding_rows(), key=lambda row: row.voter_id)
     
     print(f"Total registered voters: {len(rows)}")
     print()
@@ -44,7 +34,7 @@ def main():
     
     print("Embedding Details:")
     print("-" * 70)
-    print(f"{'Voter ID':<20} {'Length':<10} {'Status'}")
+    print(f"{'Voter ID':<20} {'Format':<8} {'Length':<10} {'Dim':<8} {'Status'}")
     print("-" * 70)
     
     embeddings = []
@@ -52,25 +42,31 @@ def main():
     first_embedding = None
     
     for row in rows:
-        voter_id = row['voter_id']
-        length = row['embedding_length']
-        embedding_json = row['embedding']
-        
-        # Check length
-        if 1000 <= length <= 4000:
+        if row.embedding is None:
+            dim = "-"
+            status = f"⚠️  Invalid: {row.error}"
+        elif row.format == "blob":
+            # Decoding validated the header and the payload size
+            dim = row.embedding.size
             status = "✓ OK"
-        elif length < 1000:
-            status = "⚠️  Too short"
         else:
-            status = "⚠️  Too long"
+            dim = row.embedding.size
+            # Check length
+            if 1000 <= row.length <= 4000:
+                status = "✓ OK (run migrate_embeddings.py)"
+            elif row.length < 1000:
+                status = "⚠️  Too short"
+            else:
+                status = "⚠️  Too long"
         
-        print(f"{voter_id:<20} {length:<10} {status}")
+        print(f"{row.voter_id:<20} {row.format.upper():<8} {row.length:<10} {dim:<8} {status}")
         
-        # Store for uniqueness check
-        embeddings.append(embedding_json)
+        # Compare vectors by their decoded values
+        embedding_key = row.embedding.tobytes() if row.embedding is not None else b""
+        embeddings.append(embedding_key)
         if first_embedding is None:
-            first_embedding = embedding_json
-        elif embedding_json != first_embedding:
+            first_embedding = embedding_key
+        elif embedding_key != first_embedding:
             all_same = False
     
     print("-" * 70)
@@ -93,10 +89,11 @@ def main():
     
     # Additional check: Compare first few characters
     if len(embeddings) >= 2:
-        print("Sample Comparison (first 100 chars of each embedding):")
+        print("Sample Comparison (first 5 values of each embedding):")
         print("-" * 70)
-        for i, (row, emb) in enumerate(zip(rows, embeddings), 1):
-            print(f"{row['voter_id']}: {emb[:100]}...")
+        for i, row in enumerate(rows, 1):
+            values = row.embedding[:5] if row.embedding is not None else []
+            print(f"{row.voter_id}: {[round(float(v), 4) for v in values]}...")
             if i < len(embeddings):
                 print()
     
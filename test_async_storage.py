@@ -0,0 +1,123 @@
+"""
+Concurrency check for the async storage facade.
+
+Simulates a slow database and verifies that the event loop stays
+responsive while several storage calls are in flight:
+- Blocking path: calling FaceStorage directly from a coroutine stalls
+  the loop for the whole query
+- Async path: AsyncFaceStorage runs the query on its thread pool, so a
+  heartbeat task keeps ticking on time
+
+Usage:
+    python test_async_storage.py
+"""
+
+import asyncio
+import sys
+import time
+import numpy as np
+
+from backend.face import AsyncFaceStorage, FaceStorage
+
+DB_DELAY = 0.3  # seconds added to every storage call
+CONCURRENT_CALLS = 8
+HEARTBEAT_INTERVAL = 0.01
+MAX_ALLOWED_LAG = 0.1
+
+
+class SlowStorage:
+    """FaceStorage wrapper that sleeps before every call (a slow disk or a locked DB)."""
+
+    def __init__(self, storage: FaceStorage):
+        self._storage = storage
+
+    def __getattr__(self, name):
+        attr = getattr(self._storage, name)
+        if not callable(attr):
+            return attr
+
+        def slow(*args, **kwargs):
+            time.sleep(DB_DELAY)
+            return attr(*args, **kwargs)
+        return slow
+
+
+async def heartbeat(stop: asyncio.Event) -> float:
+    """Tick every HEARTBEAT_INTERVAL and return the worst observed lag."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        worst = max(worst, time.perf_counter() - start - HEARTBEAT_INTERVAL)
+    return worst
+
+
+async def measure(lookups) -> tuple:
+    """Run the lookups alongside a heartbeat; return (elapsed, worst_lag)."""
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(stop))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*lookups)
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    worst_lag = await beat
+    assert all(result is not None for result in results), "lookup returned no record"
+    return elapsed, worst_lag
+
+
+async def run_checks(storage: FaceStorage) -> bool:
+    slow = SlowStorage(storage)
+
+    async def blocking_lookup(voter_id):
+        # What the endpoints used to do: a sync call inside async def
+        return slow.get_embedding(voter_id)
+
+    blocking_elapsed, blocking_lag = await measure(
+        [blocking_lookup(f"V{i}") for i in range(CONCURRENT_CALLS)]
+    )
+
+    async_storage = AsyncFaceStorage(slow, max_workers=CONCURRENT_CALLS)
+    async_elapsed, async_lag = await measure(
+        [async_storage.get_embedding(f"V{i}") for i in range(CONCURRENT_CALLS)]
+    )
+    async_storage._executor.shutdown(wait=True)
+
+    print(f"{'Path':<10} {'Elapsed (s)':<14} {'Worst loop lag (s)'}")
+    print("-" * 70)
+    print(f"{'Blocking':<10} {blocking_elapsed:<14.2f} {blocking_lag:.3f}")
+    print(f"{'Async':<10} {async_elapsed:<14.2f} {async_lag:.3f}")
+    print("-" * 70)
+
+    return async_lag < MAX_ALLOWED_LAG and async_elapsed < blocking_elapsed
+
+
+def main():
+    print("=" * 70)
+    print("Async Storage Concurrency Check")
+    print("=" * 70)
+    print(f"{CONCURRENT_CALLS} concurrent lookups, {DB_DELAY}s simulated DB latency each")
+    print()
+
+    storage = FaceStorage(db_path=":memory:", cache_size=0)
+    storage.store_embeddings_many([
+        (f"V{i}", f"Voter {i}", np.random.rand(128).astype(np.float32))
+        for i in range(CONCURRENT_CALLS)
+    ])
+
+    passed = asyncio.run(run_checks(storage))
+    storage.close()
+
+    print()
+    if passed:
+        print(f"✓ PASS: event loop stayed responsive (lag < {MAX_ALLOWED_LAG}s)")
+    else:
+        print(f"✗ FAIL: event loop was blocked by storage calls")
+    print("=" * 70)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
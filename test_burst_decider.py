@@ -0,0 +1,168 @@
+"""
+Deterministic check for the burst early-exit rule (backend/face/burst.py).
+
+Feeds fixed similarity sequences to BurstDecider and to verify_burst()
+(with a stub embed that returns the similarity itself) and verifies:
+- A frame at exactly threshold + accept_margin verifies immediately
+- reject_frames clearly negative frames stop the burst as a mismatch,
+  and a single frame near the threshold keeps it open
+- Borderline bursts fall back to the mean similarity of usable frames
+- aggregate() with no usable frame does not verify and has no similarity
+- verify_burst() skips unusable frames, stops embedding once the outcome
+  is clear, and lets ImageTooLargeError through
+
+No models or images are needed.
+
+Usage:
+    python test_burst_decider.py
+"""
+
+import asyncio
+import sys
+
+from backend.face.burst import BurstDecider, verify_burst
+from backend.face.ingest import ImageTooLargeError
+
+THRESHOLD = 0.60
+ACCEPT_MARGIN = 0.05
+REJECT_MARGIN = 0.15
+REJECT_FRAMES = 2
+
+
+def check(results: list, name: str, condition: bool, detail: str = "") -> bool:
+    results.append(condition)
+    print(f"{'✓' if condition else '✗'} {name}" + (f" ({detail})" if detail else ""))
+    return condition
+
+
+def decide(similarities: list) -> tuple:
+    """Run the decider over a sequence; return (decision, frames consumed)."""
+    decider = BurstDecider(THRESHOLD, ACCEPT_MARGIN, REJECT_MARGIN, REJECT_FRAMES)
+    for consumed, similarity in enumerate(similarities, start=1):
+        decision = decider.add(similarity)
+        if decision is not None:
+            return decision, consumed
+    return decider.aggregate(), len(similarities)
+
+
+def check_decider(results: list):
+    accept_at = THRESHOLD + ACCEPT_MARGIN
+    decision, consumed = decide([accept_at, 0.0])
+    check(
+        results, "frame at threshold + accept_margin verifies on the first frame",
+        decision == (True, accept_at, "accepted") and consumed == 1
+    )
+
+    decision, consumed = decide([0.50, accept_at - 1e-6, 0.62])
+    check(
+        results, "frame just below the accept line keeps the burst open",
+        decision[2] == "aggregated" and consumed == 3
+    )
+
+    decision, consumed = decide([0.20, 0.30, 0.90])
+    check(
+        results, f"{REJECT_FRAMES} clearly negative frames reject early",
+        decision == (False, 0.30, "rejected") and consumed == REJECT_FRAMES,
+        f"reports the best frame, {decision[1]}"
+    )
+
+    decision, consumed = decide([0.20])
+    check(results, "one clearly negative frame is not enough to reject", decision[2] == "aggregated")
+
+    reject_line = THRESHOLD - REJECT_MARGIN
+    decision, consumed = decide([0.10, reject_line, 0.10])
+    check(
+        results, "a frame at the reject line prevents early rejection",
+        decision[2] == "aggregated" and consumed == 3
+    )
+
+    decision, _ = decide([0.58, 0.63, 0.61])
+    check(
+        results, "borderline burst verifies on the mean similarity",
+        decision[0] is True and decision[2] == "aggregated" and abs(decision[1] - 0.6066667) < 1e-6,
+        f"mean {decision[1]:.4f}"
+    )
+
+    decision, _ = decide([0.62, 0.55, 0.56])
+    check(
+        results, "borderline burst below threshold on average is not verified",
+        decision[0] is False and decision[2] == "aggregated",
+        f"mean {decision[1]:.4f}"
+    )
+
+    decider = BurstDecider(THRESHOLD, ACCEPT_MARGIN, REJECT_MARGIN, REJECT_FRAMES)
+    check(
+        results, "aggregate() with no usable frames does not verify",
+        decider.aggregate() == (False, None, "aggregated")
+    )
+
+
+async def run_burst(frames: list) -> tuple:
+    """verify_burst over stub frames: floats are similarities, exceptions are raised."""
+    embedded = []
+
+    async def embed(frame):
+        embedded.append(frame)
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+    result = await verify_burst(
+        frames, None, embed, lambda similarity, _: similarity, THRESHOLD,
+        ACCEPT_MARGIN, REJECT_MARGIN, REJECT_FRAMES
+    )
+    return result, len(embedded)
+
+
+def check_verify_burst(results: list):
+    result, embedded = asyncio.run(run_burst([0.70, 0.10, 0.10]))
+    check(
+        results, "clear first frame costs one inference",
+        result.verified and result.decision == "accepted" and embedded == 1
+    )
+
+    result, embedded = asyncio.run(run_burst([ValueError("No face detected"), 0.10, ValueError("blurry"), 0.20, 0.90]))
+    check(
+        results, "unusable frames are skipped and do not count toward rejection",
+        not result.verified and result.decision == "rejected" and embedded == 4
+        and result.usable_frames == 2 and result.frames[0].error == "No face detected"
+    )
+
+    result, _ = asyncio.run(run_burst([ValueError("No face detected")] * 3))
+    check(
+        results, "burst with no usable frames is not verified",
+        not result.verified and result.similarity is None and result.usable_frames == 0
+    )
+
+    try:
+        asyncio.run(run_burst([0.50, ImageTooLargeError("Image too large"), 0.90]))
+        propagated = False
+    except ImageTooLargeError:
+        propagated = True
+    check(results, "ImageTooLargeError aborts the burst", propagated)
+
+
+def main():
+    print("=" * 70)
+    print("Burst Decision Check")
+    print("=" * 70)
+    print(
+        f"threshold {THRESHOLD}, accept margin {ACCEPT_MARGIN}, "
+        f"reject margin {REJECT_MARGIN}, reject frames {REJECT_FRAMES}"
+    )
+    print()
+
+    results = []
+    check_decider(results)
+    check_verify_burst(results)
+
+    passed = all(results)
+    print()
+    print("=" * 70)
+    print("PASS" if passed else "FAIL")
+    print("=" * 70)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Behavior check for the embedding LRU cache (backend/face/cache.py).
+
+Verifies the cache on its own and behind FaceStorage.get_embedding():
+- A record put with a current begin_read() token is served from the cache
+- A read that raced with a write (invalidate() between begin_read() and
+  put()) is dropped instead of caching the stale record
+- Entry-count and byte bounds evict least-recently-used records
+- A database read that finishes after a concurrent update does not leave
+  the old embedding in the cache
+
+Usage:
+    python test_embedding_cache.py
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from backend.face import FaceStorage
+from backend.face.cache import EmbeddingCache
+
+DIMENSION = 128
+
+
+def record(voter_id: str, seed: int) -> dict:
+    embedding = np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+    embedding.flags.writeable = False
+    return {'voter_id': voter_id, 'full_name': f"Voter {voter_id}", 'embedding': embedding}
+
+
+def check(results: list, name: str, condition: bool, detail: str = "") -> bool:
+    results.append(condition)
+    print(f"{'✓' if condition else '✗'} {name}" + (f" ({detail})" if detail else ""))
+    return condition
+
+
+def check_generation_token(results: list):
+    cache = EmbeddingCache(max_entries=8)
+
+    cache.put("V1", record("V1", 1), cache.begin_read())
+    check(results, "put with a current token is cached", cache.get("V1") is not None)
+
+    token = cache.begin_read()
+    cache.invalidate("V2")
+    cache.put("V2", record("V2", 2), token)
+    check(results, "put after an invalidation is dropped", cache.get("V2") is None)
+
+    token = cache.begin_read()
+    cache.clear()
+    cache.put("V3", record("V3", 3), token)
+    check(results, "put after clear() is dropped", cache.get("V3") is None and len(cache) == 0)
+
+    cache.put("V1", record("V1", 1), cache.begin_read())
+    cache.invalidate("V1")
+    check(results, "invalidate() removes the cached record", cache.get("V1") is None)
+
+    disabled = EmbeddingCache(max_entries=0)
+    disabled.put("V1", record("V1", 1), disabled.begin_read())
+    check(results, "max_entries=0 disables caching", disabled.get("V1") is None)
+
+
+def check_bounds(results: list):
+    cache = EmbeddingCache(max_entries=2)
+    for seed, voter_id in enumerate(("A", "B")):
+        cache.put(voter_id, record(voter_id, seed), cache.begin_read())
+    cache.get("A")  # A becomes most recently used
+    cache.put("C", record("C", 2), cache.begin_read())
+    check(
+        results, "entry bound evicts the least recently used record",
+        cache.get("B") is None and cache.get("A") is not None and cache.get("C") is not None
+    )
+
+    entry_bytes = record("X", 0)['embedding'].nbytes + 512
+    cache = EmbeddingCache(max_entries=100, max_bytes=entry_bytes * 3)
+    for seed in range(5):
+        cache.put(f"V{seed}", record(f"V{seed}", seed), cache.begin_read())
+    stats = cache.stats()
+    check(
+        results, "byte bound caps resident records",
+        stats['entries'] == 3 and stats['bytes'] <= entry_bytes * 3 and stats['evictions'] == 2,
+        f"{stats['entries']} entries, {stats['bytes']} bytes"
+    )
+
+
+def check_storage_race(db_path: str, results: list):
+    """Apply an update between a get_embedding() query and its cache put."""
+    storage = FaceStorage(db_path=db_path)
+    old = np.random.default_rng(10).standard_normal(DIMENSION).astype(np.float32)
+    new = np.random.default_rng(11).standard_normal(DIMENSION).astype(np.float32)
+    storage.store_embedding("V1", "Racing Voter", old)
+
+    original_put = storage.cache.put
+
+    def put_after_update(voter_id, stale, token):
+        # The SELECT has already returned the old row; a writer lands now
+        storage.cache.put = original_put
+        storage.update_embedding("V1", embedding=new)
+        original_put(voter_id, stale, token)
+
+    storage.cache.put = put_after_update
+    stale = storage.get_embedding("V1")
+    cached_after_race = storage.cache.stats()['entries']
+    fresh = storage.get_embedding("V1")
+
+    def cosine(a, b):
+        a, b = np.asarray(a, dtype=np.float32), np.asarray(b, dtype=np.float32)
+        return float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+    check(results, "racing read returned the row it queried", cosine(stale['embedding'], old) > 0.999)
+    check(
+        results, "racing read was not cached; next read sees the update",
+        cached_after_race == 0 and cosine(fresh['embedding'], new) > 0.999
+    )
+
+    storage.get_embedding("V1")
+    hits = storage.cache.stats()['hits']
+    storage.get_embedding("V1")
+    check(results, "subsequent reads are served from the cache", storage.cache.stats()['hits'] == hits + 1)
+    storage.close()
+
+
+def main():
+    print("=" * 70)
+    print("Embedding Cache Behavior Check")
+    print("=" * 70)
+    print()
+
+    results = []
+    check_generation_token(results)
+    check_bounds(results)
+    with tempfile.TemporaryDirectory() as workdir:
+        check_storage_race(os.path.join(workdir, "faces.db"), results)
+
+    passed = all(results)
+    print()
+    print("=" * 70)
+    print("PASS" if passed else "FAIL")
+    print("=" * 70)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Round-trip check for the stored embedding representations.
+
+For each FACE_EMBEDDING_DTYPE (float32, float16, int8) stores embeddings in
+a temporary SQLite database and verifies that:
+- The BLOB header records the configured dtype and the payload has the
+  expected size
+- get_embedding() and get_embeddings_many() return the same face
+  (cosine similarity to the original above the per-dtype tolerance)
+- get_embedding() returns a read-only vector in the configured
+  representation (QuantizedVector for int8)
+- A database written in one dtype is still readable by a storage
+  configured for another
+- delete_embedding() removes the row and the cached record
+
+Usage:
+    python test_embedding_dtypes.py
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from backend.face import FaceStorage
+from backend.face.quantization import QuantizedVector, cosine_similarity
+from backend.face.storage import EMBEDDING_HEADER, EMBEDDING_SCALE
+
+DIMENSION = 512
+VOTERS = 20
+
+# (dtype, payload bytes per value, minimum cosine similarity to the original)
+DTYPES = [
+    ("float32", 4, 0.99999),
+    ("float16", 2, 0.9999),
+    ("int8", 1, 0.999),
+]
+
+
+def check(results: list, name: str, condition: bool, detail: str = "") -> bool:
+    results.append(condition)
+    print(f"{'✓' if condition else '✗'} {name}" + (f" ({detail})" if detail else ""))
+    return condition
+
+
+def check_dtype(workdir: str, dtype: str, itemsize: int, tolerance: float, results: list):
+    print(f"{dtype}:")
+    rng = np.random.default_rng(7)
+    originals = {
+        f"V{i}": rng.standard_normal(DIMENSION).astype(np.float32)
+        for i in range(VOTERS)
+    }
+
+    db_path = os.path.join(workdir, f"{dtype}.db")
+    storage = FaceStorage(db_path=db_path, embedding_dtype=dtype, model_name="test-model")
+    storage.store_embeddings_many([
+        (voter_id, f"Voter {voter_id}", embedding) for voter_id, embedding in originals.items()
+    ])
+
+    blob = storage._get_connection().execute(
+        "SELECT embedding FROM face_embeddings WHERE voter_id = ?", ("V0",)
+    ).fetchone()['embedding']
+    decoded = storage._deserialize_embedding(blob, keep_quantized=True)
+    stored_type = QuantizedVector if dtype == "int8" else np.ndarray
+    check(
+        results, "  BLOB stores the configured dtype",
+        isinstance(decoded, stored_type) and (dtype == "int8" or decoded.dtype == np.dtype(dtype)),
+        f"{len(blob)} bytes"
+    )
+    expected = EMBEDDING_HEADER.size + (EMBEDDING_SCALE.size if dtype == "int8" else 0) + DIMENSION * itemsize
+    check(results, "  BLOB payload size matches the dtype", len(blob) == expected, f"expected {expected}")
+
+    record = storage.get_embedding("V0")
+    embedding = record['embedding']
+    values = embedding.values if isinstance(embedding, QuantizedVector) else embedding
+    check(
+        results, "  get_embedding() returns a read-only vector in the configured dtype",
+        isinstance(embedding, stored_type) and not values.flags.writeable
+    )
+
+    worst_single = min(
+        cosine_similarity(storage.get_embedding(voter_id)['embedding'], original)
+        for voter_id, original in originals.items()
+    )
+    batch = storage.get_embeddings_many(list(originals))
+    worst_batch = min(
+        cosine_similarity(batch[voter_id]['embedding'], original)
+        for voter_id, original in originals.items()
+    )
+    check(
+        results, "  stored faces match the originals",
+        worst_single >= tolerance and worst_batch >= tolerance and len(batch) == VOTERS,
+        f"min cosine {worst_single:.6f} single, {worst_batch:.6f} batch"
+    )
+    check(results, "  model_name is recorded", record['model_name'] == "test-model")
+
+    other = "float32" if dtype != "float32" else "int8"
+    reader = FaceStorage(db_path=db_path, embedding_dtype=other, cache_size=0)
+    cross = cosine_similarity(reader.get_embedding("V1")['embedding'], originals["V1"])
+    check(
+        results, f"  rows are readable with FACE_EMBEDDING_DTYPE={other}",
+        cross >= min(tolerance, 0.999), f"cosine {cross:.6f}"
+    )
+    reader.close()
+
+    success, error = storage.delete_embedding("V0")
+    check(
+        results, "  delete_embedding() removes the row and the cached record",
+        success and storage.get_embedding("V0") is None and storage.get_count() == VOTERS - 1,
+        error or ""
+    )
+    storage.close()
+
+
+def main():
+    print("=" * 70)
+    print("Embedding Dtype Round-Trip Check")
+    print("=" * 70)
+    print(f"{VOTERS} voters, {DIMENSION}-dimensional embeddings")
+    print()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for dtype, itemsize, tolerance in DTYPES:
+            check_dtype(workdir, dtype, itemsize, tolerance, results)
+
+    passed = all(results)
+    print()
+    print("=" * 70)
+    print("PASS" if passed else "FAIL")
+    print("=" * 70)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
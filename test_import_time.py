@@ -0,0 +1,114 @@
+"""
+Import-time budget check.
+
+Imports each lightweight entry point in a fresh interpreter under
+`python -X importtime` and fails if:
+- TensorFlow, torch, or the libraries that bring them in (DeepFace,
+  ultralytics, Keras) were imported - those must only load on the first
+  inference call (see backend/face/embedder.py and detector.py)
+- the cumulative import time exceeds --budget-ms
+
+The slowest imports are listed for each module so regressions are easy
+to trace back.
+
+Usage:
+    python test_import_time.py
+    python test_import_time.py --budget-ms 1500 --top 15
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+# Entry points that must start without the ML frameworks
+MODULES = ("main", "backend.face", "backend.face.storage")
+FORBIDDEN_PACKAGES = ("tensorflow", "tf_keras", "keras", "torch", "deepface", "ultralytics")
+IMPORT_BUDGET_MS = 3000.0
+
+ROOT = Path(__file__).resolve().parent
+
+
+def import_profile(module: str) -> list:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        List of (package, self_us, cumulative_us) in import order
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"'import {module}' failed:\n{process.stderr.strip()[-2000:]}")
+
+    entries = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        entries.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return entries
+
+
+def check_module(module: str, budget_ms: float, top: int) -> bool:
+    """Print the profile of one module; returns True if it is within budget."""
+    entries = import_profile(module)
+    cumulative_ms = next((cum for name, _, cum in entries if name == module), 0) / 1000.0
+    forbidden = sorted({
+        name.split(".")[0] for name, _, _ in entries
+        if name.split(".")[0] in FORBIDDEN_PACKAGES
+    })
+
+    print(f"import {module}: {cumulative_ms:.0f} ms, {len(entries)} modules")
+    for name, self_us, _ in sorted(entries, key=lambda entry: entry[1], reverse=True)[:top]:
+        print(f"    {self_us / 1000.0:8.1f} ms  {name}")
+
+    passed = True
+    if forbidden:
+        print(f"  ✗ Pulls in heavy frameworks: {', '.join(forbidden)}")
+        passed = False
+    if cumulative_ms > budget_ms:
+        print(f"  ✗ Over budget: {cumulative_ms:.0f} ms > {budget_ms:.0f} ms")
+        passed = False
+    if passed:
+        print(f"  ✓ No ML frameworks, within {budget_ms:.0f} ms budget")
+    print()
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if lightweight entry points import TensorFlow or torch")
+    parser.add_argument("modules", nargs="*", default=list(MODULES), help="Modules to import")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS, help="Maximum cumulative import time per module")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list per module")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("Import-Time Budget Check")
+    print("=" * 70)
+    print()
+
+    results = []
+    for module in args.modules:
+        try:
+            results.append(check_module(module, args.budget_ms, args.top))
+        except RuntimeError as e:
+            print(f"  ✗ {e}")
+            print()
+            results.append(False)
+
+    passed = all(results)
+    print("=" * 70)
+    print("PASS" if passed else "FAIL")
+    print("=" * 70)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Parity check: ONNX Runtime embedder vs DeepFace.represent().
+
+For each face image, embeds it with both backends and compares:
+- Embedding agreement: cosine similarity between the two embeddings of
+  the same image must be at least PARITY_MIN_SIMILARITY (0.99, see
+  backend/face/onnx_embedder.py); the backends are close, not identical
+- Decision agreement: for every image pair, both backends must make the
+  same accept/reject decision at the verification threshold
+- Rejections: an image rejected by one backend (no face / several faces)
+  must be rejected by the other
+
+Usage:
+    python test_onnx_parity.py face1.jpg face2.jpg ...
+    python test_onnx_parity.py --dir known_faces --min-similarity 0.995
+"""
+
+import argparse
+import glob
+import os
+import sys
+
+import cv2
+
+from backend.face.embedder import SIMILARITY_THRESHOLD, FaceEmbedder
+from backend.face.onnx_embedder import ONNX_MODEL_PATH, PARITY_MIN_SIMILARITY, OnnxFaceEmbedder
+from backend.face.quantization import cosine_similarity
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def embed_all(embedder, images):
+    """Return {path: embedding or error message}."""
+    results = {}
+    for path, image in images:
+        try:
+            results[path] = embedder.generate_embedding_from_image(image)
+        except ValueError as e:
+            results[path] = str(e)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("images", nargs="*", help="Face image files")
+    parser.add_argument("--dir", help="Directory of face images")
+    parser.add_argument("--model", default=ONNX_MODEL_PATH, help="ONNX model path")
+    parser.add_argument("--min-similarity", type=float, default=PARITY_MIN_SIMILARITY,
+                        help="Minimum DeepFace/ONNX cosine similarity for the same image")
+    args = parser.parse_args()
+
+    paths = list(args.images)
+    if args.dir:
+        for pattern in IMAGE_PATTERNS:
+            paths.extend(sorted(glob.glob(os.path.join(args.dir, pattern))))
+    if not paths:
+        parser.error("Give face images or --dir")
+
+    images = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            print(f"Skipping unreadable image: {path}")
+            continue
+        images.append((path, image))
+
+    print("=" * 70)
+    print("ONNX Runtime vs DeepFace Parity Check")
+    print("=" * 70)
+    print(f"Images: {len(images)}, threshold: {SIMILARITY_THRESHOLD}, min similarity: {args.min_similarity}")
+    print()
+
+    reference = embed_all(FaceEmbedder(), images)
+    onnx_embedder = OnnxFaceEmbedder(model_path=args.model)
+    candidate = embed_all(onnx_embedder, images)
+
+    failures = 0
+    embedded = []
+    for path, _ in images:
+        ref, onnx = reference[path], candidate[path]
+        name = os.path.basename(path)
+        if isinstance(ref, str) or isinstance(onnx, str):
+            if isinstance(ref, str) != isinstance(onnx, str):
+                failures += 1
+                print(f"✗ {name}: DeepFace -> {ref if isinstance(ref, str) else 'embedding'}, "
+                      f"ONNX -> {onnx if isinstance(onnx, str) else 'embedding'}")
+            else:
+                print(f"✓ {name}: rejected by both ({ref})")
+            continue
+
+        similarity = cosine_similarity(ref, onnx)
+        ok = similarity >= args.min_similarity
+        failures += 0 if ok else 1
+        print(f"{'✓' if ok else '✗'} {name}: similarity {similarity:.5f}")
+        embedded.append(path)
+
+    disagreements = 0
+    pairs = 0
+    for i, a in enumerate(embedded):
+        for b in embedded[i + 1:]:
+            pairs += 1
+            ref_match = cosine_similarity(reference[a], reference[b]) >= SIMILARITY_THRESHOLD
+            onnx_match = onnx_embedder.compare_embeddings(candidate[a], candidate[b]) >= SIMILARITY_THRESHOLD
+            if ref_match != onnx_match:
+                disagreements += 1
+                print(f"✗ Decision differs: {os.path.basename(a)} vs {os.path.basename(b)}")
+    failures += disagreements
+
+    print()
+    print(f"Pairs compared: {pairs}, decision disagreements: {disagreements}")
+    print("=" * 70)
+    if failures:
+        print(f"✗ Parity check failed ({failures} problems)")
+        sys.exit(1)
+    print(f"✓ ONNX backend within tolerance of DeepFace (similarity >= {args.min_similarity}, same decisions)")
+
+
+if __name__ == "__main__":
+    main()
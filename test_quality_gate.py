@@ -0,0 +1,117 @@
+"""
+Fixture check for the face quality pre-filter (backend/face/quality.py).
+
+Builds synthetic face images with a known face box and runs them through
+FaceQualityChecker with the default thresholds:
+- Typical registration photos (a tightly framed portrait, a small ID-style
+  photo, a webcam frame) must pass
+- Blurred, dark, overexposed, low-contrast, tiny and cut-off faces must be
+  rejected with the matching reason
+
+The face box is passed in explicitly (as the YOLO pipeline and the stream
+tracker do), so the check does not depend on the Haar cascades shipped
+with this OpenCV build.
+
+Usage:
+    python test_quality_gate.py
+"""
+
+import sys
+
+import cv2
+import numpy as np
+
+from backend.face.quality import QUALITY_CHECKS_ON_REGISTRATION, FaceQualityChecker, FaceQualityError
+
+
+def draw_face(width: int, height: int, box: tuple, seed: int = 0) -> np.ndarray:
+    """
+    Draw a face-like picture: textured background, skin ellipse with eyes,
+    brows, nose and mouth inside `box`, then a JPEG round trip.
+    """
+    rng = np.random.default_rng(seed)
+    image = np.full((height, width, 3), (150, 160, 170), dtype=np.uint8)
+    noise = rng.normal(0, 4, (height, width, 1))
+    image = np.clip(image + noise, 0, 255).astype(np.uint8)
+
+    x, y, w, h = box
+    center = (x + w // 2, y + h // 2)
+    cv2.ellipse(image, center, (w // 2, h // 2), 0, 0, 360, (120, 150, 200), -1)
+    cv2.ellipse(image, (center[0], y + h // 8), (w // 2, h // 6), 0, 180, 360, (40, 40, 50), -1)  # hair
+    for side in (-1, 1):
+        eye = (center[0] + side * w // 5, y + int(h * 0.42))
+        cv2.ellipse(image, eye, (max(2, w // 12), max(1, h // 24)), 0, 0, 360, (245, 245, 245), -1)
+        cv2.circle(image, eye, max(1, w // 28), (30, 30, 30), -1)
+        brow = (center[0] + side * w // 5, y + int(h * 0.34))
+        cv2.line(image, (brow[0] - w // 10, brow[1]), (brow[0] + w // 10, brow[1]), (40, 40, 50), max(1, h // 40))
+    cv2.line(image, (center[0], y + int(h * 0.45)), (center[0] - w // 20, y + int(h * 0.62)), (90, 110, 160), max(1, w // 60))
+    cv2.ellipse(image, (center[0], y + int(h * 0.75)), (w // 6, h // 20), 0, 0, 180, (60, 60, 140), max(1, h // 50))
+
+    # Skin texture, then compress like a real upload
+    skin = rng.normal(0, 2, (height, width, 1))
+    image = np.clip(image + skin, 0, 255).astype(np.uint8)
+    return cv2.imdecode(cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])[1], cv2.IMREAD_COLOR)
+
+
+def scaled(image: np.ndarray, factor: float, offset: float = 0.0) -> np.ndarray:
+    return np.clip(image.astype(np.float32) * factor + offset, 0, 255).astype(np.uint8)
+
+
+def build_fixtures() -> list:
+    """Return (name, image, face box, expected reason or None for accepted)."""
+    portrait_box = (60, 70, 240, 300)
+    portrait = draw_face(360, 450, portrait_box, seed=1)
+    id_box = (28, 30, 104, 130)
+    id_photo = draw_face(160, 200, id_box, seed=2)
+    webcam_box = (240, 120, 160, 200)
+    webcam = draw_face(640, 480, webcam_box, seed=3)
+
+    return [
+        ("registration portrait", portrait, portrait_box, None),
+        ("ID-style photo (160x200)", id_photo, id_box, None),
+        ("webcam frame", webcam, webcam_box, None),
+        ("blurred portrait", cv2.GaussianBlur(portrait, (0, 0), 6), portrait_box, "blurry"),
+        ("motion-blurred webcam frame",
+         cv2.filter2D(webcam, -1, np.eye(15, dtype=np.float32) / 15.0), webcam_box, "blurry"),
+        ("dark portrait", scaled(portrait, 0.2), portrait_box, "too_dark"),
+        ("overexposed portrait", scaled(portrait, 1.0, 140), portrait_box, "too_bright"),
+        ("washed-out portrait", scaled(portrait, 0.08, 110), portrait_box, "low_contrast"),
+        ("tiny face", draw_face(640, 480, (300, 200, 40, 50), seed=4), (300, 200, 40, 50), "face_too_small"),
+        ("face cut off at the edge", draw_face(640, 480, (0, 120, 160, 200), seed=5), (0, 120, 160, 200), "face_cropped"),
+    ]
+
+
+def main():
+    print("=" * 70)
+    print("Face Quality Gate Fixture Check")
+    print("=" * 70)
+    print(f"Registration gate enabled (FACE_QUALITY_CHECKS_REGISTRATION): {QUALITY_CHECKS_ON_REGISTRATION}")
+    print()
+
+    checker = FaceQualityChecker()
+    passed = True
+    for name, image, box, expected in build_fixtures():
+        report = checker.assess(image, box)
+        try:
+            checker.check(image, box)
+            outcome = None
+        except FaceQualityError as e:
+            outcome = e.reason
+
+        ok = outcome == expected
+        passed = passed and ok
+        print(
+            f"{'✓' if ok else '✗'} {name:<30} -> {outcome or 'accepted':<15} "
+            f"(expected {expected or 'accepted'}; sharpness {report.sharpness:.0f}, "
+            f"brightness {report.brightness:.0f}, contrast {report.contrast:.0f})"
+        )
+
+    print()
+    print("=" * 70)
+    print("PASS" if passed else "FAIL")
+    print("=" * 70)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Behavior check for the batched FaceStorage APIs.
+
+Runs against a temporary SQLite database and verifies that
+store_embeddings_many() and delete_embeddings_many() report the same
+per-row outcomes as the single-row calls:
+- Invalid rows, voter_ids repeated within a batch and voter_ids already in
+  the database are rejected individually; the rest of the batch is stored
+- Two overlapping batches written concurrently store every voter_id exactly
+  once, and exactly one writer reports success for each of them
+- model_name can be given per call or per record (a fourth tuple
+  element) and defaults to the storage's model_name
+- Deleting a missing or repeated voter_id is reported as "does not exist"
+
+Usage:
+    python test_storage_batch.py
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+import numpy as np
+
+from backend.face import FaceStorage
+
+DIMENSION = 128
+CONCURRENT_BATCH_SIZE = 200
+
+
+def vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(DIMENSION).astype(np.float32)
+
+
+def check(results: list, name: str, condition: bool, detail: str = "") -> bool:
+    results.append(condition)
+    print(f"{'✓' if condition else '✗'} {name}" + (f" ({detail})" if detail else ""))
+    return condition
+
+
+def check_store_many(storage: FaceStorage, results: list):
+    storage.store_embedding("V0", "Existing Voter", vector(0))
+
+    outcome = storage.store_embeddings_many([
+        ("V1", "Voter One", vector(1)),
+        ("V0", "Existing Voter", vector(0)),
+        ("V2", "Voter Two", vector(2)),
+        (" V1 ", "Voter One Again", vector(3)),
+        ("", "No Id", vector(4)),
+        ("V3", "", vector(5)),
+        ("V4", "Voter Four", np.array([], dtype=np.float32)),
+    ])
+    succeeded = [voter_id for voter_id, success, _ in outcome if success]
+    errors = [error or "" for _, _, error in outcome]
+
+    check(results, "one result per input row, in order", len(outcome) == 7 and outcome[0][0] == "V1")
+    check(results, "valid new rows are stored", succeeded == ["V1", "V2"], f"stored {succeeded}")
+    check(results, "existing voter_id is rejected", "already exists in database" in errors[1])
+    check(results, "repeated voter_id in batch is rejected", "appears more than once in batch" in errors[3])
+    check(
+        results, "invalid rows are rejected",
+        errors[4] == "voter_id cannot be empty"
+        and errors[5] == "full_name cannot be empty"
+        and errors[6] == "embedding cannot be empty"
+    )
+    check(
+        results, "existing row is left untouched",
+        storage.get_embedding("V0")['full_name'] == "Existing Voter"
+    )
+    check(results, "table holds exactly the stored rows", storage.get_count() == 3)
+
+
+def check_model_names(storage: FaceStorage, results: list):
+    storage.store_embeddings_many([("M1", "Default Model", vector(20))])
+    storage.store_embeddings_many([
+        ("M2", "Call Model", vector(21)),
+        ("M3", "Record Model", vector(22), "ArcFace"),
+    ], model_name="Facenet512")
+
+    models = [storage.get_embedding(voter_id)['model_name'] for voter_id in ("M1", "M2", "M3")]
+    check(
+        results, "model_name defaults to the storage, then per call, then per record",
+        models == [storage.model_name, "Facenet512", "ArcFace"], f"{models}"
+    )
+    storage.delete_embeddings_many(["M1", "M2", "M3"])
+
+
+def check_concurrent_store_many(db_path: str, results: list):
+    """Two connections insert overlapping batches at the same time."""
+    first = [(f"C{i}", f"Voter {i}", vector(100 + i)) for i in range(CONCURRENT_BATCH_SIZE)]
+    offset = CONCURRENT_BATCH_SIZE // 2
+    second = [(f"C{i}", f"Voter {i}", vector(100 + i)) for i in range(offset, offset + CONCURRENT_BATCH_SIZE)]
+
+    writers = [FaceStorage(db_path=db_path, cache_size=0) for _ in range(2)]
+    outcomes = [None, None]
+    start = threading.Barrier(2)
+
+    def write(index, batch):
+        start.wait()
+        outcomes[index] = writers[index].store_embeddings_many(batch)
+
+    threads = [threading.Thread(target=write, args=(i, batch)) for i, batch in enumerate((first, second))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    successes = {}
+    for outcome in outcomes:
+        for voter_id, success, _ in outcome:
+            successes[voter_id] = successes.get(voter_id, 0) + int(success)
+
+    unique = offset + CONCURRENT_BATCH_SIZE
+    rows = sum(1 for voter in writers[0].list_all_voters() if voter['voter_id'].startswith("C"))
+    check(
+        results, "overlapping concurrent batches report one success per voter_id",
+        len(successes) == unique and all(count == 1 for count in successes.values()),
+        f"{sum(successes.values())} successes for {unique} voter_ids"
+    )
+    check(results, "overlapping concurrent batches store each voter_id once", rows == unique, f"{rows} rows")
+    for writer in writers:
+        writer.close()
+
+
+def check_delete_many(storage: FaceStorage, results: list):
+    outcome = storage.delete_embeddings_many(["V1", "missing", "V1", " V2", ""])
+    flags = [success for _, success, _ in outcome]
+    errors = [error or "" for _, _, error in outcome]
+
+    check(results, "existing voter_ids are deleted once", flags == [True, False, False, True, False])
+    check(
+        results, "missing and repeated voter_ids do not exist",
+        "does not exist" in errors[1] and "does not exist" in errors[2]
+    )
+    check(results, "empty voter_id is rejected", errors[4] == "voter_id cannot be empty")
+    check(
+        results, "deleted rows are gone from the table and the cache",
+        storage.get_embedding("V1") is None and storage.get_embedding("V2") is None
+    )
+
+
+def main():
+    print("=" * 70)
+    print("Batched Storage Behavior Check")
+    print("=" * 70)
+    print()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "faces.db")
+        storage = FaceStorage(db_path=db_path)
+
+        check_store_many(storage, results)
+        check_model_names(storage, results)
+        check_concurrent_store_many(db_path, results)
+        check_delete_many(storage, results)
+        storage.close()
+
+    passed = all(results)
+    print()
+    print("=" * 70)
+    print("PASS" if passed else "FAIL")
+    print("=" * 70)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()